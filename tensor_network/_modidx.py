@@ -36,6 +36,8 @@ d = { 'settings': { 'doc_baseurl': '/tensor-network',
                                                                                              'tensor_network/algorithms/gmps.py'),
                                                 'tensor_network.algorithms.gmps.calc_right_to_left_step': ( '4-5.html#calc_right_to_left_step',
                                                                                                             'tensor_network/algorithms/gmps.py'),
+                                                'tensor_network.algorithms.gmps.calibrate_reduced_precision': ( '4-7.html#calibrate_reduced_precision',
+                                                                                                                'tensor_network/algorithms/gmps.py'),
                                                 'tensor_network.algorithms.gmps.eval_nll': ( '4-5.html#eval_nll',
                                                                                              'tensor_network/algorithms/gmps.py'),
                                                 'tensor_network.algorithms.gmps.eval_nll_selected_features': ( '4-9.html#eval_nll_selected_features',
@@ -78,12 +80,30 @@ d = { 'settings': { 'doc_baseurl': '/tensor-network',
                                                                                                                                    'tensor_network/algorithms/tensor_decomposition.py'),
                                                                 'tensor_network.algorithms.tensor_decomposition.tucker_decomposition': ( '1-8.html#tucker_decomposition',
                                                                                                                                          'tensor_network/algorithms/tensor_decomposition.py')},
-            'tensor_network.algorithms.time_evolving_block_decimation': { 'tensor_network.algorithms.time_evolving_block_decimation.calculate_mps_local_energies': ( '5-2.html#calculate_mps_local_energies',
+            'tensor_network.algorithms.time_evolving_block_decimation': { 'tensor_network.algorithms.time_evolving_block_decimation._calc_reference_local_energies': ( '5-2.html#_calc_reference_local_energies',
+                                                                                                                                                                       'tensor_network/algorithms/time_evolving_block_decimation.py'),
+                                                                          'tensor_network.algorithms.time_evolving_block_decimation._center_after_gate': ( '5-2.html#_center_after_gate',
+                                                                                                                                                           'tensor_network/algorithms/time_evolving_block_decimation.py'),
+                                                                          'tensor_network.algorithms.time_evolving_block_decimation._matrix_decomposition_flops': ( '5-2.html#_matrix_decomposition_flops',
+                                                                                                                                                                    'tensor_network/algorithms/time_evolving_block_decimation.py'),
+                                                                          'tensor_network.algorithms.time_evolving_block_decimation.calculate_mps_local_energies': ( '5-2.html#calculate_mps_local_energies',
                                                                                                                                                                      'tensor_network/algorithms/time_evolving_block_decimation.py'),
+                                                                          'tensor_network.algorithms.time_evolving_block_decimation.choose_2body_gate_mode': ( '5-2.html#choose_2body_gate_mode',
+                                                                                                                                                               'tensor_network/algorithms/time_evolving_block_decimation.py'),
                                                                           'tensor_network.algorithms.time_evolving_block_decimation.direction_to_next_center': ( '5-2.html#direction_to_next_center',
                                                                                                                                                                  'tensor_network/algorithms/time_evolving_block_decimation.py'),
+                                                                          'tensor_network.algorithms.time_evolving_block_decimation.estimate_2body_gate_cost': ( '5-2.html#estimate_2body_gate_cost',
+                                                                                                                                                                 'tensor_network/algorithms/time_evolving_block_decimation.py'),
+                                                                          'tensor_network.algorithms.time_evolving_block_decimation.estimate_tebd_orthogonalization_cost': ( '5-2.html#estimate_tebd_orthogonalization_cost',
+                                                                                                                                                                             'tensor_network/algorithms/time_evolving_block_decimation.py'),
                                                                           'tensor_network.algorithms.time_evolving_block_decimation.evolve_gate_2body': ( '5-2.html#evolve_gate_2body',
                                                                                                                                                           'tensor_network/algorithms/time_evolving_block_decimation.py'),
+                                                                          'tensor_network.algorithms.time_evolving_block_decimation.evolve_gate_2body_swap': ( '5-2.html#evolve_gate_2body_swap',
+                                                                                                                                                               'tensor_network/algorithms/time_evolving_block_decimation.py'),
+                                                                          'tensor_network.algorithms.time_evolving_block_decimation.evolve_gate_nearest_neighbour': ( '5-2.html#evolve_gate_nearest_neighbour',
+                                                                                                                                                                      'tensor_network/algorithms/time_evolving_block_decimation.py'),
+                                                                          'tensor_network.algorithms.time_evolving_block_decimation.schedule_tebd_positions': ( '5-2.html#schedule_tebd_positions',
+                                                                                                                                                                'tensor_network/algorithms/time_evolving_block_decimation.py'),
                                                                           'tensor_network.algorithms.time_evolving_block_decimation.tebd': ( '5-2.html#tebd',
                                                                                                                                              'tensor_network/algorithms/time_evolving_block_decimation.py')},
             'tensor_network.eigen_decomposition': { 'tensor_network.eigen_decomposition.eigs_power': ( '1-6.html#eigs_power',
@@ -94,6 +114,8 @@ d = { 'settings': { 'doc_baseurl': '/tensor-network',
                                                                                                                        'tensor_network/eigen_decomposition.py')},
             'tensor_network.feature_mapping': { 'tensor_network.feature_mapping.cossin_feature_map': ( '3-5.html#cossin_feature_map',
                                                                                                        'tensor_network/feature_mapping.py'),
+                                                'tensor_network.feature_mapping.feature_map_to_qubit_mps': ( '3-5.html#feature_map_to_qubit_mps',
+                                                                                                             'tensor_network/feature_mapping.py'),
                                                 'tensor_network.feature_mapping.feature_map_to_qubit_state': ( '3-6.html#feature_map_to_qubit_state',
                                                                                                                'tensor_network/feature_mapping.py'),
                                                 'tensor_network.feature_mapping.linear_mapping': ( '4-4.html#linear_mapping',
@@ -115,6 +137,10 @@ d = { 'settings': { 'doc_baseurl': '/tensor-network',
                                                      'tensor_network.mlx.networks.res_mps.ResMPSSimple._make_local_tensor': ( '4-4-mlx.html#resmpssimple._make_local_tensor',
                                                                                                                               'tensor_network/mlx/networks/res_mps.py'),
                                                      'tensor_network.mlx.networks.res_mps.ResMPSSimple.calc': ( '4-4-mlx.html#resmpssimple.calc',
+                                                                                                                'tensor_network/mlx/networks/res_mps.py'),
+                                                     'tensor_network.mlx.networks.res_mps._transfer_matrices': ( '4-4-mlx.html#_transfer_matrices',
+                                                                                                                 'tensor_network/mlx/networks/res_mps.py'),
+                                                     'tensor_network.mlx.networks.res_mps.tree_chain_matmul': ( '4-4-mlx.html#tree_chain_matmul',
                                                                                                                 'tensor_network/mlx/networks/res_mps.py')},
             'tensor_network.mlx.utils.tensors': { 'tensor_network.mlx.utils.tensors.identity_tensor': ( '1-4-mlx.html#identity_tensor',
                                                                                                         'tensor_network/mlx/utils/tensors.py')},
@@ -122,16 +148,48 @@ d = { 'settings': { 'doc_baseurl': '/tensor-network',
                                                                                           'tensor_network/mps/functional.py'),
                                                'tensor_network.mps.functional.MPSType.get_mps_type': ( '4-1.html#mpstype.get_mps_type',
                                                                                                        'tensor_network/mps/functional.py'),
+                                               'tensor_network.mps.functional._apply_transfer_matrix': ( '4-1.html#_apply_transfer_matrix',
+                                                                                                         'tensor_network/mps/functional.py'),
+                                               'tensor_network.mps.functional._stack_mps_tensors': ( '4-1.html#_stack_mps_tensors',
+                                                                                                     'tensor_network/mps/functional.py'),
+                                               'tensor_network.mps.functional._suffix_chunk_elements': ( '4-1.html#_suffix_chunk_elements',
+                                                                                                         'tensor_network/mps/functional.py'),
+                                               'tensor_network.mps.functional._transfer_matrix_eigenvalues': ( '4-1.html#_transfer_matrix_eigenvalues',
+                                                                                                               'tensor_network/mps/functional.py'),
+                                               'tensor_network.mps.functional.calc_global_tensor_by_chunks': ( '4-1.html#calc_global_tensor_by_chunks',
+                                                                                                               'tensor_network/mps/functional.py'),
                                                'tensor_network.mps.functional.calc_global_tensor_by_contract': ( '4-1.html#calc_global_tensor_by_contract',
                                                                                                                  'tensor_network/mps/functional.py'),
                                                'tensor_network.mps.functional.calc_global_tensor_by_tensordot': ( '4-1.html#calc_global_tensor_by_tensordot',
                                                                                                                   'tensor_network/mps/functional.py'),
                                                'tensor_network.mps.functional.calc_inner_product': ( '4-1.html#calc_inner_product',
                                                                                                      'tensor_network/mps/functional.py'),
+                                               'tensor_network.mps.functional.calc_log_amplitudes': ( '4-6.html#calc_log_amplitudes',
+                                                                                                      'tensor_network/mps/functional.py'),
+                                               'tensor_network.mps.functional.calc_periodic_inner_product_by_transfer_matrix': ( '4-1.html#calc_periodic_inner_product_by_transfer_matrix',
+                                                                                                                                 'tensor_network/mps/functional.py'),
+                                               'tensor_network.mps.functional.calculate_batched_mps_norm_factors': ( '4-6.html#calculate_batched_mps_norm_factors',
+                                                                                                                     'tensor_network/mps/functional.py'),
                                                'tensor_network.mps.functional.calculate_mps_norm_factors': ( '4-1.html#calculate_mps_norm_factors',
                                                                                                              'tensor_network/mps/functional.py'),
+                                               'tensor_network.mps.functional.dequantize_tensor': ( '4-7.html#dequantize_tensor',
+                                                                                                    'tensor_network/mps/functional.py'),
                                                'tensor_network.mps.functional.gen_random_mps_tensors': ( '4-1.html#gen_random_mps_tensors',
                                                                                                          'tensor_network/mps/functional.py'),
+                                               'tensor_network.mps.functional.iter_global_tensor_chunks': ( '4-1.html#iter_global_tensor_chunks',
+                                                                                                            'tensor_network/mps/functional.py'),
+                                               'tensor_network.mps.functional.load_safetensors_mmap': ( '4-2.html#load_safetensors_mmap',
+                                                                                                        'tensor_network/mps/functional.py'),
+                                               'tensor_network.mps.functional.maxvol': ( '4-3.html#maxvol',
+                                                                                         'tensor_network/mps/functional.py'),
+                                               'tensor_network.mps.functional.memmap_safetensors': ( '4-3.html#memmap_safetensors',
+                                                                                                     'tensor_network/mps/functional.py'),
+                                               'tensor_network.mps.functional.mps_direct_sum': ( '4-3.html#mps_direct_sum',
+                                                                                                 'tensor_network/mps/functional.py'),
+                                               'tensor_network.mps.functional.mps_gram_matrix': ( '4-1.html#mps_gram_matrix',
+                                                                                                  'tensor_network/mps/functional.py'),
+                                               'tensor_network.mps.functional.mps_hadamard_product': ( '4-3.html#mps_hadamard_product',
+                                                                                                       'tensor_network/mps/functional.py'),
                                                'tensor_network.mps.functional.normalize_mps': ( '4-1.html#normalize_mps',
                                                                                                 'tensor_network/mps/functional.py'),
                                                'tensor_network.mps.functional.orthogonalize_arange': ( '4-2.html#orthogonalize_arange',
@@ -142,15 +200,83 @@ d = { 'settings': { 'doc_baseurl': '/tensor-network',
                                                                                                                 'tensor_network/mps/functional.py'),
                                                'tensor_network.mps.functional.project_multi_qubits': ( '4-6.html#project_multi_qubits',
                                                                                                        'tensor_network/mps/functional.py'),
+                                               'tensor_network.mps.functional.project_multi_qubits_batched': ( '4-6.html#project_multi_qubits_batched',
+                                                                                                               'tensor_network/mps/functional.py'),
+                                               'tensor_network.mps.functional.quantize_tensor': ( '4-7.html#quantize_tensor',
+                                                                                                  'tensor_network/mps/functional.py'),
+                                               'tensor_network.mps.functional.read_safetensors_header': ( '4-2.html#read_safetensors_header',
+                                                                                                          'tensor_network/mps/functional.py'),
+                                               'tensor_network.mps.functional.truncated_svd': ( '4-2.html#truncated_svd',
+                                                                                                'tensor_network/mps/functional.py'),
+                                               'tensor_network.mps.functional.tt_cross': ( '4-3.html#tt_cross',
+                                                                                           'tensor_network/mps/functional.py'),
                                                'tensor_network.mps.functional.tt_decomposition': ( '4-3.html#tt_decomposition',
-                                                                                                   'tensor_network/mps/functional.py')},
-            'tensor_network.mps.modules': { 'tensor_network.mps.modules.MPS': ('4-2.html#mps', 'tensor_network/mps/modules.py'),
+                                                                                                   'tensor_network/mps/functional.py'),
+                                               'tensor_network.mps.functional.tt_decomposition_out_of_core': ( '4-3.html#tt_decomposition_out_of_core',
+                                                                                                               'tensor_network/mps/functional.py'),
+                                               'tensor_network.mps.functional.variational_compress_mps': ( '4-3.html#variational_compress_mps',
+                                                                                                           'tensor_network/mps/functional.py')},
+            'tensor_network.mps.modules': { 'tensor_network.mps.modules.BatchedMPS': ( '4-6.html#batchedmps',
+                                                                                       'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.BatchedMPS.__getitem__': ( '4-6.html#batchedmps.__getitem__',
+                                                                                                   'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.BatchedMPS.__init__': ( '4-6.html#batchedmps.__init__',
+                                                                                                'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.BatchedMPS.__len__': ( '4-6.html#batchedmps.__len__',
+                                                                                               'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.BatchedMPS._stackable_range': ( '4-6.html#batchedmps._stackable_range',
+                                                                                                        'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.BatchedMPS._storage': ( '4-6.html#batchedmps._storage',
+                                                                                                'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.BatchedMPS.batch_size': ( '4-6.html#batchedmps.batch_size',
+                                                                                                  'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.BatchedMPS.device': ( '4-6.html#batchedmps.device',
+                                                                                              'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.BatchedMPS.dtype': ( '4-6.html#batchedmps.dtype',
+                                                                                             'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.BatchedMPS.from_mps_list': ( '4-6.html#batchedmps.from_mps_list',
+                                                                                                     'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.BatchedMPS.global_tensor': ( '4-6.html#batchedmps.global_tensor',
+                                                                                                     'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.BatchedMPS.length': ( '4-6.html#batchedmps.length',
+                                                                                              'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.BatchedMPS.load_from_safetensors': ( '4-6.html#batchedmps.load_from_safetensors',
+                                                                                                             'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.BatchedMPS.local_tensors': ( '4-6.html#batchedmps.local_tensors',
+                                                                                                     'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.BatchedMPS.norm': ( '4-6.html#batchedmps.norm',
+                                                                                            'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.BatchedMPS.norm_factors': ( '4-6.html#batchedmps.norm_factors',
+                                                                                                    'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.BatchedMPS.normalize_': ( '4-6.html#batchedmps.normalize_',
+                                                                                                  'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.BatchedMPS.parameters': ( '4-6.html#batchedmps.parameters',
+                                                                                                  'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.BatchedMPS.physical_dims': ( '4-6.html#batchedmps.physical_dims',
+                                                                                                     'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.BatchedMPS.save_to_safetensors': ( '4-6.html#batchedmps.save_to_safetensors',
+                                                                                                           'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.BatchedMPS.set_requires_grad_': ( '4-6.html#batchedmps.set_requires_grad_',
+                                                                                                          'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.BatchedMPS.stacked_tensor': ( '4-6.html#batchedmps.stacked_tensor',
+                                                                                                      'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.BatchedMPS.to_': ( '4-6.html#batchedmps.to_',
+                                                                                           'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.MPS': ('4-2.html#mps', 'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.MPS.__add__': ( '4-3.html#mps.__add__',
+                                                                                        'tensor_network/mps/modules.py'),
                                             'tensor_network.mps.modules.MPS.__getitem__': ( '4-2.html#mps.__getitem__',
                                                                                             'tensor_network/mps/modules.py'),
                                             'tensor_network.mps.modules.MPS.__init__': ( '4-2.html#mps.__init__',
                                                                                          'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.MPS.__mul__': ( '4-3.html#mps.__mul__',
+                                                                                        'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.MPS.__rmul__': ( '4-3.html#mps.__rmul__',
+                                                                                         'tensor_network/mps/modules.py'),
                                             'tensor_network.mps.modules.MPS.__setitem__': ( '4-2.html#mps.__setitem__',
                                                                                             'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.MPS.amplitudes': ( '4-6.html#mps.amplitudes',
+                                                                                           'tensor_network/mps/modules.py'),
                                             'tensor_network.mps.modules.MPS.center': ( '4-2.html#mps.center',
                                                                                        'tensor_network/mps/modules.py'),
                                             'tensor_network.mps.modules.MPS.center_normalize_': ( '4-2.html#mps.center_normalize_',
@@ -161,6 +287,8 @@ d = { 'settings': { 'doc_baseurl': '/tensor-network',
                                                                                               'tensor_network/mps/modules.py'),
                                             'tensor_network.mps.modules.MPS.check_orthogonality': ( '4-2.html#mps.check_orthogonality',
                                                                                                     'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.MPS.compress': ( '4-3.html#mps.compress',
+                                                                                         'tensor_network/mps/modules.py'),
                                             'tensor_network.mps.modules.MPS.device': ( '4-2.html#mps.device',
                                                                                        'tensor_network/mps/modules.py'),
                                             'tensor_network.mps.modules.MPS.dtype': ('4-2.html#mps.dtype', 'tensor_network/mps/modules.py'),
@@ -168,10 +296,14 @@ d = { 'settings': { 'doc_baseurl': '/tensor-network',
                                                                                                              'tensor_network/mps/modules.py'),
                                             'tensor_network.mps.modules.MPS.force_set_local_tensor_': ( '4-2.html#mps.force_set_local_tensor_',
                                                                                                         'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.MPS.from_function': ( '4-3.html#mps.from_function',
+                                                                                              'tensor_network/mps/modules.py'),
                                             'tensor_network.mps.modules.MPS.from_state_tensor': ( '4-2.html#mps.from_state_tensor',
                                                                                                   'tensor_network/mps/modules.py'),
                                             'tensor_network.mps.modules.MPS.global_tensor': ( '4-2.html#mps.global_tensor',
                                                                                               'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.MPS.hadamard': ( '4-3.html#mps.hadamard',
+                                                                                         'tensor_network/mps/modules.py'),
                                             'tensor_network.mps.modules.MPS.inner_product': ( '4-2.html#mps.inner_product',
                                                                                               'tensor_network/mps/modules.py'),
                                             'tensor_network.mps.modules.MPS.length': ( '4-2.html#mps.length',
@@ -191,8 +323,12 @@ d = { 'settings': { 'doc_baseurl': '/tensor-network',
                                                                                                                 'tensor_network/mps/modules.py'),
                                             'tensor_network.mps.modules.MPS.physical_dim': ( '4-2.html#mps.physical_dim',
                                                                                              'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.MPS.probabilities': ( '4-6.html#mps.probabilities',
+                                                                                              'tensor_network/mps/modules.py'),
                                             'tensor_network.mps.modules.MPS.project_multi_qubits': ( '4-6.html#mps.project_multi_qubits',
                                                                                                      'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.MPS.project_multi_qubits_batched': ( '4-6.html#mps.project_multi_qubits_batched',
+                                                                                                             'tensor_network/mps/modules.py'),
                                             'tensor_network.mps.modules.MPS.project_one_qubit': ( '4-6.html#mps.project_one_qubit',
                                                                                                   'tensor_network/mps/modules.py'),
                                             'tensor_network.mps.modules.MPS.save_to_safetensors': ( '4-2.html#mps.save_to_safetensors',
@@ -203,19 +339,63 @@ d = { 'settings': { 'doc_baseurl': '/tensor-network',
                                             'tensor_network.mps.modules.MPS.two_body_reduced_density_matrix_': ( '5-2.html#mps.two_body_reduced_density_matrix_',
                                                                                                                  'tensor_network/mps/modules.py'),
                                             'tensor_network.mps.modules.MPS.virtual_dim': ( '4-2.html#mps.virtual_dim',
-                                                                                            'tensor_network/mps/modules.py')},
+                                                                                            'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.QuantizedMPS': ( '4-7.html#quantizedmps',
+                                                                                         'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.QuantizedMPS.__getitem__': ( '4-7.html#quantizedmps.__getitem__',
+                                                                                                     'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.QuantizedMPS.__init__': ( '4-7.html#quantizedmps.__init__',
+                                                                                                  'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.QuantizedMPS.center': ( '4-7.html#quantizedmps.center',
+                                                                                                'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.QuantizedMPS.dequantize': ( '4-7.html#quantizedmps.dequantize',
+                                                                                                    'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.QuantizedMPS.device': ( '4-7.html#quantizedmps.device',
+                                                                                                'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.QuantizedMPS.dtype': ( '4-7.html#quantizedmps.dtype',
+                                                                                               'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.QuantizedMPS.length': ( '4-7.html#quantizedmps.length',
+                                                                                                'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.QuantizedMPS.local_tensors': ( '4-7.html#quantizedmps.local_tensors',
+                                                                                                       'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.QuantizedMPS.nbytes': ( '4-7.html#quantizedmps.nbytes',
+                                                                                                'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.QuantizedMPS.storage_dtype': ( '4-7.html#quantizedmps.storage_dtype',
+                                                                                                       'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules._DequantizedLocalTensors': ( '4-7.html#_dequantizedlocaltensors',
+                                                                                                     'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules._DequantizedLocalTensors.__getitem__': ( '4-7.html#_dequantizedlocaltensors.__getitem__',
+                                                                                                                 'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules._DequantizedLocalTensors.__init__': ( '4-7.html#_dequantizedlocaltensors.__init__',
+                                                                                                              'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules._DequantizedLocalTensors.__len__': ( '4-7.html#_dequantizedlocaltensors.__len__',
+                                                                                                             'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.load_mps_archive': ( '4-2.html#load_mps_archive',
+                                                                                             'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.read_mps_archive_index': ( '4-2.html#read_mps_archive_index',
+                                                                                                   'tensor_network/mps/modules.py'),
+                                            'tensor_network.mps.modules.save_mps_archive': ( '4-2.html#save_mps_archive',
+                                                                                             'tensor_network/mps/modules.py')},
             'tensor_network.networks.adqc': { 'tensor_network.networks.adqc.ADQCNet': ( '3-5.html#adqcnet',
                                                                                         'tensor_network/networks/adqc.py'),
                                               'tensor_network.networks.adqc.ADQCNet.__init__': ( '3-5.html#adqcnet.__init__',
                                                                                                  'tensor_network/networks/adqc.py'),
+                                              'tensor_network.networks.adqc.ADQCNet._apply_gates': ( '3-5.html#adqcnet._apply_gates',
+                                                                                                     'tensor_network/networks/adqc.py'),
                                               'tensor_network.networks.adqc.ADQCNet.calc_gate_target_qubit_positions': ( '3-5.html#adqcnet.calc_gate_target_qubit_positions',
                                                                                                                          'tensor_network/networks/adqc.py'),
                                               'tensor_network.networks.adqc.ADQCNet.forward': ( '3-5.html#adqcnet.forward',
                                                                                                 'tensor_network/networks/adqc.py'),
+                                              'tensor_network.networks.adqc.ADQCNet.gate_tensors': ( '3-5.html#adqcnet.gate_tensors',
+                                                                                                     'tensor_network/networks/adqc.py'),
+                                              'tensor_network.networks.adqc.ADQCNet.set_checkpointing_': ( '3-5.html#adqcnet.set_checkpointing_',
+                                                                                                           'tensor_network/networks/adqc.py'),
                                               'tensor_network.networks.adqc.calc_accuracy': ( '3-5.html#calc_accuracy',
                                                                                               'tensor_network/networks/adqc.py'),
                                               'tensor_network.networks.adqc.probabilities_adqc_classifier': ( '3-5.html#probabilities_adqc_classifier',
-                                                                                                              'tensor_network/networks/adqc.py')},
+                                                                                                              'tensor_network/networks/adqc.py'),
+                                              'tensor_network.networks.adqc.probabilities_adqc_classifier_mps': ( '3-5.html#probabilities_adqc_classifier_mps',
+                                                                                                                  'tensor_network/networks/adqc.py')},
             'tensor_network.networks.fc': {},
             'tensor_network.networks.hybrid': { 'tensor_network.networks.hybrid.FCADQCHybridClassifier': ( '3-7.html#fcadqchybridclassifier',
                                                                                                            'tensor_network/networks/hybrid.py'),
@@ -227,8 +407,34 @@ d = { 'settings': { 'doc_baseurl': '/tensor-network',
                                                                                         'tensor_network/networks/qrnn.py'),
                                               'tensor_network.networks.qrnn.ADQCRNN.__init__': ( '3-6.html#adqcrnn.__init__',
                                                                                                  'tensor_network/networks/qrnn.py'),
+                                              'tensor_network.networks.qrnn.ADQCRNN._run_steps': ( '3-6.html#adqcrnn._run_steps',
+                                                                                                   'tensor_network/networks/qrnn.py'),
+                                              'tensor_network.networks.qrnn.ADQCRNN._step': ( '3-6.html#adqcrnn._step',
+                                                                                              'tensor_network/networks/qrnn.py'),
+                                              'tensor_network.networks.qrnn.ADQCRNN.auto_checkpointing_': ( '3-6.html#adqcrnn.auto_checkpointing_',
+                                                                                                            'tensor_network/networks/qrnn.py'),
                                               'tensor_network.networks.qrnn.ADQCRNN.forward': ( '3-6.html#adqcrnn.forward',
                                                                                                 'tensor_network/networks/qrnn.py'),
+                                              'tensor_network.networks.qrnn.ADQCRNN.init_state': ( '3-6.html#adqcrnn.init_state',
+                                                                                                   'tensor_network/networks/qrnn.py'),
+                                              'tensor_network.networks.qrnn.ADQCRNN.set_checkpointing_': ( '3-6.html#adqcrnn.set_checkpointing_',
+                                                                                                           'tensor_network/networks/qrnn.py'),
+                                              'tensor_network.networks.qrnn.ADQCRNN.step': ( '3-6.html#adqcrnn.step',
+                                                                                             'tensor_network/networks/qrnn.py'),
+                                              'tensor_network.networks.qrnn.SeriesWindowLoader': ( '3-6.html#serieswindowloader',
+                                                                                                   'tensor_network/networks/qrnn.py'),
+                                              'tensor_network.networks.qrnn.SeriesWindowLoader.__init__': ( '3-6.html#serieswindowloader.__init__',
+                                                                                                            'tensor_network/networks/qrnn.py'),
+                                              'tensor_network.networks.qrnn.SeriesWindowLoader.__iter__': ( '3-6.html#serieswindowloader.__iter__',
+                                                                                                            'tensor_network/networks/qrnn.py'),
+                                              'tensor_network.networks.qrnn.SeriesWindowLoader.__len__': ( '3-6.html#serieswindowloader.__len__',
+                                                                                                           'tensor_network/networks/qrnn.py'),
+                                              'tensor_network.networks.qrnn.SeriesWindowLoader._get_windows': ( '3-6.html#serieswindowloader._get_windows',
+                                                                                                                'tensor_network/networks/qrnn.py'),
+                                              'tensor_network.networks.qrnn.SeriesWindowLoader.num_samples': ( '3-6.html#serieswindowloader.num_samples',
+                                                                                                               'tensor_network/networks/qrnn.py'),
+                                              'tensor_network.networks.qrnn.plan_rnn_checkpointing': ( '3-6.html#plan_rnn_checkpointing',
+                                                                                                       'tensor_network/networks/qrnn.py'),
                                               'tensor_network.networks.qrnn.prepare_series_samples': ( '3-6.html#prepare_series_samples',
                                                                                                        'tensor_network/networks/qrnn.py'),
                                               'tensor_network.networks.qrnn.series_sin_cos': ( '3-6.html#series_sin_cos',
@@ -237,10 +443,16 @@ d = { 'settings': { 'doc_baseurl': '/tensor-network',
                                                                                                    'tensor_network/networks/res_mps.py'),
                                                  'tensor_network.networks.res_mps.ResMPSSimple.__init__': ( '4-4.html#resmpssimple.__init__',
                                                                                                             'tensor_network/networks/res_mps.py'),
+                                                 'tensor_network.networks.res_mps.ResMPSSimple._forward_scan': ( '4-4.html#resmpssimple._forward_scan',
+                                                                                                                 'tensor_network/networks/res_mps.py'),
                                                  'tensor_network.networks.res_mps.ResMPSSimple._make_local_tensor': ( '4-4.html#resmpssimple._make_local_tensor',
                                                                                                                       'tensor_network/networks/res_mps.py'),
+                                                 'tensor_network.networks.res_mps.ResMPSSimple._transfer_matrices': ( '4-4.html#resmpssimple._transfer_matrices',
+                                                                                                                      'tensor_network/networks/res_mps.py'),
                                                  'tensor_network.networks.res_mps.ResMPSSimple.forward': ( '4-4.html#resmpssimple.forward',
-                                                                                                           'tensor_network/networks/res_mps.py')},
+                                                                                                           'tensor_network/networks/res_mps.py'),
+                                                 'tensor_network.networks.res_mps.tree_chain_matmul': ( '4-4.html#tree_chain_matmul',
+                                                                                                        'tensor_network/networks/res_mps.py')},
             'tensor_network.networks.time_evolution': { 'tensor_network.networks.time_evolution.ADQCTimeEvolution': ( '3-8.html#adqctimeevolution',
                                                                                                                       'tensor_network/networks/time_evolution.py'),
                                                         'tensor_network.networks.time_evolution.ADQCTimeEvolution.__init__': ( '3-8.html#adqctimeevolution.__init__',
@@ -252,7 +464,9 @@ d = { 'settings': { 'doc_baseurl': '/tensor-network',
                                                         'tensor_network.networks.time_evolution.PolarizationGate.__init__': ( '3-8.html#polarizationgate.__init__',
                                                                                                                               'tensor_network/networks/time_evolution.py'),
                                                         'tensor_network.networks.time_evolution.PolarizationGate.forward': ( '3-8.html#polarizationgate.forward',
-                                                                                                                             'tensor_network/networks/time_evolution.py')},
+                                                                                                                             'tensor_network/networks/time_evolution.py'),
+                                                        'tensor_network.networks.time_evolution.PolarizationGate.gate_tensor': ( '3-8.html#polarizationgate.gate_tensor',
+                                                                                                                                 'tensor_network/networks/time_evolution.py')},
             'tensor_network.quantum_state.functional': { 'tensor_network.quantum_state.functional.bipartite_entanglement_entropy': ( '5-2.html#bipartite_entanglement_entropy',
                                                                                                                                      'tensor_network/quantum_state/functional.py'),
                                                          'tensor_network.quantum_state.functional.calc_observation': ( '2-6.html#calc_observation',
@@ -266,16 +480,38 @@ d = { 'settings': { 'doc_baseurl': '/tensor-network',
                                                          'tensor_network.quantum_state.functional.project_state': ( '4-10.html#project_state',
                                                                                                                     'tensor_network/quantum_state/functional.py')},
             'tensor_network.setup_ref_code_import': {},
-            'tensor_network.tensor_gates.functional': { 'tensor_network.tensor_gates.functional.__apply_gate_for_vmap': ( '3-5.html#__apply_gate_for_vmap',
+            'tensor_network.tensor_gates.functional': { 'tensor_network.tensor_gates.functional._AdjointGateSequence': ( '3-5.html#_adjointgatesequence',
+                                                                                                                         'tensor_network/tensor_gates/functional.py'),
+                                                        'tensor_network.tensor_gates.functional._AdjointGateSequence.backward': ( '3-5.html#_adjointgatesequence.backward',
+                                                                                                                                  'tensor_network/tensor_gates/functional.py'),
+                                                        'tensor_network.tensor_gates.functional._AdjointGateSequence.forward': ( '3-5.html#_adjointgatesequence.forward',
+                                                                                                                                 'tensor_network/tensor_gates/functional.py'),
+                                                        'tensor_network.tensor_gates.functional.__apply_gate_for_vmap': ( '3-5.html#__apply_gate_for_vmap',
                                                                                                                           'tensor_network/tensor_gates/functional.py'),
+                                                        'tensor_network.tensor_gates.functional._apply_gate_either': ( '3-5.html#_apply_gate_either',
+                                                                                                                       'tensor_network/tensor_gates/functional.py'),
+                                                        'tensor_network.tensor_gates.functional._apply_gate_on_controlled_slice': ( '2-5.html#_apply_gate_on_controlled_slice',
+                                                                                                                                    'tensor_network/tensor_gates/functional.py'),
                                                         'tensor_network.tensor_gates.functional._float_convert_to_tensor': ( '3-1.html#_float_convert_to_tensor',
                                                                                                                              'tensor_network/tensor_gates/functional.py'),
+                                                        'tensor_network.tensor_gates.functional._inverse_unitary_gate': ( '3-5.html#_inverse_unitary_gate',
+                                                                                                                          'tensor_network/tensor_gates/functional.py'),
+                                                        'tensor_network.tensor_gates.functional._move_mps_center': ( '3-5.html#_move_mps_center',
+                                                                                                                     'tensor_network/tensor_gates/functional.py'),
                                                         'tensor_network.tensor_gates.functional.apply_gate': ( '2-5.html#apply_gate',
                                                                                                                'tensor_network/tensor_gates/functional.py'),
                                                         'tensor_network.tensor_gates.functional.apply_gate_batched': ( '3-5.html#apply_gate_batched',
                                                                                                                        'tensor_network/tensor_gates/functional.py'),
+                                                        'tensor_network.tensor_gates.functional.apply_gate_flat': ( '3-5.html#apply_gate_flat',
+                                                                                                                    'tensor_network/tensor_gates/functional.py'),
+                                                        'tensor_network.tensor_gates.functional.apply_gate_mps': ( '3-5.html#apply_gate_mps',
+                                                                                                                   'tensor_network/tensor_gates/functional.py'),
                                                         'tensor_network.tensor_gates.functional.apply_gate_nonbatched': ( '3-5.html#apply_gate_nonbatched',
                                                                                                                           'tensor_network/tensor_gates/functional.py'),
+                                                        'tensor_network.tensor_gates.functional.apply_gates_adjoint': ( '3-5.html#apply_gates_adjoint',
+                                                                                                                        'tensor_network/tensor_gates/functional.py'),
+                                                        'tensor_network.tensor_gates.functional.fuse_gate_tensors': ( '3-5.html#fuse_gate_tensors',
+                                                                                                                      'tensor_network/tensor_gates/functional.py'),
                                                         'tensor_network.tensor_gates.functional.gate_outer_product': ( '3-8.html#gate_outer_product',
                                                                                                                        'tensor_network/tensor_gates/functional.py'),
                                                         'tensor_network.tensor_gates.functional.get_control_gate_tensor': ( 'tensor_gate_extra.html#get_control_gate_tensor',
@@ -286,6 +522,8 @@ d = { 'settings': { 'doc_baseurl': '/tensor-network',
                                                                                                          'tensor_network/tensor_gates/functional.py'),
                                                         'tensor_network.tensor_gates.functional.pauli_operator': ( '3-1.html#pauli_operator',
                                                                                                                    'tensor_network/tensor_gates/functional.py'),
+                                                        'tensor_network.tensor_gates.functional.plan_gate_fusion': ( '3-5.html#plan_gate_fusion',
+                                                                                                                     'tensor_network/tensor_gates/functional.py'),
                                                         'tensor_network.tensor_gates.functional.rand_gate_tensor': ( 'tensor_gate_extra.html#rand_gate_tensor',
                                                                                                                      'tensor_network/tensor_gates/functional.py'),
                                                         'tensor_network.tensor_gates.functional.rand_unitary': ( 'tensor_gate_extra.html#rand_unitary',
@@ -293,15 +531,37 @@ d = { 'settings': { 'doc_baseurl': '/tensor-network',
                                                         'tensor_network.tensor_gates.functional.rotate': ( '3-1.html#rotate',
                                                                                                            'tensor_network/tensor_gates/functional.py'),
                                                         'tensor_network.tensor_gates.functional.spin_operator': ( '3-8.html#spin_operator',
-                                                                                                                  'tensor_network/tensor_gates/functional.py')},
+                                                                                                                  'tensor_network/tensor_gates/functional.py'),
+                                                        'tensor_network.tensor_gates.functional.statevector_gate_plan': ( '3-5.html#statevector_gate_plan',
+                                                                                                                          'tensor_network/tensor_gates/functional.py')},
             'tensor_network.tensor_gates.hamiltonians': { 'tensor_network.tensor_gates.hamiltonians.heisenberg': ( '2-8.html#heisenberg',
                                                                                                                    'tensor_network/tensor_gates/hamiltonians.py')},
             'tensor_network.tensor_gates.modules': { 'tensor_network.tensor_gates.modules.ADQCGate': ( '3-4.html#adqcgate',
                                                                                                        'tensor_network/tensor_gates/modules.py'),
                                                      'tensor_network.tensor_gates.modules.ADQCGate.__init__': ( '3-4.html#adqcgate.__init__',
                                                                                                                 'tensor_network/tensor_gates/modules.py'),
+                                                     'tensor_network.tensor_gates.modules.ADQCGate._gate_cache_key': ( '3-4.html#adqcgate._gate_cache_key',
+                                                                                                                       'tensor_network/tensor_gates/modules.py'),
+                                                     'tensor_network.tensor_gates.modules.ADQCGate._gate_cacheable': ( '3-4.html#adqcgate._gate_cacheable',
+                                                                                                                       'tensor_network/tensor_gates/modules.py'),
+                                                     'tensor_network.tensor_gates.modules.ADQCGate.batched_gate_tensors': ( '3-4.html#adqcgate.batched_gate_tensors',
+                                                                                                                            'tensor_network/tensor_gates/modules.py'),
                                                      'tensor_network.tensor_gates.modules.ADQCGate.forward': ( '3-4.html#adqcgate.forward',
                                                                                                                'tensor_network/tensor_gates/modules.py'),
+                                                     'tensor_network.tensor_gates.modules.ADQCGate.gate_tensor': ( '3-4.html#adqcgate.gate_tensor',
+                                                                                                                   'tensor_network/tensor_gates/modules.py'),
+                                                     'tensor_network.tensor_gates.modules.ADQCGate.invalidate_cache_': ( '3-4.html#adqcgate.invalidate_cache_',
+                                                                                                                         'tensor_network/tensor_gates/modules.py'),
+                                                     'tensor_network.tensor_gates.modules.FusedGateSequence': ( '3-5.html#fusedgatesequence',
+                                                                                                                'tensor_network/tensor_gates/modules.py'),
+                                                     'tensor_network.tensor_gates.modules.FusedGateSequence.__init__': ( '3-5.html#fusedgatesequence.__init__',
+                                                                                                                         'tensor_network/tensor_gates/modules.py'),
+                                                     'tensor_network.tensor_gates.modules.FusedGateSequence.forward': ( '3-5.html#fusedgatesequence.forward',
+                                                                                                                        'tensor_network/tensor_gates/modules.py'),
+                                                     'tensor_network.tensor_gates.modules.FusedGateSequence.fused_gate_tensors': ( '3-5.html#fusedgatesequence.fused_gate_tensors',
+                                                                                                                                   'tensor_network/tensor_gates/modules.py'),
+                                                     'tensor_network.tensor_gates.modules.FusedGateSequence.invalidate_cache_': ( '3-5.html#fusedgatesequence.invalidate_cache_',
+                                                                                                                                  'tensor_network/tensor_gates/modules.py'),
                                                      'tensor_network.tensor_gates.modules.ParameterizedGate': ( '3-4.html#parameterizedgate',
                                                                                                                 'tensor_network/tensor_gates/modules.py'),
                                                      'tensor_network.tensor_gates.modules.ParameterizedGate.__init__': ( '3-4.html#parameterizedgate.__init__',
@@ -318,22 +578,42 @@ d = { 'settings': { 'doc_baseurl': '/tensor-network',
                                                                                                           'tensor_network/tensor_gates/modules.py'),
                                                      'tensor_network.tensor_gates.modules.QuantumGate.__init__': ( '3-4.html#quantumgate.__init__',
                                                                                                                    'tensor_network/tensor_gates/modules.py'),
+                                                     'tensor_network.tensor_gates.modules.QuantumGate._apply_gate_mps': ( '3-4.html#quantumgate._apply_gate_mps',
+                                                                                                                          'tensor_network/tensor_gates/modules.py'),
                                                      'tensor_network.tensor_gates.modules.QuantumGate.apply_gate': ( '3-4.html#quantumgate.apply_gate',
                                                                                                                      'tensor_network/tensor_gates/modules.py'),
                                                      'tensor_network.tensor_gates.modules.QuantumGate.forward': ( '3-4.html#quantumgate.forward',
                                                                                                                   'tensor_network/tensor_gates/modules.py'),
+                                                     'tensor_network.tensor_gates.modules.QuantumGate.gate_tensor': ( '3-4.html#quantumgate.gate_tensor',
+                                                                                                                      'tensor_network/tensor_gates/modules.py'),
+                                                     'tensor_network.tensor_gates.modules.QuantumGate.set_mps_truncation_': ( '3-4.html#quantumgate.set_mps_truncation_',
+                                                                                                                              'tensor_network/tensor_gates/modules.py'),
                                                      'tensor_network.tensor_gates.modules.RotateGate': ( '3-4.html#rotategate',
                                                                                                          'tensor_network/tensor_gates/modules.py'),
                                                      'tensor_network.tensor_gates.modules.RotateGate.__init__': ( '3-4.html#rotategate.__init__',
                                                                                                                   'tensor_network/tensor_gates/modules.py'),
                                                      'tensor_network.tensor_gates.modules.RotateGate.forward': ( '3-4.html#rotategate.forward',
                                                                                                                  'tensor_network/tensor_gates/modules.py'),
+                                                     'tensor_network.tensor_gates.modules.RotateGate.gate_tensor': ( '3-4.html#rotategate.gate_tensor',
+                                                                                                                     'tensor_network/tensor_gates/modules.py'),
                                                      'tensor_network.tensor_gates.modules.SimpleGate': ( '3-4.html#simplegate',
                                                                                                          'tensor_network/tensor_gates/modules.py'),
                                                      'tensor_network.tensor_gates.modules.SimpleGate.__init__': ( '3-4.html#simplegate.__init__',
                                                                                                                   'tensor_network/tensor_gates/modules.py'),
                                                      'tensor_network.tensor_gates.modules.SimpleGate.forward': ( '3-4.html#simplegate.forward',
-                                                                                                                 'tensor_network/tensor_gates/modules.py')},
+                                                                                                                 'tensor_network/tensor_gates/modules.py'),
+                                                     'tensor_network.tensor_gates.modules.SimpleGate.gate_tensor': ( '3-4.html#simplegate.gate_tensor',
+                                                                                                                     'tensor_network/tensor_gates/modules.py'),
+                                                     'tensor_network.tensor_gates.modules.StateVectorSimulator': ( '3-5.html#statevectorsimulator',
+                                                                                                                   'tensor_network/tensor_gates/modules.py'),
+                                                     'tensor_network.tensor_gates.modules.StateVectorSimulator.__init__': ( '3-5.html#statevectorsimulator.__init__',
+                                                                                                                            'tensor_network/tensor_gates/modules.py'),
+                                                     'tensor_network.tensor_gates.modules.StateVectorSimulator.apply_gate_': ( '3-5.html#statevectorsimulator.apply_gate_',
+                                                                                                                               'tensor_network/tensor_gates/modules.py'),
+                                                     'tensor_network.tensor_gates.modules.StateVectorSimulator.run_': ( '3-5.html#statevectorsimulator.run_',
+                                                                                                                        'tensor_network/tensor_gates/modules.py'),
+                                                     'tensor_network.tensor_gates.modules.StateVectorSimulator.to_tensor': ( '3-5.html#statevectorsimulator.to_tensor',
+                                                                                                                             'tensor_network/tensor_gates/modules.py')},
             'tensor_network.utils.checking': { 'tensor_network.utils.checking.check_quantum_gate': ( '0-utils-checking.html#check_quantum_gate',
                                                                                                      'tensor_network/utils/checking.py'),
                                                'tensor_network.utils.checking.check_state_tensor': ( '0-utils-checking.html#check_state_tensor',
@@ -3,7 +3,7 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../../4-5.ipynb.
 
 # %% auto 0
-__all__ = ['EPS', 'calc_left_to_right_step', 'calc_right_to_left_step', 'calc_nll', 'calc_gradient', 'eval_nll', 'train_gmps', 'labels_to_binary', 'prepend_labels', 'generate_sample_with_gmps', 'gmps_classify', 'eval_nll_selected_features', 'gmps_classify_with_selected_features']
+__all__ = ['EPS', 'calc_left_to_right_step', 'calc_right_to_left_step', 'calc_nll', 'calc_gradient', 'eval_nll', 'train_gmps', 'labels_to_binary', 'prepend_labels', 'generate_sample_with_gmps', 'gmps_classify', 'calibrate_reduced_precision', 'eval_nll_selected_features', 'gmps_classify_with_selected_features']
 
 # %% ../../4-5.ipynb 2
 import torch
@@ -126,11 +126,12 @@ def eval_nll(
     prev_device = torch.get_default_device()
     torch.set_default_device(device)
     mps_local_tensors = mps.local_tensors
-    # init env vectors and norm factors
+    # init env vectors and norm factors, in the dtype of the local tensors
+    dtype = mps_local_tensors[0].dtype
     left_virtual_dim = mps_local_tensors[0].shape[0]
-    env_vector_left = torch.ones(batch_size, left_virtual_dim)
+    env_vector_left = torch.ones(batch_size, left_virtual_dim, dtype=dtype)
     right_virtual_dim = mps_local_tensors[-1].shape[-1]
-    env_vector_right = torch.ones(batch_size, right_virtual_dim)
+    env_vector_right = torch.ones(batch_size, right_virtual_dim, dtype=dtype)
     norm_factors = [None] * feature_num
 
     def samples_at(idx):
@@ -529,6 +530,55 @@ def gmps_classify(
     predictions = torch.argmin(nll_of_gmps, dim=1)  # (batch)
     return predictions
 
+# %% ../../4-7.ipynb 15
+from ..mps.modules import QuantizedMPS
+from ..mps.functional import calc_inner_product
+from typing import Dict, Sequence
+
+
+def calibrate_reduced_precision(
+    mps: MPS,
+    samples: torch.Tensor,
+    storage_dtypes: Sequence[torch.dtype] = (torch.bfloat16, torch.float16, torch.int8),
+    compute_dtype: torch.dtype = torch.float32,
+) -> Dict[torch.dtype, Dict[str, float]]:
+    """
+    Measure the degradation of a GMPS stored in reduced precisions against the full-precision GMPS on a held-out batch.
+
+    Args:
+        mps: MPS, the full-precision GMPS.
+        samples: torch.Tensor, the feature-mapped held-out samples of shape (batch, feature_num, feature_dim).
+        storage_dtypes: Sequence[torch.dtype], the storage dtypes to calibrate.
+        compute_dtype: torch.dtype, the dtype of computation of the reduced-precision GMPS.
+    Returns:
+        Dict[torch.dtype, Dict[str, float]], for each storage dtype, the mean and max absolute NLL errors per sample,
+        the fidelity |<psi|phi>|^2 / (<psi|psi> <phi|phi>) and the memory ratio to the full-precision GMPS.
+    """
+    device = mps.device
+    samples = samples.to(device=device, dtype=compute_dtype)
+    nll_ref = eval_nll(samples=samples.to(mps.dtype), mps=mps, device=device, return_avg=False)
+    # the fidelity is calculated in double precision from the product factors, to avoid underflow
+    psi = [t.detach().to(torch.float64) for t in mps.local_tensors]
+    log_psi_norm = torch.log(calc_inner_product(psi, psi).abs()).sum()
+    full_nbytes = sum(t.numel() * t.element_size() for t in mps.local_tensors)
+
+    results = {}
+    for storage_dtype in storage_dtypes:
+        quantized_mps = QuantizedMPS(mps, storage_dtype, compute_dtype)
+        nll = eval_nll(samples=samples, mps=quantized_mps, device=device, return_avg=False)
+        nll_error = (nll.to(torch.float64) - nll_ref.to(torch.float64)).abs()
+        phi = [t.to(torch.float64) for t in quantized_mps.local_tensors]
+        log_overlap = torch.log(calc_inner_product(psi, phi).abs()).sum()
+        log_phi_norm = torch.log(calc_inner_product(phi, phi).abs()).sum()
+        log_fidelity = 2 * log_overlap - log_psi_norm - log_phi_norm
+        results[storage_dtype] = {
+            "mean_nll_error": nll_error.mean().item(),
+            "max_nll_error": nll_error.max().item(),
+            "fidelity": log_fidelity.exp().item(),
+            "memory_ratio": quantized_mps.nbytes / full_nbytes,
+        }
+    return results
+
 # %% ../../4-9.ipynb 28
 from typing import Literal
 
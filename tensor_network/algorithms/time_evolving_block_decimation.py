@@ -3,7 +3,9 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../../5-2.ipynb.
 
 # %% auto 0
-__all__ = ['evolve_gate_2body', 'direction_to_next_center', 'calculate_mps_local_energies', 'tebd']
+__all__ = ['evolve_gate_2body', 'evolve_gate_nearest_neighbour', 'evolve_gate_2body_swap', 'estimate_2body_gate_cost',
+           'choose_2body_gate_mode', 'direction_to_next_center', 'calculate_mps_local_energies',
+           'estimate_tebd_orthogonalization_cost', 'schedule_tebd_positions', 'tebd']
 
 # %% ../../5-2.ipynb 2
 import torch
@@ -59,20 +61,224 @@ def evolve_gate_2body(
 
     return local_tensors
 
-# %% ../../5-2.ipynb 15
+# %% ../../5-2.ipynb 12
+from typing import Literal
+from ..mps.functional import truncated_svd
+
+
+def evolve_gate_nearest_neighbour(
+    mps_local_tensors: List[torch.Tensor],
+    gate: torch.Tensor | None,
+    p: int,
+    max_virtual_dim: int,
+    center_to: Literal["left", "right"],
+    swap: bool = False,
+    truncate_cutoff: float | None = None,
+    svd_backend: Literal["full", "randomized"] = "full",
+) -> List[torch.Tensor]:
+    """
+    Apply a 2-body gate on the neighbouring qubits p and p + 1 with one truncated SVD. The center of the MPS must be at p or p + 1.
+
+    Args:
+        mps_local_tensors: List[torch.Tensor], MPS tensors, which will be modified in place.
+        gate: torch.Tensor | None, the gate of shape (a, b, c, d), where a, b are output indices and c, d are input indices. If None, no gate is applied.
+        p: int, the position of the left qubit.
+        max_virtual_dim: int, the maximum virtual dimension of the bond between p and p + 1.
+        center_to: Literal["left", "right"], where the center is after the update, p if "left" and p + 1 if "right".
+        swap: bool, whether to swap the two qubits after applying the gate.
+        truncate_cutoff: float | None, the maximum relative discarded weight of the bond, see `truncated_svd`.
+        svd_backend: Literal["full", "randomized"], the SVD backend, see `truncated_svd`.
+
+    Returns:
+        List[torch.Tensor], the updated MPS tensors.
+    """
+    assert center_to in ["left", "right"], "center_to must be either 'left' or 'right'"
+    local_tensors = mps_local_tensors
+    theta = einsum(
+        local_tensors[p],
+        local_tensors[p + 1],
+        "left physical0 mid, mid physical1 right -> left physical0 physical1 right",
+    )
+    if gate is not None:
+        theta = einsum(
+            theta,
+            gate,
+            "left physical0 physical1 right, new0 new1 physical0 physical1 -> left new0 new1 right",
+        )
+    if swap:
+        theta = rearrange(theta, "left physical0 physical1 right -> left physical1 physical0 right")
+    left_dim, physical_dim0, physical_dim1, right_dim = theta.shape
+    u, s, v, _ = truncated_svd(
+        theta.reshape(left_dim * physical_dim0, physical_dim1 * right_dim),
+        max_virtual_dim,
+        truncate_cutoff,
+        svd_backend,
+    )
+    rank = s.shape[0]
+    s = s.to(dtype=u.dtype)
+    if center_to == "left":
+        u = u * s.unsqueeze(0)
+    else:
+        v = s.unsqueeze(1) * v
+    # factors of the SVD may not be contiguous, while orthogonalization steps need contiguous views
+    local_tensors[p] = u.reshape(left_dim, physical_dim0, rank).contiguous()
+    local_tensors[p + 1] = v.reshape(rank, physical_dim1, right_dim).contiguous()
+    return local_tensors
+
+
+def evolve_gate_2body_swap(
+    mps_local_tensors: List[torch.Tensor],
+    gate: torch.Tensor,
+    p0: int,
+    p1: int,
+    max_virtual_dim: int,
+    start: Literal["left", "right"],
+    truncate_cutoff: float | None = None,
+    svd_backend: Literal["full", "randomized"] = "full",
+) -> List[torch.Tensor]:
+    """
+    Apply a 2-body gate on qubits p0 < p1 by routing with SWAP gates, so that only nearest-neighbour updates are done
+    and the virtual dimensions in the span grow by at most the physical dimension instead of its square as in `evolve_gate_2body`.
+    The center of the MPS must be at the `start` end of the gate, i.e. p0 if "left" and p1 if "right", and it is there again after the evolution.
+
+    Args:
+        mps_local_tensors: List[torch.Tensor], MPS tensors, which will be modified in place.
+        gate: torch.Tensor, the gate of shape (a, b, c, d), where a, c act on p0 and b, d act on p1.
+        p0: int, the position of the left qubit.
+        p1: int, the position of the right qubit.
+        max_virtual_dim: int, the maximum virtual dimension.
+        start: Literal["left", "right"], the end of the gate where the center of the MPS is.
+        truncate_cutoff: float | None, the maximum relative discarded weight of each truncated bond, see `truncated_svd`.
+        svd_backend: Literal["full", "randomized"], the SVD backend, see `truncated_svd`.
+
+    Returns:
+        List[torch.Tensor], the updated MPS tensors.
+    """
+    assert p0 < p1
+    assert start in ["left", "right"], "start must be either 'left' or 'right'"
+    local_tensors = mps_local_tensors
+    # carrying the qubit outwards grows a virtual dimension by at most the physical dimension, so these steps are not truncated,
+    # and the truncation is only done on the way back
+    physical_dim = local_tensors[p0].shape[1]
+    route_dim = max_virtual_dim * physical_dim
+    truncate_kwargs = {"truncate_cutoff": truncate_cutoff, "svd_backend": svd_backend}
+    if start == "left":
+        # carry qubit p0 to p1 - 1, apply the gate and carry it back
+        for p in range(p0, p1 - 1):
+            evolve_gate_nearest_neighbour(local_tensors, None, p, route_dim, "right", swap=True)
+        evolve_gate_nearest_neighbour(
+            local_tensors, gate, p1 - 1, max_virtual_dim, "left", **truncate_kwargs
+        )
+        for p in range(p1 - 2, p0 - 1, -1):
+            evolve_gate_nearest_neighbour(
+                local_tensors, None, p, max_virtual_dim, "left", swap=True, **truncate_kwargs
+            )
+    else:
+        # carry qubit p1 to p0 + 1, apply the gate and carry it back
+        for p in range(p1 - 1, p0, -1):
+            evolve_gate_nearest_neighbour(local_tensors, None, p, route_dim, "left", swap=True)
+        evolve_gate_nearest_neighbour(
+            local_tensors, gate, p0, max_virtual_dim, "right", **truncate_kwargs
+        )
+        for p in range(p0 + 1, p1):
+            evolve_gate_nearest_neighbour(
+                local_tensors, None, p, max_virtual_dim, "right", swap=True, **truncate_kwargs
+            )
+    return local_tensors
+
+
+def _matrix_decomposition_flops(rows: int, cols: int, factor: int) -> int:
+    return factor * rows * cols * min(rows, cols)
+
+
+def estimate_2body_gate_cost(
+    mps_local_tensors: List[torch.Tensor],
+    p0: int,
+    p1: int,
+    max_virtual_dim: int,
+    mode: Literal["mpo", "swap"],
+) -> int:
+    """
+    Estimate the FLOPs of the QR and SVD decompositions needed to apply a 2-body gate on qubits p0 < p1.
+
+    In "mpo" mode (`evolve_gate_2body`), the virtual dimensions in the span grow by the square of the physical dimension
+    and the span is swept twice (QR, then truncating SVD). In "swap" mode (`evolve_gate_2body_swap`),
+    the span is traversed with 2 * (p1 - p0) - 1 two-site SVDs.
+
+    Args:
+        mps_local_tensors: List[torch.Tensor], MPS tensors.
+        p0: int, the position of the left qubit.
+        p1: int, the position of the right qubit.
+        max_virtual_dim: int, the maximum virtual dimension.
+        mode: Literal["mpo", "swap"], the way to apply the gate.
+
+    Returns:
+        int, the estimated FLOPs.
+    """
+    assert p0 < p1
+    assert mode in ["mpo", "swap"], "mode must be either 'mpo' or 'swap'"
+    QR_FACTOR, SVD_FACTOR = 2, 6
+    physical_dim = mps_local_tensors[p0].shape[1]
+    # bond_dims[k] is the virtual dimension on the left of qubit p0 + k, with the right one of p1 at the end
+    bond_dims = [mps_local_tensors[p].shape[0] for p in range(p0, p1 + 1)]
+    bond_dims.append(mps_local_tensors[p1].shape[2])
+    span = p1 - p0
+    flops = 0
+    if mode == "mpo":
+        g_dim = physical_dim**2
+        grown_dims = [bond_dims[0]] + [g_dim * d for d in bond_dims[1:-1]] + [bond_dims[-1]]
+        left_dim = grown_dims[0]
+        qr_dims = [left_dim]
+        for k in range(span):
+            rows = left_dim * physical_dim
+            flops += _matrix_decomposition_flops(rows, grown_dims[k + 1], QR_FACTOR)
+            left_dim = min(rows, grown_dims[k + 1])
+            qr_dims.append(left_dim)
+        right_dim = grown_dims[-1]
+        for k in range(span, 0, -1):
+            rows = right_dim * physical_dim
+            flops += _matrix_decomposition_flops(rows, qr_dims[k], SVD_FACTOR)
+            right_dim = min(rows, qr_dims[k], max_virtual_dim)
+    else:
+        bond_dims = [min(d, max_virtual_dim) for d in bond_dims]
+        # carrying the qubit outwards grows the bond behind it by the physical dimension, which is truncated on the way back
+        for k in range(span):
+            left_dim = bond_dims[k] * (physical_dim if k > 0 else 1)
+            flops += _matrix_decomposition_flops(
+                left_dim * physical_dim, bond_dims[k + 2] * physical_dim, SVD_FACTOR
+            )
+        for k in range(span - 2, -1, -1):
+            flops += _matrix_decomposition_flops(
+                bond_dims[k] * physical_dim, bond_dims[k + 2] * physical_dim**2, SVD_FACTOR
+            )
+    return flops
+
+
+def choose_2body_gate_mode(
+    mps_local_tensors: List[torch.Tensor], p0: int, p1: int, max_virtual_dim: int
+) -> Literal["mpo", "swap"]:
+    """
+    Choose the cheaper way to apply a 2-body gate on qubits p0 < p1, see `estimate_2body_gate_cost`.
+    """
+    mpo_cost = estimate_2body_gate_cost(mps_local_tensors, p0, p1, max_virtual_dim, "mpo")
+    swap_cost = estimate_2body_gate_cost(mps_local_tensors, p0, p1, max_virtual_dim, "swap")
+    return "mpo" if mpo_cost < swap_cost else "swap"
+
+# %% ../../5-2.ipynb 17
 from typing import Literal
 
 
 def direction_to_next_center(
     l0: int, r0: int, l1: int, r1: int
 ) -> Literal["right-to-left", "left-to-right"]:
+    # the direction is the one of the first (QR) sweep across [l0, r0], so the center ends at the other end,
+    # which should be the end closer to the next gate at [l1, r1]
     l_min = min([abs(l0 - l1), abs(l0 - r1)])
     r_min = min([abs(r0 - l1), abs(r0 - r1)])
-    # TODO: check if this is correct
     if l_min < r_min:
-        return "right-to-left"
-    else:
         return "left-to-right"
+    else:
+        return "right-to-left"
 
 
 def calculate_mps_local_energies(
@@ -92,12 +298,140 @@ def calculate_mps_local_energies(
 
     return torch.stack(local_energies)
 
-# %% ../../5-2.ipynb 17
+# %% ../../5-2.ipynb 19
+from typing import Tuple
+
+
+def _center_after_gate(center: int, p_left: int, p_right: int, next_left: int, next_right: int):
+    """
+    Follow the center of the MPS through one gate as `tebd` does, returning the new center and the number of one-bond orthogonalization steps.
+    """
+    # move the center to the closer end of the gate
+    steps = min(abs(center - p_left), abs(center - p_right))
+    # one QR sweep and one truncating SVD sweep across the gate span
+    steps += 2 * (p_right - p_left)
+    direction = direction_to_next_center(p_left, p_right, next_left, next_right)
+    new_center = p_left if direction == "left-to-right" else p_right
+    return new_center, steps
+
+
+def estimate_tebd_orthogonalization_cost(
+    positions: List[List[int]] | torch.Tensor, start_center: int | None = None
+) -> int:
+    """
+    Estimate the number of one-bond orthogonalization steps (QR or SVD) in one TEBD sweep over `positions`.
+
+    Args:
+        positions: List[List[int]] | torch.Tensor, the positions of the 2-body gates in the order of application.
+        start_center: int | None, the center of the MPS before the sweep. If None, the center left by the previous sweep is used.
+
+    Returns:
+        int, the estimated number of orthogonalization steps.
+    """
+    if isinstance(positions, torch.Tensor):
+        positions = positions.tolist()
+    assert len(positions) > 0, "positions must not be empty"
+    num = len(positions)
+    if start_center is None:
+        # the previous sweep ends with the last gate, followed by the first gate
+        p_left, p_right = positions[-1]
+        start_center, _ = _center_after_gate(p_right, p_left, p_right, *positions[0])
+
+    center = start_center
+    cost = 0
+    for i in range(num):
+        p_left, p_right = positions[i]
+        center, steps = _center_after_gate(center, p_left, p_right, *positions[(i + 1) % num])
+        cost += steps
+    return cost
+
+
+def schedule_tebd_positions(
+    positions: List[List[int]] | torch.Tensor, start_center: int | None = None
+) -> Tuple[List[int], int, int]:
+    """
+    Reorder the 2-body gates of one Trotter sweep to reduce the moves of the MPS center.
+
+    Only gates acting on disjoint qubits are swapped, so a gate is never moved across an earlier gate it shares a qubit with,
+    and the Trotter product is unchanged. The gates are picked greedily: the next gate is the one closest to the current center
+    among the gates whose overlapping predecessors are all scheduled.
+
+    Args:
+        positions: List[List[int]] | torch.Tensor, the positions of the 2-body gates in the order of the Trotter decomposition.
+        start_center: int | None, the center of the MPS before the sweep. If None, the center left by the previous sweep is used.
+
+    Returns:
+        Tuple[List[int], int, int], the new order of the gates as indices into `positions`,
+        and the estimated orthogonalization costs (see `estimate_tebd_orthogonalization_cost`) before and after scheduling.
+    """
+    if isinstance(positions, torch.Tensor):
+        positions = positions.tolist()
+    num = len(positions)
+    assert num > 0, "positions must not be empty"
+    for p_left, p_right in positions:
+        assert p_left < p_right, "positions must be sorted in each gate"
+
+    cost_before = estimate_tebd_orthogonalization_cost(positions, start_center)
+    if start_center is None:
+        p_left, p_right = positions[-1]
+        center, _ = _center_after_gate(p_right, p_left, p_right, *positions[0])
+    else:
+        center = start_center
+
+    # gate j must stay after gate i if i < j and they share a qubit
+    successors = [[] for _ in range(num)]
+    num_predecessors = [0] * num
+    for j in range(num):
+        for i in range(j):
+            if set(positions[i]) & set(positions[j]):
+                successors[i].append(j)
+                num_predecessors[j] += 1
+
+    def _distance(c: int, gate_idx: int) -> int:
+        return min(abs(c - positions[gate_idx][0]), abs(c - positions[gate_idx][1]))
+
+    ready = {j for j in range(num) if num_predecessors[j] == 0}
+    scheduled = []
+    while len(ready) > 0:
+        gate_idx = min(ready, key=lambda j: (_distance(center, j), j))
+        scheduled.append(gate_idx)
+        ready.remove(gate_idx)
+        for j in successors[gate_idx]:
+            num_predecessors[j] -= 1
+            if num_predecessors[j] == 0:
+                ready.add(j)
+        # leave the center at the end of the gate that is closer to the gates that can go next
+        p_left, p_right = positions[gate_idx]
+        candidates = ready if len(ready) > 0 else [scheduled[0]]
+        left_distance = min(_distance(p_left, j) for j in candidates)
+        right_distance = min(_distance(p_right, j) for j in candidates)
+        center = p_left if left_distance < right_distance else p_right
+
+    scheduled_positions = [positions[i] for i in scheduled]
+    cost_after = estimate_tebd_orthogonalization_cost(scheduled_positions, start_center)
+    if cost_after >= cost_before:
+        # greedy scheduling is not always better, keep the original order then
+        return list(range(num)), cost_before, cost_before
+    return scheduled, cost_before, cost_after
+
+# %% ../../5-2.ipynb 21
 from ..mps.functional import orthogonalize_arange
 from typing import Tuple
 from tqdm.auto import tqdm
-import tensor_network.setup_ref_code_import as _
-from Library.MatrixProductState import MPS_tebd
+
+
+def _calc_reference_local_energies(
+    mps: MPS, hamiltonians: List[torch.Tensor], positions: torch.Tensor
+) -> torch.Tensor:
+    # the reference code is only needed for validation, so it is imported lazily
+    import tensor_network.setup_ref_code_import as _
+    from Library.MatrixProductState import MPS_tebd
+
+    ref_mps = MPS_tebd(tensors=mps.local_tensors, para={"dtype": mps.dtype, "device": mps.device})
+    ref_mps.center = mps.center
+    ps = [p.tolist() for p in positions]
+    hs = hamiltonians if len(hamiltonians) > 1 else hamiltonians * len(ps)
+    return ref_mps.calculate_local_energies(hs, ps)
 
 
 def tebd(
@@ -112,6 +446,11 @@ def tebd(
     least_iters_for_tau: int,
     max_virtual_dim: int,
     progress_bar_kwargs: dict = {},
+    schedule_gates: bool = False,
+    long_range_mode: Literal["auto", "mpo", "swap"] = "mpo",
+    validate_with_reference: bool = False,
+    truncate_cutoff: float | None = None,
+    svd_backend: Literal["full", "randomized"] = "full",
 ) -> Tuple[MPS, torch.Tensor]:
     device = mps.device
     dtype = mps.dtype
@@ -147,15 +486,34 @@ def tebd(
     assert 1.0 > tau >= 0.0 and 1.0 > tau_min >= 0.0
     assert iterations >= 0 and calc_observation_iters >= 0 and least_iters_for_tau >= 1
     assert max_virtual_dim >= 1
+    assert long_range_mode in ["auto", "mpo", "swap"]
+
+    if schedule_gates:
+        # reorder commuting gates to move the center less, the observations still follow the original order
+        order, cost_before, cost_after = schedule_tebd_positions(positions)
+        print(f"Estimated orthogonalization steps per sweep: {cost_before} -> {cost_after}")
+        evolve_positions = positions[order]
+        evolve_hamiltonians = (
+            [hamiltonians[i] for i in order] if len(hamiltonians) > 1 else hamiltonians
+        )
+    else:
+        evolve_positions = positions
+        evolve_hamiltonians = hamiltonians
 
+    # bonds are truncated to max_virtual_dim, or fewer if the discarded weight is within truncate_cutoff
+    truncate_kwargs = {"truncate_cutoff": truncate_cutoff, "svd_backend": svd_backend}
     mps.center_orthogonalization_(
-        positions[0, -1].item(), mode="svd", truncate_dim=max_virtual_dim, normalize=False
+        evolve_positions[0, -1].item(),
+        mode="svd",
+        truncate_dim=max_virtual_dim,
+        normalize=False,
+        **truncate_kwargs,
     )
     mps.normalize_()
 
     gates = [
         view_gate_matrix_as_tensor(torch.matrix_exp(-tau * view_gate_tensor_as_matrix(h)))
-        for h in hamiltonians
+        for h in evolve_hamiltonians
     ]
 
     I = torch.eye(mps.physical_dim, dtype=torch.int32, device=device)
@@ -167,7 +525,7 @@ def tebd(
     local_energies = 0.0
 
     for t in tqdm(range(iterations), **progress_bar_kwargs):
-        for p, pos in enumerate(positions):
+        for p, pos in enumerate(evolve_positions):
             p_left, p_right = pos.tolist()
 
             if abs(mps.center - p_left) < abs(mps.center - p_right):
@@ -176,55 +534,82 @@ def tebd(
                 mps.center_orthogonalization_(p_right, mode="qr")
 
             gate = gates[p] if len(gates) > 1 else gates[0]
-            gl = rearrange(gate, "a b c d -> a (b d) c")  # (a, g, c)
-            mps_local_tensors = evolve_gate_2body(mps.local_tensors, gl, gr, p_left, p_right)
-
-            if p == interaction_num - 1:
-                pos_next = positions[0]
+            # "mpo" evolves every gate with the identity MPO; "swap" and "auto" (the cheaper one per gate)
+            # truncate at different points, so the results differ within the truncation error
+            if long_range_mode == "auto":
+                mode = choose_2body_gate_mode(mps.local_tensors, p_left, p_right, max_virtual_dim)
             else:
-                pos_next = positions[p + 1]
-
-            direction = direction_to_next_center(p_left, p_right, pos_next[0], pos_next[1])
-            if direction == "right-to-left":
-                mps_local_tensors = orthogonalize_arange(
-                    mps_tensors=mps_local_tensors,
-                    start_idx=p_right,
-                    end_idx=p_left,
-                    mode="qr",
-                    normalize=False,
-                )
-
-                mps_local_tensors = orthogonalize_arange(
-                    mps_tensors=mps_local_tensors,
-                    start_idx=p_left,
-                    end_idx=p_right,
-                    mode="svd",
-                    truncate_dim=max_virtual_dim,
-                    normalize=False,
+                mode = long_range_mode
+
+            if mode == "swap":
+                # the center stays at the end of the gate where it is
+                start = "left" if mps.center == p_left else "right"
+                mps_local_tensors = evolve_gate_2body_swap(
+                    mps.local_tensors,
+                    gate,
+                    p_left,
+                    p_right,
+                    max_virtual_dim,
+                    start,
+                    **truncate_kwargs,
                 )
-
+                center = mps.center
                 mps = MPS(mps_tensors=mps_local_tensors)
-                mps._center = p_right
+                mps._center = center
             else:
-                mps_local_tensors = orthogonalize_arange(
-                    mps_tensors=mps_local_tensors,
-                    start_idx=p_left,
-                    end_idx=p_right,
-                    mode="qr",
-                    normalize=False,
-                )
+                gl = rearrange(gate, "a b c d -> a (b d) c")  # (a, g, c)
+                mps_local_tensors = evolve_gate_2body(mps.local_tensors, gl, gr, p_left, p_right)
+
+                if p == interaction_num - 1:
+                    pos_next = evolve_positions[0]
+                else:
+                    pos_next = evolve_positions[p + 1]
+
+                # the center is left at the end of the gate closer to the next gate, which is not what earlier
+                # versions did, so the truncations and thus the results differ within the truncation error
+                direction = direction_to_next_center(p_left, p_right, pos_next[0], pos_next[1])
+                if direction == "right-to-left":
+                    mps_local_tensors = orthogonalize_arange(
+                        mps_tensors=mps_local_tensors,
+                        start_idx=p_right,
+                        end_idx=p_left,
+                        mode="qr",
+                        normalize=False,
+                    )
 
-                mps_local_tensors = orthogonalize_arange(
-                    mps_tensors=mps_local_tensors,
-                    start_idx=p_right,
-                    end_idx=p_left,
-                    mode="svd",
-                    truncate_dim=max_virtual_dim,
-                    normalize=False,
-                )
+                    mps_local_tensors = orthogonalize_arange(
+                        mps_tensors=mps_local_tensors,
+                        start_idx=p_left,
+                        end_idx=p_right,
+                        mode="svd",
+                        truncate_dim=max_virtual_dim,
+                        normalize=False,
+                        **truncate_kwargs,
+                    )
 
-                mps = MPS(mps_tensors=mps_local_tensors)
-                mps._center = p_left
+                    mps = MPS(mps_tensors=mps_local_tensors)
+                    mps._center = p_right
+                else:
+                    mps_local_tensors = orthogonalize_arange(
+                        mps_tensors=mps_local_tensors,
+                        start_idx=p_left,
+                        end_idx=p_right,
+                        mode="qr",
+                        normalize=False,
+                    )
+
+                    mps_local_tensors = orthogonalize_arange(
+                        mps_tensors=mps_local_tensors,
+                        start_idx=p_right,
+                        end_idx=p_left,
+                        mode="svd",
+                        truncate_dim=max_virtual_dim,
+                        normalize=False,
+                        **truncate_kwargs,
+                    )
+
+                    mps = MPS(mps_tensors=mps_local_tensors)
+                    mps._center = p_left
 
             mps.center_normalize_()
 
@@ -235,15 +620,10 @@ def tebd(
             t == iterations - 1
         ):
             local_energies_new = calculate_mps_local_energies(mps, hamiltonians, positions)
-            # FIXME: local_energies_new seems to be wrong, lower than avg_energy_ref
-            ref_mps = MPS_tebd(
-                tensors=mps.local_tensors, para={"dtype": mps.dtype, "device": mps.device}
-            )
-            ref_mps.center = mps.center
-            ps = [p.tolist() for p in positions]
-            hs = hamiltonians if len(hamiltonians) > 1 else hamiltonians * len(ps)
-            local_energies_ref = ref_mps.calculate_local_energies(hs, ps)
-            assert torch.allclose(local_energies_new, local_energies_ref)
+            if validate_with_reference:
+                # FIXME: local_energies_new seems to be wrong, lower than avg_energy_ref
+                local_energies_ref = _calc_reference_local_energies(mps, hamiltonians, positions)
+                assert torch.allclose(local_energies_new, local_energies_ref)
             avg_diff_local_energies = (local_energies_new - local_energies).abs().mean()
             local_energies = local_energies_new
             if avg_diff_local_energies < e0_eps or t == iterations - 1:
@@ -258,7 +638,7 @@ def tebd(
                     view_gate_matrix_as_tensor(
                         torch.matrix_exp(-tau * view_gate_tensor_as_matrix(h))
                     )
-                    for h in hamiltonians
+                    for h in evolve_hamiltonians
                 ]
                 print(f"  Reduce tau to {tau}")
 
@@ -1,12 +1,12 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../3-5.ipynb.
 
 # %% auto 0
-__all__ = ['cossin_feature_map', 'feature_map_to_qubit_state', 'linear_mapping']
+__all__ = ['cossin_feature_map', 'feature_map_to_qubit_mps', 'feature_map_to_qubit_state', 'linear_mapping']
 
-# %% ../3-5.ipynb 15
+# %% ../3-5.ipynb 26
 import torch
 
-# %% ../3-5.ipynb 16
+# %% ../3-5.ipynb 27
 def cossin_feature_map(
     samples: torch.Tensor, theta: float = 1.0, check_range: bool = True
 ) -> torch.Tensor:
@@ -44,6 +44,26 @@ def cossin_feature_map(
 
     return stacked_features
 
+# %% ../3-5.ipynb 30
+from typing import List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from tensor_network.mps.modules import MPS
+
+
+def feature_map_to_qubit_mps(features: torch.Tensor) -> List["MPS"]:
+    """
+    Convert a feature tensor of shape (batch_size, feature_dim, 2) to a list of product states in the form of MPS
+    with virtual dimensions 1, which is `feature_map_to_qubit_state` without the 2^feature_dim amplitudes.
+    """
+    assert features.ndim == 3 and features.shape[2] == 2, (
+        f"feature must be a 3D tensor of shape (batch_size, feature_dim, 2), but got {features.shape}"
+    )
+    from tensor_network.mps.modules import MPS
+
+    local_tensors = features.unsqueeze(2).unsqueeze(-1)  # (batch_size, feature_dim, 1, 2, 1)
+    return [MPS(mps_tensors=list(sample.unbind(0))) for sample in local_tensors]
+
 # %% ../3-6.ipynb 4
 from einops import einsum
 
@@ -67,7 +87,7 @@ def feature_map_to_qubit_state(features: torch.Tensor) -> torch.Tensor:
     qubit_states = einsum(*features, einsum_expression)  # (batch_size, 2, ..., 2)
     return qubit_states
 
-# %% ../4-4.ipynb 8
+# %% ../4-4.ipynb 9
 def linear_mapping(samples: torch.Tensor) -> torch.Tensor:
     """
     Apply linear feature mapping
@@ -3,7 +3,7 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../../../4-4-mlx.ipynb.
 
 # %% auto 0
-__all__ = ['ResMPSSimple']
+__all__ = ['tree_chain_matmul', 'ResMPSSimple']
 
 # %% ../../../4-4-mlx.ipynb 2
 import mlx.core as mx
@@ -12,6 +12,44 @@ from einops import einsum
 from einops.array_api import repeat
 
 # %% ../../../4-4-mlx.ipynb 6
+from typing import Literal
+
+
+def tree_chain_matmul(matrices: mx.array) -> mx.array:
+    """
+    The ordered product of a chain of batched matrices by a tree of pairwise products,
+    see `tensor_network.networks.res_mps.tree_chain_matmul`.
+
+    Args:
+        matrices: The matrices of shape (batch, length, dim, dim).
+
+    Returns:
+        mx.array: The product matrices[:, 0] @ matrices[:, 1] @ ... of shape (batch, dim, dim).
+    """
+    assert matrices.ndim == 4 and matrices.shape[1] > 0, (
+        "matrices must be of shape (batch, length, dim, dim)"
+    )
+    while matrices.shape[1] > 1:
+        length = matrices.shape[1]
+        products = matrices[:, 0 : length - 1 : 2] @ matrices[:, 1:length:2]
+        if length % 2 == 1:
+            products = mx.concatenate([products, matrices[:, length - 1 :]], axis=1)
+        matrices = products
+    return matrices[:, 0]
+
+
+def _transfer_matrices(
+    local_tensors: list[mx.array], features: mx.array, start: int, stop: int
+) -> mx.array:
+    # the residual transfer matrices (I + A_i x_i) of the sites in [start, stop), (batch, stop - start, left, right)
+    matrices = einsum(
+        mx.stack(local_tensors[start:stop], axis=0),
+        features[:, start:stop, :],
+        "site left feature right, batch site feature -> batch site left right",
+    )
+    return matrices + mx.eye(matrices.shape[-1], dtype=matrices.dtype)
+
+
 class ResMPSSimple(nn.Module):
     def __init__(
         self,
@@ -21,12 +59,20 @@ class ResMPSSimple(nn.Module):
         num_classes: int,
         virtual_dim: int,
         eps_norm: float = 1e-4,
+        contraction: Literal["auto", "sequential", "scan"] = "auto",
     ):
+        """
+        See `tensor_network.networks.res_mps.ResMPSSimple` for the arguments.
+        """
         super().__init__()
         assert num_features > 0, "num_features must be positive"
         assert num_classes > 0, "num_classes must be positive"
         assert feature_dim > 0, "feature_dim must be positive"
         assert virtual_dim > 0, "virtual_dim must be positive"
+        assert contraction in ["auto", "sequential", "scan"]
+        if contraction == "auto":
+            contraction = "scan" if virtual_dim**3 <= num_features else "sequential"
+        self.contraction = contraction
         self.num_features = num_features
         self.num_classes = num_classes
         self.virtual_dim = virtual_dim
@@ -113,6 +159,7 @@ class ResMPSSimple(nn.Module):
         contract_vector: mx.array,
         features: mx.array,
         class_idx: int,
+        use_scan: bool = False,
     ) -> mx.array:
         batch_size, num_features, _ = features.shape
         latent_left = repeat(
@@ -120,6 +167,38 @@ class ResMPSSimple(nn.Module):
             "virtual_left -> batch virtual_left",
             batch=batch_size,
         )
+        latent_right = repeat(
+            mx.stop_gradient(contract_vector),
+            "virtual_right -> batch virtual_right",
+            batch=batch_size,
+        )
+        if use_scan:
+            if class_idx > 0:
+                # latent_left @ T_0 @ T_1 @ ... @ T_{class_idx - 1}
+                left_matrices = _transfer_matrices(local_tensors, features, 0, class_idx)
+                latent_left = einsum(
+                    latent_left,
+                    tree_chain_matmul(left_matrices),
+                    "batch left, batch left right -> batch right",
+                )
+            if class_idx + 1 < num_features:
+                # T_{class_idx + 1} @ ... @ T_{num_features - 1} @ latent_right
+                right_matrices = _transfer_matrices(
+                    local_tensors, features, class_idx + 1, num_features
+                )
+                latent_right = einsum(
+                    tree_chain_matmul(right_matrices),
+                    latent_right,
+                    "batch left right, batch right -> batch left",
+                )
+            return einsum(
+                local_tensors[class_idx],
+                latent_left,
+                latent_right,
+                features[:, class_idx, :],
+                "left feature right classes, batch left, batch right, batch feature -> batch classes",
+            )
+
         for feature_idx in range(class_idx):
             latent = einsum(
                 local_tensors[feature_idx],
@@ -129,11 +208,6 @@ class ResMPSSimple(nn.Module):
             )
             latent_left = latent + latent_left  # residual
 
-        latent_right = repeat(
-            mx.stop_gradient(contract_vector),
-            "virtual_right -> batch virtual_right",
-            batch=batch_size,
-        )
         for feature_idx in range(num_features - 1, class_idx, -1):
             latent = einsum(
                 local_tensors[feature_idx],
@@ -164,4 +238,5 @@ class ResMPSSimple(nn.Module):
             self.contract_vector,
             features,
             self.class_idx,
+            self.contraction == "scan",
         )
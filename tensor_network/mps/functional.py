@@ -3,7 +3,7 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../../4-1.ipynb.
 
 # %% auto 0
-__all__ = ['MPSType', 'gen_random_mps_tensors', 'calc_global_tensor_by_contract', 'calc_global_tensor_by_tensordot', 'calculate_mps_norm_factors', 'normalize_mps', 'calc_inner_product', 'orthogonalize_left2right_step', 'orthogonalize_right2left_step', 'orthogonalize_arange', 'tt_decomposition', 'project_multi_qubits']
+__all__ = ['MPSType', 'gen_random_mps_tensors', 'calc_global_tensor_by_contract', 'calc_global_tensor_by_tensordot', 'iter_global_tensor_chunks', 'calc_global_tensor_by_chunks', 'calculate_mps_norm_factors', 'normalize_mps', 'calc_inner_product', 'mps_gram_matrix', 'calc_periodic_inner_product_by_transfer_matrix', 'truncated_svd', 'orthogonalize_left2right_step', 'orthogonalize_right2left_step', 'orthogonalize_arange', 'read_safetensors_header', 'load_safetensors_mmap', 'tt_decomposition', 'mps_direct_sum', 'mps_hadamard_product', 'variational_compress_mps', 'maxvol', 'tt_cross', 'memmap_safetensors', 'tt_decomposition_out_of_core', 'project_multi_qubits', 'calc_log_amplitudes', 'project_multi_qubits_batched', 'calculate_batched_mps_norm_factors', 'quantize_tensor', 'dequantize_tensor']
 
 # %% ../../4-1.ipynb 2
 import torch
@@ -143,8 +143,132 @@ def calc_global_tensor_by_tensordot(mps_tensors: List[torch.Tensor]) -> torch.Te
         raise NotImplementedError(f"MPS type {mps_type} is not implemented")
 
 # %% ../../4-1.ipynb 12
+from itertools import product
+from typing import Iterator, Tuple
+import math
+import numpy as np
+
+
+def _suffix_chunk_elements(mps_tensors: List[torch.Tensor], prefix_length: int) -> int:
+    # the number of elements of the contracted suffix, including its two virtual dimensions
+    num_elements = mps_tensors[prefix_length].shape[0] if prefix_length < len(mps_tensors) else 1
+    for tensor in mps_tensors[prefix_length:]:
+        num_elements *= tensor.shape[1]
+    return num_elements * mps_tensors[-1].shape[2]
+
+
+def iter_global_tensor_chunks(
+    mps_tensors: List[torch.Tensor],
+    prefix_length: int | None = None,
+    memory_budget: int = 2**28,
+) -> Iterator[Tuple[int, torch.Tensor]]:
+    """
+    Iterate over the global tensor in contiguous chunks without forming it at once.
+
+    The physical indices of the first `prefix_length` sites are enumerated in lexicographic order,
+    and for each of them the chunk global_tensor[prefix] is the product of the projected prefix tensors and the contracted suffix.
+    The suffix is contracted only once, and the products of the prefix tensors are shared between neighbouring prefixes.
+
+    Args:
+        mps_tensors: List[torch.Tensor], the MPS tensors
+        prefix_length: int | None, the number of enumerated sites. If None, the smallest one is chosen
+            such that the contracted suffix fits in `memory_budget`.
+        memory_budget: int, the approximate bound of the memory for the contracted suffix and a chunk in bytes
+
+    Returns:
+        Iterator[Tuple[int, torch.Tensor]], the offsets of the chunks in the flattened global tensor,
+        and the chunks of shape (physical_dim,) * (length - prefix_length)
+    """
+    length = len(mps_tensors)
+    if prefix_length is None:
+        itemsize = mps_tensors[0].element_size()
+        prefix_length = 0
+        # the suffix and a chunk of the same size are in memory at the same time
+        while (
+            prefix_length < length
+            and 2 * _suffix_chunk_elements(mps_tensors, prefix_length) * itemsize > memory_budget
+        ):
+            prefix_length += 1
+    assert 0 <= prefix_length <= length, "prefix_length must be in [0, length]"
+    dtype = mps_tensors[0].dtype
+    device = mps_tensors[0].device
+    end_dim = mps_tensors[-1].shape[2]
+
+    if prefix_length < length:
+        suffix = mps_tensors[prefix_length]
+        for tensor in mps_tensors[prefix_length + 1 :]:
+            suffix = torch.tensordot(suffix, tensor, dims=([-1], [0]))
+    else:
+        suffix = torch.eye(end_dim, dtype=dtype, device=device)
+    suffix_shape = suffix.shape[1:-1]
+    suffix = suffix.reshape(suffix.shape[0], -1, end_dim)  # (virtual_dim, chunk_size, end_dim)
+    chunk_size = suffix.shape[1]
+
+    # envs[j] is the product of the first j projected local tensors of the current prefix
+    envs = [torch.eye(mps_tensors[0].shape[0], dtype=dtype, device=device)]
+    envs += [None] * prefix_length
+    previous_prefix = None
+    prefix_ranges = [range(tensor.shape[1]) for tensor in mps_tensors[:prefix_length]]
+    for chunk_idx, prefix in enumerate(product(*prefix_ranges)):
+        if previous_prefix is None:
+            changed = 0
+        else:
+            changed = next(j for j in range(prefix_length) if prefix[j] != previous_prefix[j])
+        for j in range(changed, prefix_length):
+            envs[j + 1] = envs[j] @ mps_tensors[j][:, prefix[j], :]
+        previous_prefix = prefix
+        # the trace closes periodic MPS and is trivial for open MPS
+        chunk = torch.einsum("ab,bma->m", envs[-1], suffix)
+        yield chunk_idx * chunk_size, chunk.reshape(suffix_shape)
+
+
+def calc_global_tensor_by_chunks(
+    mps_tensors: List[torch.Tensor],
+    out: torch.Tensor | np.ndarray | None = None,
+    prefix_length: int | None = None,
+    memory_budget: int = 2**28,
+) -> torch.Tensor | np.ndarray:
+    """
+    Calculate the global tensor chunk by chunk with `iter_global_tensor_chunks`, writing the chunks into `out`.
+
+    Args:
+        mps_tensors: List[torch.Tensor], the MPS tensors
+        out: torch.Tensor | np.ndarray | None, the C-contiguous buffer of the global tensor, e.g. a np.memmap.
+            If None, a new tensor is allocated.
+        prefix_length: int | None, the number of enumerated sites, see `iter_global_tensor_chunks`.
+        memory_budget: int, the approximate bound of the working memory in bytes, see `iter_global_tensor_chunks`.
+
+    Returns:
+        torch.Tensor | np.ndarray, the global tensor, which is `out` if provided
+    """
+    shape = tuple(tensor.shape[1] for tensor in mps_tensors)
+    if out is None:
+        out = torch.empty(shape, dtype=mps_tensors[0].dtype, device=mps_tensors[0].device)
+    num_elements = math.prod(shape)
+    if isinstance(out, np.ndarray):
+        assert out.size == num_elements and out.flags.c_contiguous, (
+            f"out must be C-contiguous with {num_elements} elements"
+        )
+    else:
+        assert out.numel() == num_elements and out.is_contiguous(), (
+            f"out must be contiguous with {num_elements} elements"
+        )
+    flat_out = out.reshape(-1)
+    for offset, chunk in iter_global_tensor_chunks(mps_tensors, prefix_length, memory_budget):
+        chunk = chunk.reshape(-1)
+        if isinstance(out, np.ndarray):
+            chunk = chunk.detach().cpu().numpy()
+        flat_out[offset : offset + chunk.shape[0]] = chunk
+    return out
+
+# %% ../../4-1.ipynb 15
+from typing import Literal
+
+
 def calculate_mps_norm_factors(
-    mps_tensors: List[torch.Tensor], __efficient_mode: bool = True
+    mps_tensors: List[torch.Tensor],
+    __efficient_mode: bool = True,
+    periodic_method: Literal["exact", "transfer"] = "exact",
 ) -> torch.Tensor:
     """
     Calculate the norm factors of the MPS
@@ -152,6 +276,8 @@ def calculate_mps_norm_factors(
     Args:
         mps_tensors: List[torch.Tensor], the MPS tensors
         __efficient_mode: bool, whether to use efficient mode, only for Open MPS
+        periodic_method: Literal["exact", "transfer"], the method for Periodic MPS,
+            "transfer" for `calc_periodic_inner_product_by_transfer_matrix` with its default options
 
     Returns:
         torch.Tensor, the norm factors
@@ -163,6 +289,7 @@ def calculate_mps_norm_factors(
     device = conjugates[0].device
     dtype = conjugates[0].dtype
     mps_type = MPSType.get_mps_type(mps_tensors)
+    assert periodic_method in ["exact", "transfer"]
 
     if mps_type == MPSType.Open:
         v = torch.ones(1, 1, dtype=dtype, device=device)  # dims: a b
@@ -181,6 +308,12 @@ def calculate_mps_norm_factors(
                 v /= norm_factor
                 norm_factors[i] = norm_factor
         return norm_factors
+    elif mps_type == MPSType.Periodic and periodic_method == "transfer":
+        norm_factors = calc_periodic_inner_product_by_transfer_matrix(mps_tensors, mps_tensors)
+        final_norm_factor = norm_factors[-1]
+        norm_factors = norm_factors[:-1]
+        norm_factors[-1] *= final_norm_factor
+        return norm_factors
     elif mps_type == MPSType.Periodic:
         virtual_dim = mps_tensors[0].shape[0]
         norm_factors = torch.empty(length, dtype=dtype, device=device)
@@ -199,7 +332,7 @@ def calculate_mps_norm_factors(
     else:
         raise NotImplementedError(f"MPS type {mps_type} is not implemented")
 
-# %% ../../4-1.ipynb 18
+# %% ../../4-1.ipynb 21
 def normalize_mps(mps_tensors: List[torch.Tensor]) -> List[torch.Tensor]:
     """
     Normalize the MPS
@@ -222,14 +355,23 @@ def normalize_mps(mps_tensors: List[torch.Tensor]) -> List[torch.Tensor]:
     end_tensor = mps_tensors[-1] * normalization_factors[-1]
     return [front_tensor] + [normalized_middle_tensors[i] for i in range(length - 2)] + [end_tensor]
 
-# %% ../../4-1.ipynb 23
-def calc_inner_product(mps0: List[torch.Tensor], mps1: List[torch.Tensor]) -> torch.Tensor:
+# %% ../../4-1.ipynb 26
+from typing import Literal
+
+
+def calc_inner_product(
+    mps0: List[torch.Tensor],
+    mps1: List[torch.Tensor],
+    periodic_method: Literal["exact", "transfer"] = "exact",
+) -> torch.Tensor:
     """
     Calculate the inner product of two MPS of length N
 
     Args:
         mps0: List[torch.Tensor], the first MPS that to be conjugated
         mps1: List[torch.Tensor], the second MPS
+        periodic_method: Literal["exact", "transfer"], the method if any of two MPS is periodic,
+            "transfer" for `calc_periodic_inner_product_by_transfer_matrix` with its default options
 
     Returns:
         torch.Tensor, inner product factors of lengh N + 1
@@ -239,6 +381,9 @@ def calc_inner_product(mps0: List[torch.Tensor], mps1: List[torch.Tensor]) -> to
     assert mps1[0].shape[0] == mps1[-1].shape[-1]
     assert mps0[0].dtype == mps1[0].dtype
     assert mps0[0].device == mps1[0].device
+    assert periodic_method in ["exact", "transfer"]
+    if periodic_method == "transfer" and (mps0[0].shape[0] > 1 or mps1[0].shape[0] > 1):
+        return calc_periodic_inner_product_by_transfer_matrix(mps0, mps1)
     endpoint_virtual_dim1 = mps0[0].shape[0]
     endpoint_virtual_dim2 = mps1[0].shape[0]
     length = len(mps0)
@@ -273,10 +418,290 @@ def calc_inner_product(mps0: List[torch.Tensor], mps1: List[torch.Tensor]) -> to
 
     return inner_product_factors
 
+# %% ../../4-1.ipynb 30
+def _stack_mps_tensors(
+    mps_list: List[List[torch.Tensor]], site: int, left_dim: int, right_dim: int
+) -> torch.Tensor:
+    # zero padding of the virtual dimensions does not change the contractions
+    physical_dim = mps_list[0][site].shape[1]
+    stacked = torch.zeros(
+        len(mps_list),
+        left_dim,
+        physical_dim,
+        right_dim,
+        dtype=mps_list[0][site].dtype,
+        device=mps_list[0][site].device,
+    )
+    for m, mps_tensors in enumerate(mps_list):
+        tensor = mps_tensors[site]
+        stacked[m, : tensor.shape[0], :, : tensor.shape[2]] = tensor
+    return stacked
+
+
+def mps_gram_matrix(
+    mps_list: List[List[torch.Tensor]],
+    log: bool = False,
+    memory_budget: int = 2**28,
+) -> torch.Tensor | Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Calculate the inner products <mps_m|mps_n> of all pairs of open MPS of the same length with batched contractions.
+
+    The MPS are stacked along a model axis, with virtual dimensions padded by zeros, and the environments of all pairs
+    are contracted site by site and normalized in the log domain. Only the blocks of pairs on and above the diagonal
+    are contracted, the others follow from the Hermitian symmetry, and the model axis is chunked so that the environments
+    of a block fit in `memory_budget`.
+
+    Args:
+        mps_list: List[List[torch.Tensor]], the MPS tensors of M open MPS
+        log: bool, whether to return the inner products in the log domain
+        memory_budget: int, the approximate bound of the memory for the environments of a block in bytes
+
+    Returns:
+        torch.Tensor | Tuple[torch.Tensor, torch.Tensor], the (M, M) Gram matrix if not `log`,
+        otherwise the phases and the logs of the absolute values of the inner products as in `torch.linalg.slogdet`
+    """
+    num_mps = len(mps_list)
+    assert num_mps > 0, "mps_list must not be empty"
+    length = len(mps_list[0])
+    for mps_tensors in mps_list:
+        assert len(mps_tensors) == length, "all MPS must have the same length"
+        assert MPSType.get_mps_type(mps_tensors) == MPSType.Open, "only open MPS are supported"
+    dtype = mps_list[0][0].dtype
+    device = mps_list[0][0].device
+    # the padded virtual dimensions, bond_dims[i] is the left one of site i
+    bond_dims = [1] + [max(mps[i].shape[2] for mps in mps_list) for i in range(length - 1)] + [1]
+    stacked = [
+        _stack_mps_tensors(mps_list, i, bond_dims[i], bond_dims[i + 1]) for i in range(length)
+    ]
+
+    # the largest intermediate is (chunk, chunk, virtual_dim, physical_dim, virtual_dim)
+    max_dim = max(bond_dims)
+    max_physical_dim = max(t.shape[2] for t in stacked)
+    itemsize = stacked[0].element_size()
+    chunk = int((memory_budget / (2 * itemsize * max_dim**2 * max_physical_dim)) ** 0.5)
+    chunk = max(1, min(chunk, num_mps))
+
+    phases = torch.empty(num_mps, num_mps, dtype=dtype, device=device)
+    log_abs = torch.empty(num_mps, num_mps, dtype=stacked[0].real.dtype, device=device)
+    for row_start in range(0, num_mps, chunk):
+        rows = slice(row_start, row_start + chunk)
+        for col_start in range(row_start, num_mps, chunk):
+            cols = slice(col_start, col_start + chunk)
+            num_rows = len(range(num_mps)[rows])
+            num_cols = len(range(num_mps)[cols])
+            env = torch.ones(num_rows, num_cols, 1, 1, dtype=dtype, device=device)
+            block_log_abs = torch.zeros(num_rows, num_cols, dtype=log_abs.dtype, device=device)
+            for i in range(length):
+                # m, n: models of rows and columns, a, b: conjugated virtual dims, p, q: virtual dims
+                env = torch.einsum(
+                    "mnap,madb,npdq->mnbq", env, stacked[i][rows].conj(), stacked[i][cols]
+                )
+                norm = torch.linalg.matrix_norm(env)  # (m, n)
+                # zero inner products stay zero with log_abs = -inf
+                env = env / torch.where(norm > 0, norm, 1).unsqueeze(-1).unsqueeze(-1)
+                block_log_abs = block_log_abs + torch.log(norm)
+            block = env[:, :, 0, 0]
+            block_log_abs = block_log_abs + torch.log(block.abs())
+            block_phases = block / torch.where(block.abs() > 0, block.abs(), 1)
+            phases[rows, cols] = block_phases
+            log_abs[rows, cols] = block_log_abs
+            phases[cols, rows] = block_phases.conj().T
+            log_abs[cols, rows] = block_log_abs.T
+
+    if log:
+        return phases, log_abs
+    else:
+        return phases * torch.exp(log_abs)
+
+# %% ../../4-1.ipynb 34
+from scipy.sparse.linalg import LinearOperator, eigs
+
+
+def _apply_transfer_matrix(
+    vectors: torch.Tensor, tensor0_conj: torch.Tensor, tensor1: torch.Tensor
+) -> torch.Tensor:
+    # vectors - (left_conj, left, batch) -> (right_conj, right, batch), without forming the (D^2, D^2) transfer matrix
+    vectors = torch.einsum("apk,adb->pdbk", vectors, tensor0_conj)
+    return torch.einsum("pdbk,pdq->bqk", vectors, tensor1)
+
+
+def _transfer_matrix_eigenvalues(
+    tensor0: torch.Tensor, tensor1: torch.Tensor, num_eigenvalues: int
+) -> torch.Tensor:
+    # the eigenvalues of the largest magnitude, in descending order of magnitude
+    virtual_dim0, virtual_dim1 = tensor0.shape[0], tensor1.shape[0]
+    size = virtual_dim0 * virtual_dim1
+    tensor0_conj = tensor0.conj()
+    if num_eigenvalues >= size - 1:
+        # ARPACK needs num_eigenvalues < size - 1, and a dense solve is cheap then
+        identity = torch.eye(size, dtype=tensor1.dtype, device=tensor1.device)
+        transfer_matrix = _apply_transfer_matrix(
+            identity.reshape(virtual_dim0, virtual_dim1, size), tensor0_conj, tensor1
+        ).reshape(size, size)
+        eigenvalues = torch.linalg.eigvals(transfer_matrix)
+    else:
+        dtype = np.complex128 if tensor1.is_complex() else np.float64
+
+        def _matvec(x: np.ndarray) -> np.ndarray:
+            vector = torch.from_numpy(np.ascontiguousarray(x).reshape(-1)).to(
+                dtype=tensor1.dtype, device=tensor1.device
+            )
+            vector = vector.reshape(virtual_dim0, virtual_dim1, 1)
+            result = _apply_transfer_matrix(vector, tensor0_conj, tensor1)
+            return result.reshape(-1).cpu().numpy().astype(dtype)
+
+        operator = LinearOperator((size, size), matvec=_matvec, dtype=dtype)
+        eigenvalues = eigs(operator, k=num_eigenvalues, which="LM", return_eigenvectors=False)
+        eigenvalues = torch.from_numpy(eigenvalues).to(device=tensor1.device)
+    order = torch.argsort(eigenvalues.abs(), descending=True)
+    return eigenvalues[order][:num_eigenvalues]
+
+
+def calc_periodic_inner_product_by_transfer_matrix(
+    mps0: List[torch.Tensor],
+    mps1: List[torch.Tensor],
+    num_eigenvalues: int = 6,
+    boundary_rank: int | None = None,
+    num_passes: int = 2,
+) -> torch.Tensor:
+    """
+    Calculate the inner product of two periodic MPS of length N with the transfer matrices
+    E_i = sum_d conj(mps0[i][:, d, :]) ⊗ mps1[i][:, d, :], whose product is traced, without carrying the (D, D, D, D) identity.
+
+    If both MPS are translation invariant, i.e. all their local tensors are the same, Tr(E^N) = sum_k lambda_k^N is approximated
+    by the `num_eigenvalues` eigenvalues of E of the largest magnitude, computed by Arnoldi iterations on the D^2-dimensional operator.
+    Otherwise, the identity at the boundary is approximated by Q Q^dagger of rank `boundary_rank`, where Q spans the dominant
+    subspace of the product of the transfer matrices found by `num_passes` passes of subspace iteration around the ring.
+    Both are exact when `num_eigenvalues` or `boundary_rank` is D^2, and accurate for long chains with a gapped spectrum.
+
+    Args:
+        mps0: List[torch.Tensor], the first periodic MPS that to be conjugated
+        mps1: List[torch.Tensor], the second periodic MPS
+        num_eigenvalues: int, the number of eigenvalues for translation-invariant MPS
+        boundary_rank: int | None, the rank of the boundary for the other MPS. If None, 2 * D is used.
+        num_passes: int, the number of passes of subspace iteration for the other MPS
+
+    Returns:
+        torch.Tensor, inner product factors of length N + 1
+    """
+    assert len(mps0) == len(mps1)
+    assert mps0[0].dtype == mps1[0].dtype
+    assert mps0[0].device == mps1[0].device
+    length = len(mps0)
+    dtype = mps0[0].dtype
+    device = mps0[0].device
+    virtual_dim0, virtual_dim1 = mps0[0].shape[0], mps1[0].shape[0]
+    size = virtual_dim0 * virtual_dim1
+    inner_product_factors = torch.empty(length + 1, dtype=dtype, device=device)
+
+    translation_invariant = all(
+        torch.equal(mps0[i], mps0[0]) and torch.equal(mps1[i], mps1[0]) for i in range(1, length)
+    )
+    if translation_invariant:
+        eigenvalues = _transfer_matrix_eigenvalues(mps0[0], mps1[0], min(num_eigenvalues, size))
+        leading = eigenvalues[0]
+        # Tr(E^N) = lambda_0^N * sum_k (lambda_k / lambda_0)^N
+        trace = ((eigenvalues / leading) ** length).sum()
+        if not dtype.is_complex:
+            # the dominant eigenvalue of a real E can be complex, so only its magnitude goes into
+            # the factors, and its phase^N stays in the complex trace until the real part is taken
+            magnitude = leading.abs()
+            trace = ((leading / magnitude) ** length * trace).real
+            leading = magnitude
+        inner_product_factors[:length] = leading.to(dtype=dtype)
+        inner_product_factors[-1] = trace.to(dtype=dtype)
+        return inner_product_factors
+
+    if boundary_rank is None:
+        boundary_rank = 2 * max(virtual_dim0, virtual_dim1)
+    rank = min(size, boundary_rank)
+    conjugates = [t.conj() for t in mps0]
+    q = torch.randn(size, rank, dtype=dtype, device=device)
+    q, _ = torch.linalg.qr(q)
+    for _ in range(num_passes):
+        vectors = q.reshape(virtual_dim0, virtual_dim1, rank)
+        for i in range(length):
+            vectors = _apply_transfer_matrix(vectors, conjugates[i], mps1[i])
+            shape = vectors.shape
+            if shape[0] * shape[1] >= rank:
+                # orthonormalize to keep the subspace from collapsing to the dominant vector
+                vectors, _ = torch.linalg.qr(vectors.reshape(-1, rank))
+                vectors = vectors.reshape(shape)
+            else:
+                vectors = vectors / vectors.norm()
+        q, _ = torch.linalg.qr(vectors.reshape(size, rank))
+
+    # Tr(prod E_i) ~ Tr(Q^dagger (prod E_i) Q)
+    vectors = q.reshape(virtual_dim0, virtual_dim1, rank)
+    for i in range(length):
+        vectors = _apply_transfer_matrix(vectors, conjugates[i], mps1[i])
+        product_factor = vectors.norm()
+        vectors = vectors / product_factor
+        inner_product_factors[i] = product_factor
+    inner_product_factors[-1] = torch.trace(q.mH @ vectors.reshape(size, rank))
+    return inner_product_factors
+
 # %% ../../4-2.ipynb 4
 from typing import Literal, Tuple
 
 
+def truncated_svd(
+    matrix: torch.Tensor,
+    truncate_dim: int | None = None,
+    truncate_cutoff: float | None = None,
+    svd_backend: Literal["full", "randomized"] = "full",
+    oversample: int = 10,
+) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]:
+    """
+    SVD of a matrix, truncated by a maximum dimension and/or a relative discarded weight.
+
+    The relative discarded weight is the sum of the discarded squared singular values divided by the sum of all of them,
+    i.e. the squared relative Frobenius norm of the truncation error.
+
+    Args:
+        matrix: torch.Tensor, the matrix of shape (m, n).
+        truncate_dim: int | None, the maximum number of singular values to keep. If None, no limit.
+        truncate_cutoff: float | None, the maximum relative discarded weight. If None, only `truncate_dim` is used.
+        svd_backend: Literal["full", "randomized"], "full" for `torch.linalg.svd`, "randomized" for `torch.svd_lowrank`,
+            which only computes `truncate_dim + oversample` singular values and requires `truncate_dim`.
+        oversample: int, the number of extra singular values computed by the randomized backend.
+
+    Returns:
+        Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor], u of shape (m, k), s of shape (k,), v of shape (k, n),
+        and the relative discarded weight as a 0-dim tensor.
+    """
+    assert svd_backend in ["full", "randomized"], (
+        "svd_backend must be either 'full' or 'randomized'"
+    )
+    assert truncate_dim is None or truncate_dim > 0, "truncate_dim must be positive"
+    assert truncate_cutoff is None or truncate_cutoff >= 0, "truncate_cutoff must be non-negative"
+    if svd_backend == "randomized":
+        assert truncate_dim is not None, "truncate_dim must be provided for the randomized backend"
+        q = min(truncate_dim + oversample, *matrix.shape)
+        u, s, v = torch.svd_lowrank(matrix, q=q, niter=2)
+        v = v.mH
+        # singular values beyond q are not computed, so the total weight comes from the matrix itself
+        total_weight = matrix.norm() ** 2
+    else:
+        u, s, v = torch.linalg.svd(matrix, full_matrices=False)
+        total_weight = (s**2).sum()
+
+    rank = s.shape[0]
+    if truncate_dim is not None:
+        rank = min(rank, truncate_dim)
+    kept_weight = torch.cumsum(s**2, dim=0)
+    if truncate_cutoff is not None and total_weight > 0:
+        # keep the fewest singular values whose discarded weight is within the cutoff
+        discarded = (total_weight - kept_weight) / total_weight
+        cutoff_rank = int((discarded > truncate_cutoff).sum().item()) + 1
+        rank = min(rank, cutoff_rank)
+    if total_weight > 0:
+        discarded_weight = ((total_weight - kept_weight[rank - 1]) / total_weight).clamp(min=0)
+    else:
+        discarded_weight = torch.zeros((), dtype=s.dtype, device=s.device)
+    return u[:, :rank], s[:rank], v[:rank, :], discarded_weight
+
+
 def orthogonalize_left2right_step(
     mps_tensors: List[torch.Tensor],
     local_tensor_idx: int,
@@ -285,7 +710,10 @@ def orthogonalize_left2right_step(
     normalize: bool = False,
     return_locals: bool = False,
     check_nan: bool = True,
-) -> List[torch.Tensor] | Tuple[torch.Tensor, torch.Tensor]:
+    truncate_cutoff: float | None = None,
+    svd_backend: Literal["full", "randomized"] = "full",
+    return_discarded_weight: bool = False,
+) -> List[torch.Tensor] | Tuple:
     """
     One step of orthogonalization from left to right, which will make the local tensor isometric and the right one to it transformed.
 
@@ -296,6 +724,9 @@ def orthogonalize_left2right_step(
         truncate_dim: int | None, the dimension to be truncated. If None, no truncation will be performed.
         return_locals: bool, whether to return the local tensors. If True, only the local and the right one will be returned.
         check_nan: bool, whether to check the nan value in the results. If True, the nan value will be checked.
+        truncate_cutoff: float | None, the maximum relative discarded weight, see `truncated_svd`. If None, only `truncate_dim` is used.
+        svd_backend: Literal["full", "randomized"], the SVD backend, see `truncated_svd`.
+        return_discarded_weight: bool, whether to return the relative discarded weight of the bond as the last element of a tuple.
 
     Returns:
         List[torch.Tensor], the list of tensors after one step of orthogonalization from left to right.
@@ -315,17 +746,23 @@ def orthogonalize_left2right_step(
         need_truncate = True
     else:
         need_truncate = False
+    if truncate_cutoff is not None or svd_backend != "full":
+        assert mode == "svd", (
+            "mode must be 'svd' when truncate_cutoff or a non-full svd_backend is provided"
+        )
+        need_truncate = True
 
     view_matrix = local_tensor.view(-1, shape[2])
 
+    discarded_weight = torch.zeros((), dtype=view_matrix.real.dtype, device=view_matrix.device)
     if mode == "svd":
-        u, lm, v = torch.linalg.svd(view_matrix, full_matrices=False)
         if need_truncate:
-            u = u[:, :truncate_dim]
-            lm = lm[:truncate_dim]  # (truncate_dim)
-            v = v[:truncate_dim, :]  # (truncate_dim, virtual_dim)
-            r = lm.unsqueeze(1) * v  # (truncate_dim, virtual_dim)
+            u, lm, v, discarded_weight = truncated_svd(
+                view_matrix, truncate_dim, truncate_cutoff, svd_backend
+            )  # u: (-1, truncate_dim), lm: (truncate_dim), v: (truncate_dim, virtual_dim)
+            r = lm.to(dtype=v.dtype).unsqueeze(1) * v  # (truncate_dim, virtual_dim)
         else:
+            u, lm, v = torch.linalg.svd(view_matrix, full_matrices=False)
             r = lm.unsqueeze(1) * v  # (virtual_dim, virtual_dim)
     else:
         u, r = torch.linalg.qr(view_matrix)
@@ -348,13 +785,16 @@ def orthogonalize_left2right_step(
             "Due to numerical errors, the new local tensor right may contain nan values. If you are sure that your data is correct, maybe try reinitializing a new MPS."
         )
     if return_locals:
-        return new_local_tensor, new_local_tensor_right
+        results = (new_local_tensor, new_local_tensor_right)
     else:
-        return (
+        results = (
             mps_tensors[:local_tensor_idx]
             + [new_local_tensor, new_local_tensor_right]
-            + mps_tensors[local_tensor_idx + 2 :]
+            + mps_tensors[local_tensor_idx + 2 :],
         )
+    if return_discarded_weight:
+        results = results + (discarded_weight,)
+    return results if len(results) > 1 else results[0]
 
 
 def orthogonalize_right2left_step(
@@ -365,7 +805,10 @@ def orthogonalize_right2left_step(
     normalize: bool = False,
     return_locals: bool = False,
     check_nan: bool = True,
-) -> List[torch.Tensor] | Tuple[torch.Tensor, torch.Tensor]:
+    truncate_cutoff: float | None = None,
+    svd_backend: Literal["full", "randomized"] = "full",
+    return_discarded_weight: bool = False,
+) -> List[torch.Tensor] | Tuple:
     """
     One step of orthogonalization from right to left, which will make the local tensor isometric and the left one to it transformed.
 
@@ -376,6 +819,9 @@ def orthogonalize_right2left_step(
         truncate_dim: int | None, the dimension to be truncated. If None, no truncation will be performed.
         return_locals: bool, whether to return the local tensors. If True, only the local and the left one will be returned.
         check_nan: bool, whether to check the nan value in the results. If True, the nan value will be checked.
+        truncate_cutoff: float | None, the maximum relative discarded weight, see `truncated_svd`. If None, only `truncate_dim` is used.
+        svd_backend: Literal["full", "randomized"], the SVD backend, see `truncated_svd`.
+        return_discarded_weight: bool, whether to return the relative discarded weight of the bond as the last element of a tuple.
 
     Returns:
         List[torch.Tensor], the list of tensors after one step of orthogonalization from right to left.
@@ -395,18 +841,24 @@ def orthogonalize_right2left_step(
         need_truncate = True
     else:
         need_truncate = False
+    if truncate_cutoff is not None or svd_backend != "full":
+        assert mode == "svd", (
+            "mode must be 'svd' when truncate_cutoff or a non-full svd_backend is provided"
+        )
+        need_truncate = True
 
     view_matrix = local_tensor.view(
         shape[0], -1
     ).t()  # (virtual_dim, virtual_dim * physical_dim) -> (virtual_dim * physical_dim, virtual_dim)
+    discarded_weight = torch.zeros((), dtype=view_matrix.real.dtype, device=view_matrix.device)
     if mode == "svd":
-        u, lm, v = torch.linalg.svd(view_matrix, full_matrices=False)
         if need_truncate:
-            u = u[:, :truncate_dim]
-            lm = lm[:truncate_dim]  # (truncate_dim)
-            v = v[:truncate_dim, :]  # (truncate_dim, virtual_dim)
-            r = lm.unsqueeze(1) * v  # (truncate_dim, virtual_dim)
+            u, lm, v, discarded_weight = truncated_svd(
+                view_matrix, truncate_dim, truncate_cutoff, svd_backend
+            )  # u: (-1, truncate_dim), lm: (truncate_dim), v: (truncate_dim, virtual_dim)
+            r = lm.to(dtype=v.dtype).unsqueeze(1) * v  # (truncate_dim, virtual_dim)
         else:
+            u, lm, v = torch.linalg.svd(view_matrix, full_matrices=False)
             r = lm.unsqueeze(1) * v  # (virtual_dim, virtual_dim)
     else:
         u, r = torch.linalg.qr(view_matrix)
@@ -429,13 +881,16 @@ def orthogonalize_right2left_step(
             "Due to numerical errors, the new local tensor may contain nan values. If you are sure that your data is correct, maybe try reinitializing a new MPS."
         )
     if return_locals:
-        return new_local_tensor_left, new_local_tensor
+        results = (new_local_tensor_left, new_local_tensor)
     else:
-        return (
+        results = (
             mps_tensors[: local_tensor_idx - 1]
             + [new_local_tensor_left, new_local_tensor]
-            + mps_tensors[local_tensor_idx + 1 :]
+            + mps_tensors[local_tensor_idx + 1 :],
         )
+    if return_discarded_weight:
+        results = results + (discarded_weight,)
+    return results if len(results) > 1 else results[0]
 
 # %% ../../4-2.ipynb 8
 def orthogonalize_arange(
@@ -447,7 +902,10 @@ def orthogonalize_arange(
     normalize: bool = False,
     return_changed: bool = False,
     check_nan: bool = True,
-) -> List[torch.Tensor] | Tuple[List[torch.Tensor], List[int]]:
+    truncate_cutoff: float | None = None,
+    svd_backend: Literal["full", "randomized"] = "full",
+    return_discarded_weights: bool = False,
+) -> List[torch.Tensor] | Tuple:
     """
     Perform orthogonalization on the range of tensors.
 
@@ -459,6 +917,9 @@ def orthogonalize_arange(
         truncate_dim: int | None, the dimension to be truncated. If None, no truncation will be performed.
         return_changed: bool, whether to return the changed tensors. If True, changed tensors' indices will be returned as well.
         check_nan: bool, whether to check the nan value in the results. If True, the nan value will be checked.
+        truncate_cutoff: float | None, the maximum relative discarded weight of each bond, see `truncated_svd`. If None, only `truncate_dim` is used.
+        svd_backend: Literal["full", "randomized"], the SVD backend, see `truncated_svd`.
+        return_discarded_weights: bool, whether to return the relative discarded weights of the bonds in the order of the sweep as the last element.
 
     Returns:
         List[torch.Tensor], the list of tensors after orthogonalization
@@ -470,9 +931,10 @@ def orthogonalize_arange(
     )
     mps_tensors = [m for m in mps_tensors]
     changed_indices = set()
+    discarded_weights = []
     if start_idx < end_idx:
         for idx in range(start_idx, end_idx, 1):
-            local, local_right = orthogonalize_left2right_step(
+            local, local_right, discarded_weight = orthogonalize_left2right_step(
                 mps_tensors,
                 idx,
                 mode,
@@ -480,14 +942,18 @@ def orthogonalize_arange(
                 normalize=normalize,
                 return_locals=True,
                 check_nan=check_nan,
+                truncate_cutoff=truncate_cutoff,
+                svd_backend=svd_backend,
+                return_discarded_weight=True,
             )
             mps_tensors[idx] = local
             mps_tensors[idx + 1] = local_right
             changed_indices.add(idx)
             changed_indices.add(idx + 1)
+            discarded_weights.append(discarded_weight)
     elif start_idx > end_idx:
         for idx in range(start_idx, end_idx, -1):
-            local_left, local = orthogonalize_right2left_step(
+            local_left, local, discarded_weight = orthogonalize_right2left_step(
                 mps_tensors,
                 idx,
                 mode,
@@ -495,21 +961,102 @@ def orthogonalize_arange(
                 normalize=normalize,
                 return_locals=True,
                 check_nan=check_nan,
+                truncate_cutoff=truncate_cutoff,
+                svd_backend=svd_backend,
+                return_discarded_weight=True,
             )
             mps_tensors[idx - 1] = local_left
             mps_tensors[idx] = local
             changed_indices.add(idx - 1)
             changed_indices.add(idx)
+            discarded_weights.append(discarded_weight)
     else:
         # do nothing when start_idx == end_idx
         pass
 
+    results = (mps_tensors,)
     if return_changed:
         changed_indices = list(changed_indices)
         changed_indices.sort()
-        return mps_tensors, changed_indices
-    else:
-        return mps_tensors
+        results = results + (changed_indices,)
+    if return_discarded_weights:
+        if len(discarded_weights) > 0:
+            discarded_weights = torch.stack(discarded_weights)
+        else:
+            discarded_weights = torch.zeros(
+                0, dtype=mps_tensors[0].real.dtype, device=mps_tensors[0].device
+            )
+        results = results + (discarded_weights,)
+    return results if len(results) > 1 else results[0]
+
+# %% ../../4-2.ipynb 26
+import json
+import os
+from typing import Dict, List, Tuple
+
+_SAFETENSORS_TORCH_DTYPES = {
+    "BOOL": torch.bool,
+    "U8": torch.uint8,
+    "I8": torch.int8,
+    "I16": torch.int16,
+    "I32": torch.int32,
+    "I64": torch.int64,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "F32": torch.float32,
+    "F64": torch.float64,
+    "C64": torch.complex64,
+}
+
+
+def read_safetensors_header(path: str) -> Tuple[Dict[str, dict], Dict[str, str], int]:
+    """
+    Read the header of a safetensors file without reading the tensors.
+
+    Args:
+        path: str, the path of the safetensors file
+
+    Returns:
+        Tuple[Dict[str, dict], Dict[str, str], int], the tensor infos (dtype, shape and data_offsets) by name,
+        the metadata and the offset of the data in bytes
+    """
+    with open(path, "rb") as file:
+        header_size = int.from_bytes(file.read(8), "little")
+        header = json.loads(file.read(header_size))
+    metadata = header.pop("__metadata__", None) or {}
+    return header, metadata, 8 + header_size
+
+
+def load_safetensors_mmap(path: str, names: List[str] | None = None) -> Dict[str, torch.Tensor]:
+    """
+    Memory-map tensors of a safetensors file as CPU tensors without reading them.
+
+    The file is mapped privately, so the pages are read on first access and shared with other processes
+    that map the same file through the page cache, while in-place changes of the tensors stay in this process.
+
+    Args:
+        path: str, the path of the safetensors file
+        names: List[str] | None, the names of the tensors to map. If None, all tensors are mapped.
+
+    Returns:
+        Dict[str, torch.Tensor], the memory-mapped tensors by name
+    """
+    header, _, data_offset = read_safetensors_header(path)
+    names = list(header.keys()) if names is None else names
+    storage = torch.UntypedStorage.from_file(path, shared=False, nbytes=os.path.getsize(path))
+    tensors = {}
+    for name in names:
+        assert name in header, f"{name} is not in {path}"
+        info = header[name]
+        assert info["dtype"] in _SAFETENSORS_TORCH_DTYPES, f"Unsupported dtype {info['dtype']}"
+        dtype = _SAFETENSORS_TORCH_DTYPES[info["dtype"]]
+        itemsize = torch.empty(0, dtype=dtype).element_size()
+        begin, _ = info["data_offsets"]
+        assert (data_offset + begin) % itemsize == 0, f"{name} is not aligned in {path}"
+        tensor = torch.empty(0, dtype=dtype)
+        tensor.set_(storage, (data_offset + begin) // itemsize, info["shape"])
+        tensors[name] = tensor
+    return tensors
 
 # %% ../../4-3.ipynb 2
 from ..utils.checking import check_state_tensor
@@ -576,6 +1123,467 @@ def tt_decomposition(
     local_tensors.append(remained_tensor.view(left_dim, physical_dim, 1))
     return local_tensors, clipped_ranks
 
+# %% ../../4-3.ipynb 8
+from einops import einsum, rearrange
+
+
+def mps_direct_sum(mps0: List[torch.Tensor], mps1: List[torch.Tensor]) -> List[torch.Tensor]:
+    """
+    Calculate the MPS of the sum of the states of two MPS by direct sums of the virtual bonds.
+    The virtual dimensions of the result are the sums of those of the two MPS, except the open ends.
+
+    Args:
+        mps0: List[torch.Tensor], the first MPS
+        mps1: List[torch.Tensor], the second MPS
+
+    Returns:
+        List[torch.Tensor], the MPS tensors of the sum
+    """
+    assert len(mps0) == len(mps1), "length of two MPS must be the same"
+    assert mps0[0].dtype == mps1[0].dtype
+    assert mps0[0].device == mps1[0].device
+    length = len(mps0)
+    # the open ends are summed over by concatenation, while the other bonds are block diagonal
+    left_open = mps0[0].shape[0] == 1 and mps1[0].shape[0] == 1
+    right_open = mps0[-1].shape[2] == 1 and mps1[-1].shape[2] == 1
+    if length == 1 and left_open and right_open:
+        return [mps0[0] + mps1[0]]
+
+    new_mps = []
+    for i in range(length):
+        tensor0, tensor1 = mps0[i], mps1[i]
+        assert tensor0.shape[1] == tensor1.shape[1], "physical dimensions must be the same"
+        if i == 0 and left_open:
+            new_tensor = torch.cat([tensor0, tensor1], dim=2)
+        elif i == length - 1 and right_open:
+            new_tensor = torch.cat([tensor0, tensor1], dim=0)
+        else:
+            left0, physical_dim, right0 = tensor0.shape
+            left1, _, right1 = tensor1.shape
+            new_tensor = torch.zeros(
+                left0 + left1,
+                physical_dim,
+                right0 + right1,
+                dtype=tensor0.dtype,
+                device=tensor0.device,
+            )
+            new_tensor[:left0, :, :right0] = tensor0
+            new_tensor[left0:, :, right0:] = tensor1
+        new_mps.append(new_tensor)
+    return new_mps
+
+
+def mps_hadamard_product(mps0: List[torch.Tensor], mps1: List[torch.Tensor]) -> List[torch.Tensor]:
+    """
+    Calculate the MPS of the element-wise product of the global tensors of two MPS.
+    The virtual dimensions of the result are the products of those of the two MPS.
+
+    Args:
+        mps0: List[torch.Tensor], the first MPS
+        mps1: List[torch.Tensor], the second MPS
+
+    Returns:
+        List[torch.Tensor], the MPS tensors of the element-wise product
+    """
+    assert len(mps0) == len(mps1), "length of two MPS must be the same"
+    assert mps0[0].dtype == mps1[0].dtype
+    assert mps0[0].device == mps1[0].device
+    new_mps = []
+    for tensor0, tensor1 in zip(mps0, mps1):
+        assert tensor0.shape[1] == tensor1.shape[1], "physical dimensions must be the same"
+        new_tensor = einsum(
+            tensor0,
+            tensor1,
+            "left0 physical right0, left1 physical right1 -> left0 left1 physical right0 right1",
+        )
+        new_mps.append(
+            rearrange(
+                new_tensor,
+                "left0 left1 physical right0 right1 -> (left0 left1) physical (right0 right1)",
+            )
+        )
+    return new_mps
+
+
+def variational_compress_mps(
+    mps_tensors: List[torch.Tensor],
+    target_dim: int,
+    tol: float = 1e-8,
+    max_sweeps: int = 10,
+    return_errors: bool = False,
+) -> List[torch.Tensor] | Tuple[List[torch.Tensor], List[float]]:
+    """
+    Compress an open MPS to the virtual dimension `target_dim` by alternating least squares.
+
+    The compressed MPS is initialized by one-pass SVD truncation, then each local tensor is replaced in turn
+    by the one that maximizes the overlap with the original MPS while the others are fixed. The overlap environments
+    of the fixed tensors are cached and updated by one site per step, so a sweep costs O(length) local contractions.
+
+    Args:
+        mps_tensors: List[torch.Tensor], the open MPS to be compressed
+        target_dim: int, the maximum virtual dimension of the compressed MPS
+        tol: float, the sweeps stop when the relative error changes less than `tol` in a sweep
+        max_sweeps: int, the maximum number of sweeps, each of which is from left to right and back
+        return_errors: bool, whether to return the relative errors || psi - phi || / || psi || after each sweep
+
+    Returns:
+        List[torch.Tensor], the compressed MPS tensors with the center at 0
+    """
+    assert MPSType.get_mps_type(mps_tensors) == MPSType.Open, "only open MPS is supported"
+    assert target_dim > 0, "target_dim must be positive"
+    assert max_sweeps >= 0, "max_sweeps must be non-negative"
+    length = len(mps_tensors)
+    dtype = mps_tensors[0].dtype
+    device = mps_tensors[0].device
+    psi = mps_tensors
+    psi_norm_square = torch.prod(calc_inner_product(psi, psi)).real
+    assert psi_norm_square > 0, "the MPS must not be zero"
+    if length == 1:
+        errors = [0.0]
+        phi = [t.clone() for t in psi]
+        return (phi, errors) if return_errors else phi
+
+    # one-pass SVD truncation as the initial guess, which leaves the center at 0
+    phi = orthogonalize_arange(psi, 0, length - 1, "qr")
+    phi = orthogonalize_arange(phi, length - 1, 0, "svd", truncate_dim=target_dim)
+
+    # left_envs[i] contracts <phi|psi> over the sites < i and right_envs[i] over the sites >= i,
+    # both with indices (phi_conj, psi)
+    boundary = torch.ones(1, 1, dtype=dtype, device=device)
+    left_envs = [boundary] + [None] * length
+    right_envs = [None] * length + [boundary]
+
+    def _update_right_env(i: int):
+        right_envs[i] = einsum(
+            phi[i].conj(),
+            psi[i],
+            right_envs[i + 1],
+            "a physical b, p physical q, b q -> a p",
+        )
+
+    def _update_left_env(i: int):
+        left_envs[i + 1] = einsum(
+            left_envs[i],
+            phi[i].conj(),
+            psi[i],
+            "a p, a physical b, p physical q -> b q",
+        )
+
+    def _optimal_local_tensor(i: int) -> torch.Tensor:
+        # phi is isometric around i, so the optimal local tensor is the derivative of <phi|psi> w.r.t. phi[i].conj()
+        local_tensor = einsum(
+            left_envs[i], psi[i], right_envs[i + 1], "a p, p physical q, b q -> a physical b"
+        )
+        return local_tensor.contiguous()
+
+    for i in range(length - 1, 0, -1):
+        _update_right_env(i)
+
+    errors = []
+    for _ in range(max_sweeps):
+        for i in range(length - 1):
+            phi[i] = _optimal_local_tensor(i)
+            phi[i], phi[i + 1] = orthogonalize_left2right_step(phi, i, "qr", return_locals=True)
+            _update_left_env(i)
+        for i in range(length - 1, 0, -1):
+            phi[i] = _optimal_local_tensor(i)
+            phi[i - 1], phi[i] = orthogonalize_right2left_step(phi, i, "qr", return_locals=True)
+            _update_right_env(i)
+        phi[0] = _optimal_local_tensor(0)
+        # at the optimum <phi|psi> = <phi|phi>, so || psi - phi ||^2 = || psi ||^2 - || phi ||^2
+        error_square = 1 - phi[0].norm() ** 2 / psi_norm_square
+        errors.append(error_square.clamp(min=0).sqrt().item())
+        if len(errors) > 1 and abs(errors[-2] - errors[-1]) < tol:
+            break
+
+    if return_errors:
+        return phi, errors
+    else:
+        return phi
+
+# %% ../../4-3.ipynb 12
+from typing import Callable
+
+
+def maxvol(matrix: torch.Tensor, tol: float = 1.05, max_iters: int = 100) -> torch.Tensor:
+    """
+    Find the rows of a tall matrix that form a quasi-maximal volume submatrix.
+
+    Args:
+        matrix: torch.Tensor, the matrix of shape (n, r) with n >= r and full column rank
+        tol: float, the iterations stop when all entries of matrix @ inv(matrix[rows]) are no larger than `tol` in magnitude
+        max_iters: int, the maximum number of row swaps
+
+    Returns:
+        torch.Tensor, the indices of the r rows
+    """
+    n, r = matrix.shape
+    assert n >= r, "matrix must be tall"
+    # start from the pivots of the LU decomposition, matrix = P @ L @ U
+    permutation, _, _ = torch.linalg.lu(matrix)
+    rows = permutation[:, :r].argmax(dim=0)
+    for _ in range(max_iters):
+        coefficients = torch.linalg.solve(matrix[rows].mT, matrix.mT).mT  # (n, r)
+        flat_idx = coefficients.abs().argmax()
+        i, j = flat_idx // r, flat_idx % r
+        if coefficients[i, j].abs() <= tol:
+            break
+        # swapping row j with row i multiplies the volume by |coefficients[i, j]|
+        rows[j] = i
+    return rows
+
+
+def tt_cross(
+    f: Callable[[torch.Tensor], torch.Tensor],
+    length: int,
+    physical_dim: int,
+    max_rank: int,
+    tol: float = 1e-8,
+    max_sweeps: int = 10,
+    device: torch.device | None = None,
+    seed: int | None = None,
+) -> Tuple[List[torch.Tensor], int]:
+    """
+    Build the MPS of the tensor whose entries are given by `f` with TT-cross (DMRG-cross) interpolation,
+    without forming the full tensor.
+
+    In each sweep, the two-site block of every bond is evaluated on the current left and right index sets, truncated by SVD
+    and the index set of the bond is updated by maxvol pivoting. The evaluations are cached, so no entry is evaluated twice.
+
+    Args:
+        f: Callable[[torch.Tensor], torch.Tensor], the function that maps a batch of indices of shape (batch, length)
+            with entries in [0, physical_dim) to the tensor entries of shape (batch,)
+        length: int, the number of indices of the tensor
+        physical_dim: int, the dimension of each index
+        max_rank: int, the maximum virtual dimension of the MPS
+        tol: float, the relative error of the SVD truncation of each two-site block
+        max_sweeps: int, the maximum number of sweeps, each of which is from left to right and back
+        device: torch.device | None, the device of the indices passed to `f`
+        seed: int | None, the seed of the random initial index sets
+
+    Returns:
+        Tuple[List[torch.Tensor], int], the MPS tensors and the number of evaluated entries.
+    """
+    assert length >= 1 and physical_dim >= 1 and max_rank >= 1
+    assert max_sweeps >= 1, "max_sweeps must be positive"
+    cache = {}
+
+    def _evaluate(indices: torch.Tensor) -> torch.Tensor:
+        shape = indices.shape[:-1]
+        keys = [tuple(idx) for idx in indices.reshape(-1, length).tolist()]
+        missing = list(dict.fromkeys(k for k in keys if k not in cache))
+        if len(missing) > 0:
+            values = f(torch.tensor(missing, dtype=torch.long, device=device))
+            assert values.shape == (len(missing),), "f must return a tensor of shape (batch,)"
+            for k, v in zip(missing, values):
+                cache[k] = v
+        return torch.stack([cache[k] for k in keys]).reshape(shape)
+
+    physical_indices = torch.arange(physical_dim, device=device)
+
+    def _two_site_block(k: int, left: torch.Tensor, right: torch.Tensor) -> torch.Tensor:
+        # left - (r_left, k), right - (r_right, length - k - 2)
+        r_left, r_right = left.shape[0], right.shape[0]
+        indices = torch.empty(
+            r_left, physical_dim, physical_dim, r_right, length, dtype=torch.long, device=device
+        )
+        indices[..., :k] = left[:, None, None, None, :]
+        indices[..., k] = physical_indices[None, :, None, None]
+        indices[..., k + 1] = physical_indices[None, None, :, None]
+        indices[..., k + 2 :] = right[None, None, None, :, :]
+        return _evaluate(indices).reshape(r_left * physical_dim, physical_dim * r_right)
+
+    if length == 1:
+        values = _evaluate(physical_indices.unsqueeze(1))
+        return [values.reshape(1, physical_dim, 1)], len(cache)
+
+    # left_sets[k] - (r, k), the multi-indices of sites < k; right_sets[k] - (r, length - k), those of sites >= k
+    generator = torch.Generator().manual_seed(seed) if seed is not None else None
+    init_index = torch.randint(physical_dim, (length,), generator=generator).to(device=device)
+    left_sets = [torch.empty(1, 0, dtype=torch.long, device=device)] + [None] * length
+    right_sets = [init_index[k:].unsqueeze(0) for k in range(length)]
+    right_sets.append(torch.empty(1, 0, dtype=torch.long, device=device))
+    local_tensors = [None] * length
+    previous_sets = None
+    for _ in range(max_sweeps):
+        for k in range(length - 1):
+            block = _two_site_block(k, left_sets[k], right_sets[k + 2])
+            u, s, v, _ = truncated_svd(block, max_rank, tol**2)
+            rows = maxvol(u)
+            rank = rows.shape[0]
+            r_left = left_sets[k].shape[0]
+            local_tensors[k] = torch.linalg.solve(u[rows].mT, u.mT).mT.reshape(
+                r_left, physical_dim, rank
+            )
+            left_sets[k + 1] = torch.cat(
+                [left_sets[k][rows // physical_dim], (rows % physical_dim).unsqueeze(1)], dim=1
+            )
+            if k == length - 2:
+                local_tensors[k + 1] = ((u[rows] * s.to(dtype=u.dtype)) @ v).reshape(
+                    rank, physical_dim, -1
+                )
+        for k in range(length - 2, -1, -1):
+            block = _two_site_block(k, left_sets[k], right_sets[k + 2])
+            u, s, v, _ = truncated_svd(block, max_rank, tol**2)
+            cols = maxvol(v.mT)
+            rank = cols.shape[0]
+            r_right = right_sets[k + 2].shape[0]
+            local_tensors[k + 1] = torch.linalg.solve(v[:, cols], v).reshape(
+                rank, physical_dim, r_right
+            )
+            right_sets[k + 1] = torch.cat(
+                [(cols // r_right).unsqueeze(1), right_sets[k + 2][cols % r_right]], dim=1
+            )
+            if k == 0:
+                local_tensors[k] = ((u * s.to(dtype=u.dtype)) @ v[:, cols]).reshape(
+                    -1, physical_dim, rank
+                )
+        # the index sets are a fixed point of the sweeps, so another sweep would not change the MPS
+        current_sets = [index_set.tolist() for index_set in left_sets[1:-1] + right_sets[1:-1]]
+        if current_sets == previous_sets:
+            break
+        previous_sets = current_sets
+
+    return local_tensors, len(cache)
+
+# %% ../../4-3.ipynb 16
+import os
+import tempfile
+import numpy as np
+
+_SAFETENSORS_NUMPY_DTYPES = {
+    "F16": np.float16,
+    "F32": np.float32,
+    "F64": np.float64,
+    "C64": np.complex64,
+}
+
+
+def memmap_safetensors(path: str, tensor_name: str) -> np.memmap:
+    """
+    Memory-map one tensor of a safetensors file as a read-only NumPy array without loading it.
+
+    Args:
+        path: str, the path of the safetensors file
+        tensor_name: str, the name of the tensor in the file
+
+    Returns:
+        np.memmap, the memory-mapped tensor
+    """
+    header, _, data_offset = read_safetensors_header(path)
+    assert tensor_name in header, f"{tensor_name} is not in {path}"
+    info = header[tensor_name]
+    assert info["dtype"] in _SAFETENSORS_NUMPY_DTYPES, f"Unsupported dtype {info['dtype']}"
+    begin, _ = info["data_offsets"]
+    return np.memmap(
+        path,
+        dtype=_SAFETENSORS_NUMPY_DTYPES[info["dtype"]],
+        mode="r",
+        offset=data_offset + begin,
+        shape=tuple(info["shape"]),
+    )
+
+
+def tt_decomposition_out_of_core(
+    state_tensor: np.ndarray | str,
+    *,
+    tensor_name: str | None = None,
+    max_rank: int | None = None,
+    truncate_cutoff: float | None = None,
+    memory_budget: int = 2**30,
+    tmp_dir: str | None = None,
+) -> Tuple[List[torch.Tensor], List[int]]:
+    """
+    Perform tensor-train decomposition of a state tensor that does not fit in memory.
+
+    Each unfolding (left * mid, rest) has few rows and many columns, so its left singular vectors are computed
+    from the Gram matrix, which is accumulated from column blocks read from the disk. The remaining tensor is then
+    projected block by block and written to a temporary memmap for the next step. Only the blocks, the Gram matrix
+    and the local tensors are in memory, and the block size is chosen so that they fit in `memory_budget`.
+    The Gram matrix of an unfolding has (left * mid)^2 elements, which is not reduced by blocking, so the ranks
+    are not capped to fit the budget; an AssertionError is raised instead if the Gram matrix of an unfolding,
+    with its eigenvectors and a block of one column, does not fit, e.g. without `max_rank`.
+    As the Gram matrix squares the singular values, singular values below sqrt(eps) of the largest one are not resolved.
+
+    Args:
+        state_tensor: np.ndarray | str, the state tensor, e.g. a np.memmap, or the path of a safetensors file
+        tensor_name: str | None, the name of the tensor in the safetensors file
+        max_rank: int | None, the maximum rank to be kept. If None, no rank clipping will be performed.
+        truncate_cutoff: float | None, the maximum relative discarded weight of each unfolding, see `truncated_svd`.
+        memory_budget: int, the approximate bound of the memory for the blocks and the Gram matrix in bytes
+        tmp_dir: str | None, the directory for the temporary memmaps. If None, the system default is used.
+
+    Returns:
+        Tuple[List[torch.Tensor], List[int]], the local tensors and the clipped ranks.
+    """
+    if isinstance(state_tensor, str):
+        assert tensor_name is not None, "tensor_name must be provided for a safetensors file"
+        state_tensor = memmap_safetensors(state_tensor, tensor_name)
+    assert isinstance(state_tensor, np.ndarray), "state_tensor must be a NumPy array or memmap"
+    assert max_rank is None or max_rank > 0, "max_rank must be greater than 0"
+    shape = state_tensor.shape
+    n_qubits = len(shape)
+    assert n_qubits >= 1
+    dtype = state_tensor.dtype
+    # the Gram matrix is accumulated in double precision
+    gram_dtype = np.complex128 if np.iscomplexobj(state_tensor) else np.float64
+    torch_dtype = torch.from_numpy(np.empty(0, dtype=dtype)).dtype
+
+    left_dim = 1
+    local_tensors = []
+    clipped_ranks = []
+    remained = state_tensor.reshape(-1)
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as tmp:
+        for i in range(n_qubits - 1):
+            rows = left_dim * shape[i]
+            cols = remained.size // rows
+            matrix = remained.reshape(rows, cols)
+            itemsize = np.dtype(gram_dtype).itemsize
+            # the Gram matrix and its eigenvectors, and a block of at least one column
+            min_bytes = (2 * rows * rows + 3 * rows) * itemsize
+            assert min_bytes <= memory_budget, (
+                f"the Gram matrix of unfolding {i} with {rows} rows needs at least {min_bytes} bytes, "
+                f"which exceeds {memory_budget=}, set a smaller max_rank or a larger memory_budget"
+            )
+            # a block of columns is read, converted to double precision and multiplied
+            block_cols = max(
+                1, (memory_budget - 2 * rows * rows * itemsize) // (3 * rows * itemsize)
+            )
+
+            gram = np.zeros((rows, rows), dtype=gram_dtype)
+            for start in range(0, cols, block_cols):
+                block = np.asarray(matrix[:, start : start + block_cols], dtype=gram_dtype)
+                gram += block @ block.conj().T
+            eigenvalues, eigenvectors = np.linalg.eigh(gram)
+            eigenvalues, eigenvectors = eigenvalues[::-1].clip(min=0), eigenvectors[:, ::-1]
+
+            rank = min(rows, cols)
+            if max_rank is not None:
+                rank = min(rank, max_rank)
+            total_weight = eigenvalues.sum()
+            if truncate_cutoff is not None and total_weight > 0:
+                discarded = (total_weight - np.cumsum(eigenvalues)) / total_weight
+                rank = min(rank, int((discarded > truncate_cutoff).sum()) + 1)
+            u = eigenvectors[:, :rank]
+
+            # project the remaining tensor onto the kept singular vectors, block by block
+            path = os.path.join(tmp, f"remained_{i}.npy")
+            projected = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(rank, cols))
+            for start in range(0, cols, block_cols):
+                block = np.asarray(matrix[:, start : start + block_cols], dtype=gram_dtype)
+                projected[:, start : start + block_cols] = u.conj().T @ block
+            projected.flush()
+
+            u = torch.from_numpy(np.ascontiguousarray(u, dtype=dtype))
+            local_tensors.append(u.view(left_dim, shape[i], rank))
+            clipped_ranks.append(rank)
+            left_dim = rank
+            remained = projected.reshape(-1)
+
+        last_tensor = torch.tensor(np.asarray(remained), dtype=torch_dtype)
+    local_tensors.append(last_tensor.view(left_dim, shape[-1], 1))
+    return local_tensors, clipped_ranks
+
 # %% ../../4-6.ipynb 3
 from copy import deepcopy
 from einops import einsum
@@ -678,4 +1686,254 @@ def project_multi_qubits(
 
         local_tensors[i] = local_tensor
 
-    return local_tensors
\ No newline at end of file
+    return local_tensors
+
+# %% ../../4-6.ipynb 7
+from typing import List, Tuple
+from einops import einsum
+import torch
+
+
+def calc_log_amplitudes(
+    mps_local_tensors: List[torch.Tensor],
+    samples: torch.Tensor,
+    batch_size: int | None = None,
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Calculate the amplitudes of a batch of basis states or product states in the log domain, without the global tensor.
+
+    The local tensors projected onto each sample are contracted as a batched chain from left to right,
+    and the environment is rescaled to norm 1 at every site with the log of the norm accumulated,
+    so long MPS do not overflow or underflow.
+
+    Args:
+        mps_local_tensors: List of local tensors of the MPS.
+        samples: torch.Tensor, the indices of the basis states of shape (batch, length),
+            or the product states, e.g. feature-mapped samples, of shape (batch, length, physical_dim).
+        batch_size: int | None, the number of samples contracted at once. If None, all samples are contracted at once.
+
+    Returns:
+        Tuple[torch.Tensor, torch.Tensor], the phases (signs for real MPS) and the logs of the absolute values of the amplitudes,
+        both of shape (batch,), such that the amplitudes are phase * exp(log_abs) as in `torch.linalg.slogdet`.
+    """
+    length = len(mps_local_tensors)
+    assert samples.ndim in [2, 3], (
+        "samples must be of shape (batch, length) or (batch, length, physical_dim)"
+    )
+    assert samples.shape[1] == length, "the number of features must match the length of the MPS"
+    is_index = samples.ndim == 2
+    if is_index:
+        assert not torch.is_floating_point(samples) and not torch.is_complex(samples), (
+            "indices of basis states must be integers"
+        )
+    num_samples = samples.shape[0]
+    if batch_size is not None and num_samples > batch_size:
+        results = [
+            calc_log_amplitudes(mps_local_tensors, samples[start : start + batch_size])
+            for start in range(0, num_samples, batch_size)
+        ]
+        phases, log_abs = zip(*results)
+        return torch.cat(phases), torch.cat(log_abs)
+
+    local_tensor = mps_local_tensors[0]
+    if is_index:
+        dtype = local_tensor.dtype
+    else:
+        dtype = torch.promote_types(local_tensor.dtype, samples.dtype)
+    left_dim = local_tensor.shape[0]
+    # the environment is a matrix to handle periodic MPS, for open MPS it is (batch, 1, virtual_dim)
+    env = torch.eye(left_dim, dtype=dtype, device=local_tensor.device).expand(num_samples, -1, -1)
+    log_abs = torch.zeros(num_samples, dtype=env.real.dtype, device=env.device)
+    for i, local_tensor in enumerate(mps_local_tensors):
+        if is_index:
+            projected = local_tensor.permute(1, 0, 2)[samples[:, i]]  # (batch, left, right)
+        else:
+            projected = einsum(
+                samples[:, i].to(dtype=dtype),
+                local_tensor.to(dtype=dtype),
+                "batch physical, left physical right -> batch left right",
+            )
+        env = torch.bmm(env, projected)
+        norm = torch.linalg.matrix_norm(env)  # (batch)
+        # zero amplitudes stay zero with log_abs = -inf
+        env = env / torch.where(norm > 0, norm, 1).unsqueeze(-1).unsqueeze(-1)
+        log_abs = log_abs + torch.log(norm)
+
+    amplitudes = einsum(env, "batch i i -> batch")
+    log_abs = log_abs + torch.log(amplitudes.abs())
+    phases = amplitudes / torch.where(amplitudes.abs() > 0, amplitudes.abs(), 1)
+    return phases, log_abs
+
+# %% ../../4-6.ipynb 11
+def project_multi_qubits_batched(
+    mps_local_tensors: List[torch.Tensor],
+    qubit_indices: List[int],
+    project_to_states: torch.Tensor,
+) -> List[torch.Tensor]:
+    """
+    Do projection of the same qubits of MPS onto a batch of states, giving the batched local tensors of a batch of new MPS.
+    The projected qubits are merged as in `project_multi_qubits`, but with batched matrix products for all samples at once.
+
+    Args:
+        mps_local_tensors: List of local tensors of the MPS.
+        qubit_indices: List of indices of the qubits to project.
+        project_to_states: torch.Tensor, the indices of the states of shape (batch, num_qubits),
+            or the states of shape (batch, num_qubits, physical_dim).
+
+    Returns:
+        List of batched local tensors of shape (batch, left, physical, right) of the new MPS.
+    """
+    assert isinstance(project_to_states, torch.Tensor), "project_to_states must be a tensor"
+    assert project_to_states.ndim in [2, 3], (
+        "project_to_states must be of shape (batch, num_qubits) or (batch, num_qubits, physical_dim)"
+    )
+    assert project_to_states.shape[1] == len(qubit_indices), (
+        "project_to_states must match qubit_indices"
+    )
+    assert len(set(qubit_indices)) == len(qubit_indices), "qubit_indices must be unique"
+    length = len(mps_local_tensors)
+    batch_size = project_to_states.shape[0]
+    is_vec = project_to_states.ndim == 3
+    projected = {}
+    for i, qubit_idx in enumerate(qubit_indices):
+        assert 0 <= qubit_idx < length, f"qubit index {qubit_idx} out of range"
+        local_tensor = mps_local_tensors[qubit_idx]
+        if is_vec:
+            assert local_tensor.shape[1] == project_to_states.shape[2], (
+                "The feature dimension of the project_to_states must match the physical dimension of the local tensor of MPS"
+            )
+            projected[qubit_idx] = einsum(
+                local_tensor,
+                project_to_states[:, i].to(dtype=local_tensor.dtype),
+                "left physical right, batch physical -> batch left right",
+            )
+        else:
+            projected[qubit_idx] = local_tensor.permute(1, 0, 2)[project_to_states[:, i]]
+
+    # merge each run of projected qubits into one batch of matrices with a chain of batched matmuls
+    new_local_tensors = []
+    pending = None  # the matrices of a run at the beginning, which are merged into the right
+    idx = 0
+    while idx < length:
+        if idx not in projected:
+            local_tensor = mps_local_tensors[idx].expand(batch_size, -1, -1, -1)
+            if pending is not None:
+                local_tensor = einsum(
+                    pending,
+                    local_tensor,
+                    "batch left mid, batch mid physical right -> batch left physical right",
+                )
+                pending = None
+            new_local_tensors.append(local_tensor)
+            idx += 1
+            continue
+        run = projected[idx]
+        idx += 1
+        while idx < length and idx in projected:
+            run = torch.bmm(run, projected[idx])
+            idx += 1
+        if len(new_local_tensors) > 0:
+            new_local_tensors[-1] = einsum(
+                new_local_tensors[-1],
+                run,
+                "batch left physical mid, batch mid right -> batch left physical right",
+            )
+        else:
+            pending = run
+
+    if pending is not None:
+        # all qubits are projected
+        new_local_tensors.append(pending.unsqueeze(2))
+    return new_local_tensors
+
+# %% ../../4-6.ipynb 12
+def calculate_batched_mps_norm_factors(mps_tensors: List[torch.Tensor]) -> torch.Tensor:
+    """
+    Calculate the norm factors of a batch of MPS, like `calculate_mps_norm_factors`,
+    with one contraction per site for the whole batch.
+
+    Args:
+        mps_tensors: List[torch.Tensor], the batched local tensors of shape (batch, left, physical, right)
+
+    Returns:
+        torch.Tensor, the norm factors of shape (batch, length)
+    """
+    assert len(mps_tensors) >= 1, "MPS must have at least one tensor"
+    batch_size = mps_tensors[0].shape[0]
+    length = len(mps_tensors)
+    device = mps_tensors[0].device
+    dtype = mps_tensors[0].dtype
+    mps_type = MPSType.get_mps_type([t[0] for t in mps_tensors])
+    norm_factors = torch.empty(batch_size, length, dtype=dtype, device=device)
+
+    if mps_type == MPSType.Open:
+        v = torch.ones(batch_size, 1, 1, dtype=dtype, device=device)  # dims: batch a b
+        for i in range(length):
+            v = torch.einsum("zab,zaix,zbiy->zxy", v, mps_tensors[i].conj(), mps_tensors[i])
+            norm_factor = v.flatten(1).norm(dim=1)
+            v = v / norm_factor.reshape(-1, 1, 1)
+            norm_factors[:, i] = norm_factor
+        return norm_factors
+    elif mps_type == MPSType.Periodic:
+        virtual_dim = mps_tensors[0].shape[1]
+        v = torch.eye(virtual_dim**2, dtype=dtype, device=device).reshape(
+            1, virtual_dim, virtual_dim, virtual_dim, virtual_dim
+        )
+        v = v.expand(batch_size, -1, -1, -1, -1)
+        for i in range(length):
+            v = torch.einsum("zuvap,zadb,zpdq->zuvbq", v, mps_tensors[i].conj(), mps_tensors[i])
+            norm_factor = v.flatten(1).norm(dim=1)
+            v = v / norm_factor.reshape(-1, 1, 1, 1, 1)
+            norm_factors[:, i] = norm_factor
+        norm_factors[:, -1] *= torch.einsum("zacac->z", v)
+        return norm_factors
+    else:
+        raise NotImplementedError(f"MPS type {mps_type} is not implemented")
+
+# %% ../../4-7.ipynb 13
+from typing import Tuple
+
+
+def quantize_tensor(
+    tensor: torch.Tensor, storage_dtype: torch.dtype
+) -> Tuple[torch.Tensor, torch.Tensor | None]:
+    """
+    Store a real tensor in a reduced precision.
+
+    Floating point storage dtypes, e.g. torch.bfloat16 or torch.float16, are plain casts.
+    For torch.int8, the tensor is scaled per tensor so that its largest magnitude is mapped to 127.
+
+    Args:
+        tensor: torch.Tensor, the real tensor to be stored
+        storage_dtype: torch.dtype, the dtype of the stored tensor
+
+    Returns:
+        Tuple[torch.Tensor, torch.Tensor | None], the stored tensor and the scale, which is None for floating point storage
+    """
+    assert not tensor.is_complex(), "only real tensors can be stored in a reduced precision"
+    if storage_dtype.is_floating_point:
+        return tensor.to(storage_dtype), None
+    assert storage_dtype == torch.int8, f"unsupported storage dtype {storage_dtype}"
+    scale = tensor.abs().amax().clamp(min=torch.finfo(tensor.dtype).tiny) / 127
+    stored = torch.round(tensor / scale).clamp(-127, 127).to(torch.int8)
+    return stored, scale
+
+
+def dequantize_tensor(
+    stored: torch.Tensor, scale: torch.Tensor | None, compute_dtype: torch.dtype
+) -> torch.Tensor:
+    """
+    Restore a tensor stored by `quantize_tensor` in the dtype of computation.
+
+    Args:
+        stored: torch.Tensor, the stored tensor
+        scale: torch.Tensor | None, the scale of the int8 storage
+        compute_dtype: torch.dtype, the dtype of computation, e.g. torch.float32 or torch.float64
+
+    Returns:
+        torch.Tensor, the restored tensor
+    """
+    tensor = stored.to(compute_dtype)
+    if scale is not None:
+        tensor = tensor * scale.to(compute_dtype)
+    return tensor
\ No newline at end of file
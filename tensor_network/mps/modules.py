@@ -3,20 +3,21 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../../4-2.ipynb.
 
 # %% auto 0
-__all__ = ['MPS']
+__all__ = ['MPS', 'save_mps_archive', 'read_mps_archive_index', 'load_mps_archive', 'BatchedMPS', 'QuantizedMPS']
 
 # %% ../../4-2.ipynb 2
 import torch
 from typing import List, Tuple, Literal, Self
 from .functional import gen_random_mps_tensors, MPSType
 
-# %% ../../4-2.ipynb 12
+# %% ../../4-2.ipynb 14
 from tensor_network.mps.functional import (
     orthogonalize_arange,
     calc_global_tensor_by_tensordot,
     calculate_mps_norm_factors,
     calc_inner_product,
     tt_decomposition,
+    load_safetensors_mmap,
 )
 import sys
 from einops import einsum
@@ -51,7 +52,7 @@ class MPS:
             mps_type: MPSType | None, the type of the MPS. Should be provided if mps_tensors is None.
             dtype: torch.dtype | None, the dtype of the MPS. Should be provided if mps_tensors is None.
             device: torch.device | None, the device of the MPS. Should be provided if mps_tensors is None.
-            requires_grad: bool | None, whether the MPS requires gradient.
+            requires_grad: bool | None, whether the MPS requires gradient. If None, the flags of the given local tensors are kept.
         """
         if mps_tensors is None:
             assert (
@@ -86,11 +87,13 @@ class MPS:
             )
             self._dtype: torch.dtype = mps_tensors[0].dtype
             self._device: torch.device = mps_tensors[0].device
-            requires_grad = mps_tensors[0].requires_grad if requires_grad is None else requires_grad
 
-        self._requires_grad: bool = requires_grad
         self._mps: List[torch.Tensor] = mps_tensors
-        self.set_requires_grad_(requires_grad)
+        if requires_grad is None:
+            # keep the flags of the given local tensors, which may be results of differentiable operations
+            self._requires_grad: bool = any(t.requires_grad for t in mps_tensors)
+        else:
+            self.set_requires_grad_(requires_grad)
         self._center: int | None = None
 
     def set_requires_grad_(self, requires_grad: bool):
@@ -111,25 +114,26 @@ class MPS:
         Args:
             path: str, the path to save the MPS.
         """
-        tensor_dict = {f"{i}": t for i, t in enumerate(self._mps)}
+        tensor_dict = {f"{i}": t.contiguous() for i, t in enumerate(self._mps)}
         tensor_dict["center"] = (
             torch.tensor(-1) if self.center is None else torch.tensor(self.center)
         )
         save_file(tensor_dict, path)
 
     @staticmethod
-    def load_from_safetensors(path: str, requires_grad: bool) -> Self:
+    def load_from_safetensors(path: str, requires_grad: bool, mmap: bool = False) -> Self:
         """
         Load the MPS from a safetensors file.
 
         Args:
             path: str, the path to load the MPS.
             requires_grad: bool, whether the MPS requires gradient.
+            mmap: bool, whether to memory-map the local tensors, which are then read on first access.
 
         Returns:
             MPS, the MPS loaded from the safetensors file.
         """
-        tensor_dict = load_file(path)
+        tensor_dict = load_safetensors_mmap(path) if mmap else load_file(path)
         center = tensor_dict.pop("center").item()
         mps_tensors = [None] * len(tensor_dict)
         for i, t in tensor_dict.items():
@@ -146,7 +150,10 @@ class MPS:
         truncate_dim: int | None = None,
         check_nan: bool = True,
         normalize: bool = False,
-    ):
+        truncate_cutoff: float | None = None,
+        svd_backend: Literal["full", "randomized"] = "full",
+        return_discarded_weights: bool = False,
+    ) -> torch.Tensor | None:
         """
         Perform center orthogonalization on the MPS. This is an in-place operation.
 
@@ -155,12 +162,18 @@ class MPS:
             mode: Literal["svd", "qr"], the mode of orthogonalization.
             truncate_dim: int | None, the dimension to be truncated. If None, no truncation will be performed.
             check_nan: bool, whether to check the nan value in the results. If True, the nan value will be checked.
+            truncate_cutoff: float | None, the maximum relative discarded weight of each bond, see `truncated_svd`. If None, only `truncate_dim` is used.
+            svd_backend: Literal["full", "randomized"], the SVD backend, see `truncated_svd`.
+            return_discarded_weights: bool, whether to return the relative discarded weights of the bonds in the order of the sweeps.
+
+        Returns:
+            torch.Tensor | None, the relative discarded weights if `return_discarded_weights` is True.
         """
         assert -self.length <= center < self.length, "center out of range"
         if center < 0:
             center = self.length + center
         if self._center is None:
-            new_local_tensors = orthogonalize_arange(
+            new_local_tensors, weights_left = orthogonalize_arange(
                 self._mps,
                 0,
                 center,
@@ -168,8 +181,11 @@ class MPS:
                 truncate_dim=truncate_dim,
                 normalize=normalize,
                 check_nan=check_nan,
+                truncate_cutoff=truncate_cutoff,
+                svd_backend=svd_backend,
+                return_discarded_weights=True,
             )
-            new_local_tensors = orthogonalize_arange(
+            new_local_tensors, weights_right = orthogonalize_arange(
                 new_local_tensors,
                 self.length - 1,
                 center,
@@ -177,11 +193,15 @@ class MPS:
                 truncate_dim=truncate_dim,
                 normalize=normalize,
                 check_nan=check_nan,
+                truncate_cutoff=truncate_cutoff,
+                svd_backend=svd_backend,
+                return_discarded_weights=True,
             )
             for i in range(self.length):
                 self._mps[i] = new_local_tensors[i]
+            discarded_weights = torch.cat([weights_left, weights_right])
         elif self.center != center:
-            new_local_tensors, changed_indices = orthogonalize_arange(
+            new_local_tensors, changed_indices, discarded_weights = orthogonalize_arange(
                 self._mps,
                 self.center,
                 center,
@@ -189,15 +209,20 @@ class MPS:
                 truncate_dim,
                 return_changed=True,
                 check_nan=check_nan,
+                truncate_cutoff=truncate_cutoff,
+                svd_backend=svd_backend,
+                return_discarded_weights=True,
             )
             for changed_idx in changed_indices:
                 self._mps[changed_idx] = new_local_tensors[changed_idx]
         else:
             # when self.center == center
-            pass
+            discarded_weights = torch.zeros(0, dtype=self._mps[0].real.dtype, device=self.device)
         self._center = center
         if normalize:
             self.center_normalize_()
+        if return_discarded_weights:
+            return discarded_weights
 
     def center_normalize_(self):
         """
@@ -461,6 +486,211 @@ class MPS:
         mps._center = len(local_tensors) - 1
         return mps
 
+# %% ../../4-2.ipynb 27
+from typing import Dict
+import json
+from safetensors import safe_open
+from .functional import load_safetensors_mmap, read_safetensors_header
+
+
+def save_mps_archive(mps_dict: Dict[str, MPS], path: str):
+    """
+    Save many MPS to one safetensors file, with an index of their names and lengths in the metadata.
+
+    Args:
+        mps_dict: Dict[str, MPS], the MPS to save by name, e.g. the GMPS of every class.
+        path: str, the path to save the archive.
+    """
+    tensor_dict = {}
+    index = {}
+    for name, mps in mps_dict.items():
+        assert "/" not in name, f"the name {name} must not contain '/'"
+        for i, t in enumerate(mps.local_tensors):
+            tensor_dict[f"{name}/{i}"] = t.detach().contiguous()
+        tensor_dict[f"{name}/center"] = torch.tensor(-1 if mps.center is None else mps.center)
+        index[name] = mps.length
+    save_file(tensor_dict, path, metadata={"mps_index": json.dumps(index)})
+
+
+def read_mps_archive_index(path: str) -> Dict[str, int]:
+    """
+    Read the index of an MPS archive without reading the tensors.
+
+    Args:
+        path: str, the path of the archive.
+
+    Returns:
+        Dict[str, int], the lengths of the MPS by name.
+    """
+    _, metadata, _ = read_safetensors_header(path)
+    assert "mps_index" in metadata, f"{path} is not an MPS archive"
+    return json.loads(metadata["mps_index"])
+
+
+def load_mps_archive(
+    path: str,
+    names: List[str] | None = None,
+    requires_grad: bool = False,
+    mmap: bool = True,
+) -> Dict[str, MPS]:
+    """
+    Load MPS from an archive saved by `save_mps_archive`.
+
+    With `mmap`, the local tensors are memory-mapped views of the file, so only the header is read here,
+    the pages of a local tensor are read when it is first accessed, and the pages are shared by the processes
+    that load the same archive. Otherwise, the requested MPS are read into memory.
+
+    Args:
+        path: str, the path of the archive.
+        names: List[str] | None, the names of the MPS to load. If None, all MPS are loaded.
+        requires_grad: bool, whether the MPS require gradient.
+        mmap: bool, whether to memory-map the local tensors instead of reading them.
+
+    Returns:
+        Dict[str, MPS], the loaded MPS by name.
+    """
+    index = read_mps_archive_index(path)
+    names = list(index.keys()) if names is None else names
+    tensor_names = []
+    for name in names:
+        assert name in index, f"{name} is not in the archive {path}"
+        tensor_names += [f"{name}/{i}" for i in range(index[name])] + [f"{name}/center"]
+    if mmap:
+        tensor_dict = load_safetensors_mmap(path, tensor_names)
+    else:
+        with safe_open(path, framework="pt") as file:
+            tensor_dict = {k: file.get_tensor(k) for k in tensor_names}
+
+    mps_dict = {}
+    for name in names:
+        mps_tensors = [tensor_dict[f"{name}/{i}"] for i in range(index[name])]
+        mps = MPS(mps_tensors=mps_tensors, requires_grad=requires_grad)
+        center = tensor_dict[f"{name}/center"].item()
+        mps._center = None if center == -1 else center
+        mps_dict[name] = mps
+    return mps_dict
+
+# %% ../../4-3.ipynb 9
+from tensor_network.mps.functional import (
+    mps_direct_sum,
+    mps_hadamard_product,
+    variational_compress_mps,
+)
+from fastcore.basics import patch
+from numbers import Number
+
+
+@patch
+def __add__(self: MPS, other: MPS) -> MPS:
+    """
+    Add two MPS, returning a new MPS whose virtual dimensions are the sums of those of the two MPS.
+    """
+    assert isinstance(other, MPS), "other must be a MPS"
+    assert self.length == other.length, "length of two MPS must be the same"
+    return MPS(mps_tensors=mps_direct_sum(self._mps, other._mps))
+
+
+@patch
+def __mul__(self: MPS, scalar: Number | torch.Tensor) -> MPS:
+    """
+    Scale the MPS by a scalar, returning a new MPS with the same center.
+    """
+    local_tensors = self.local_tensors
+    idx = self.center if self.center is not None else 0
+    local_tensors[idx] = local_tensors[idx] * scalar
+    mps = MPS(mps_tensors=local_tensors)
+    mps._center = self.center
+    return mps
+
+
+@patch
+def __rmul__(self: MPS, scalar: Number | torch.Tensor) -> MPS:
+    return self * scalar
+
+
+@patch
+def hadamard(self: MPS, other: MPS) -> MPS:
+    """
+    Element-wise product of two MPS, returning a new MPS whose virtual dimensions are the products of those of the two MPS.
+    """
+    assert isinstance(other, MPS), "other must be a MPS"
+    assert self.length == other.length, "length of two MPS must be the same"
+    return MPS(mps_tensors=mps_hadamard_product(self._mps, other._mps))
+
+
+@patch
+def compress(
+    self: MPS, target_dim: int, tol: float = 1e-8, max_sweeps: int = 10, return_errors: bool = False
+) -> MPS | Tuple[MPS, List[float]]:
+    """
+    Compress the MPS to the virtual dimension `target_dim` variationally, returning a new MPS with the center at 0.
+    See `variational_compress_mps` for details.
+
+    Args:
+        target_dim: int, the maximum virtual dimension of the compressed MPS.
+        tol: float, the sweeps stop when the relative error changes less than `tol` in a sweep.
+        max_sweeps: int, the maximum number of sweeps.
+        return_errors: bool, whether to return the relative errors after each sweep.
+
+    Returns:
+        MPS | Tuple[MPS, List[float]], the compressed MPS, and the relative errors if `return_errors` is True.
+    """
+    local_tensors, errors = variational_compress_mps(
+        self._mps, target_dim, tol=tol, max_sweeps=max_sweeps, return_errors=True
+    )
+    mps = MPS(mps_tensors=local_tensors)
+    mps._center = 0
+    if return_errors:
+        return mps, errors
+    else:
+        return mps
+
+# %% ../../4-3.ipynb 13
+from .functional import tt_cross
+from typing import Callable
+
+
+@patch(cls_method=True)
+def from_function(
+    cls: MPS,
+    f: Callable[[torch.Tensor], torch.Tensor],
+    length: int,
+    physical_dim: int,
+    max_rank: int,
+    tol: float = 1e-8,
+    max_sweeps: int = 10,
+    device: torch.device | None = None,
+    seed: int | None = None,
+) -> MPS:
+    """
+    Initialize an MPS from a function of the indices with TT-cross interpolation, without forming the full state tensor.
+    See `tt_cross` for details.
+
+    Args:
+        f: Callable[[torch.Tensor], torch.Tensor], the function that maps a batch of indices of shape (batch, length) to entries of shape (batch,).
+        length: int, the length of the MPS.
+        physical_dim: int, the physical dimension of the MPS.
+        max_rank: int, the maximum virtual dimension of the MPS.
+        tol: float, the relative error of the SVD truncation in the interpolation.
+        max_sweeps: int, the maximum number of sweeps.
+        device: torch.device | None, the device of the indices passed to `f`.
+        seed: int | None, the seed of the random initial index sets.
+
+    Returns:
+        MPS, the MPS initialized from the function.
+    """
+    local_tensors, _ = tt_cross(
+        f,
+        length,
+        physical_dim,
+        max_rank,
+        tol=tol,
+        max_sweeps=max_sweeps,
+        device=device,
+        seed=seed,
+    )
+    return cls(mps_tensors=local_tensors)
+
 # %% ../../4-6.ipynb 4
 from .functional import project_multi_qubits as project_multi_qubits_func
 from fastcore.basics import patch
@@ -506,6 +736,413 @@ def project_one_qubit(self: MPS, qubit_idx: int, project_to_state: torch.Tensor
     qubit_indices = [qubit_idx]
     return self.project_multi_qubits(qubit_indices, project_to_states)
 
+# %% ../../4-6.ipynb 8
+from .functional import calc_log_amplitudes
+
+
+@patch
+def amplitudes(
+    self: MPS, bitstrings: torch.Tensor, log: bool = True, batch_size: int | None = None
+) -> Tuple[torch.Tensor, torch.Tensor] | torch.Tensor:
+    """
+    Calculate the amplitudes of a batch of basis states without the global tensor, see `calc_log_amplitudes`.
+
+    Args:
+        bitstrings: torch.Tensor, the indices of the basis states of shape (batch, length).
+        log: bool, whether to return the amplitudes in the log domain.
+        batch_size: int | None, the number of basis states contracted at once.
+
+    Returns:
+        Tuple[torch.Tensor, torch.Tensor] | torch.Tensor, the phases and the logs of the absolute values of the amplitudes if `log`,
+        otherwise the amplitudes.
+    """
+    assert bitstrings.ndim == 2, "bitstrings must be of shape (batch, length)"
+    phases, log_abs = calc_log_amplitudes(self._mps, bitstrings, batch_size=batch_size)
+    if log:
+        return phases, log_abs
+    else:
+        return phases * torch.exp(log_abs)
+
+
+@patch
+def probabilities(
+    self: MPS, feature_batch: torch.Tensor, log: bool = True, batch_size: int | None = None
+) -> torch.Tensor:
+    """
+    Calculate the Born probabilities |<x|psi>|^2 / <psi|psi> of a batch of basis states or product states,
+    e.g. feature-mapped samples, without the global tensor.
+
+    Args:
+        feature_batch: torch.Tensor, the indices of shape (batch, length) or the product states of shape (batch, length, physical_dim).
+        log: bool, whether to return the log probabilities.
+        batch_size: int | None, the number of samples contracted at once.
+
+    Returns:
+        torch.Tensor, the (log) probabilities of shape (batch,).
+    """
+    _, log_abs = calc_log_amplitudes(self._mps, feature_batch, batch_size=batch_size)
+    log_norm = 0.5 * torch.log(self.norm_factors()).sum()
+    log_probabilities = 2 * (log_abs - log_norm)
+    if log:
+        return log_probabilities
+    else:
+        return torch.exp(log_probabilities)
+
+# %% ../../4-6.ipynb 13
+from tensor_network.mps.functional import (
+    project_multi_qubits_batched as project_multi_qubits_batched_func,
+    calculate_batched_mps_norm_factors,
+)
+from safetensors.torch import save_file, load_file
+
+
+class BatchedMPS:
+    """
+    A batch of MPS of the same shape, whose local tensors have a leading batch axis.
+
+    The local tensors of the same shape in the middle of the chain, e.g. all but the two ends of an open MPS
+    or all of a periodic MPS, are stored in one contiguous buffer of shape (batch, num_stacked, left, physical, right),
+    so site-wise operations on them are single kernels and the buffer is saved as one tensor.
+    A single MPS in this storage is a batch of size 1, see `from_mps_list`.
+    """
+
+    def __init__(
+        self,
+        mps_tensors: List[torch.Tensor],
+        *,
+        stacked: bool = True,
+        requires_grad: bool | None = None,
+    ):
+        """
+        Initialize a batch of MPS.
+
+        Args:
+            mps_tensors: List[torch.Tensor], the batched local tensors of shape (batch, left, physical, right).
+            stacked: bool, whether to copy the local tensors of the same shape into one contiguous buffer.
+            requires_grad: bool | None, whether the batch of MPS requires gradient. If None, it is left unchanged,
+                otherwise the local tensors are detached, so that they are leaves, e.g. to be trained.
+        """
+        assert len(mps_tensors) > 0, "mps_tensors must not be empty"
+        batch_size = mps_tensors[0].shape[0]
+        for t in mps_tensors:
+            assert t.ndim == 4, "local tensors must be of shape (batch, left, physical, right)"
+            assert t.shape[0] == batch_size, "local tensors must have the same batch size"
+        self._batch_size = batch_size
+        start, stop = self._stackable_range(mps_tensors) if stacked else (0, 0)
+        if stop - start >= 2:
+            self._front = list(mps_tensors[:start])
+            self._stacked = torch.stack(mps_tensors[start:stop], dim=1)
+            self._back = list(mps_tensors[stop:])
+        else:
+            self._front = list(mps_tensors)
+            self._stacked = None
+            self._back = []
+        if requires_grad is not None:
+            self._front = [t.detach() for t in self._front]
+            if self._stacked is not None:
+                self._stacked = self._stacked.detach()
+            self._back = [t.detach() for t in self._back]
+            self.set_requires_grad_(requires_grad)
+
+    @staticmethod
+    def _stackable_range(mps_tensors: List[torch.Tensor]) -> Tuple[int, int]:
+        # the sites in [start, stop) share the shape of the middle tensors
+        length = len(mps_tensors)
+        if length < 3:
+            return 0, 0
+        shape = mps_tensors[1].shape
+        start = 0 if mps_tensors[0].shape == shape else 1
+        stop = length if mps_tensors[-1].shape == shape else length - 1
+        if any(t.shape != shape for t in mps_tensors[start:stop]):
+            return 0, 0
+        return start, stop
+
+    @classmethod
+    def from_mps_list(cls, mps_list: List[MPS], requires_grad: bool | None = None) -> Self:
+        """
+        Stack MPS of the same shape into a batch.
+
+        Args:
+            mps_list: List[MPS], the MPS to be stacked.
+            requires_grad: bool | None, whether the batch of MPS requires gradient, see `__init__`.
+
+        Returns:
+            BatchedMPS, the batch of MPS.
+        """
+        assert len(mps_list) > 0, "mps_list must not be empty"
+        length = mps_list[0].length
+        assert all(mps.length == length for mps in mps_list), "MPS must have the same length"
+        mps_tensors = [torch.stack([mps[i] for mps in mps_list]) for i in range(length)]
+        return cls(mps_tensors, requires_grad=requires_grad)
+
+    def _storage(self) -> List[torch.Tensor]:
+        storage = self._front + self._back
+        if self._stacked is not None:
+            storage.append(self._stacked)
+        return storage
+
+    def set_requires_grad_(self, requires_grad: bool):
+        """
+        Set the requires_grad attribute of the batch of MPS.
+
+        Args:
+            requires_grad: bool, whether the batch of MPS requires gradient.
+        """
+        for t in self._storage():
+            t.requires_grad = requires_grad
+
+    def parameters(self) -> List[torch.Tensor]:
+        """
+        Get the tensors that hold the data of the batch of MPS, e.g. for an optimizer.
+        The stacked local tensors are views of one of them.
+        """
+        return self._storage()
+
+    def to_(self, dtype: torch.dtype | None = None, device: torch.device | None = None) -> Self:
+        """
+        Convert the batch of MPS to the given dtype and device in-place.
+
+        Args:
+            dtype: torch.dtype | None, the dtype to convert to.
+            device: torch.device | None, the device to convert to.
+
+        Returns:
+            BatchedMPS, the batch of MPS converted to the given dtype and device.
+        """
+        self._front = [t.to(dtype=dtype, device=device) for t in self._front]
+        self._back = [t.to(dtype=dtype, device=device) for t in self._back]
+        if self._stacked is not None:
+            self._stacked = self._stacked.to(dtype=dtype, device=device)
+        return self
+
+    def norm_factors(self) -> torch.Tensor:
+        """
+        Calculate the norm factors of the batch of MPS, of shape (batch, length).
+        """
+        return calculate_batched_mps_norm_factors(self.local_tensors).real
+
+    def norm(self) -> torch.Tensor:
+        """
+        Calculate the norms of the batch of MPS, of shape (batch,).
+        """
+        # use sqrt inside the product to avoid overflow
+        return torch.prod(self.norm_factors().sqrt(), dim=1)
+
+    def normalize_(self):
+        """
+        Normalize the batch of MPS in-place.
+        """
+        norm_factors = 1 / self.norm_factors().sqrt()
+        num_front = len(self._front)
+        for i in range(num_front):
+            self._front[i] *= norm_factors[:, i].reshape(-1, 1, 1, 1)
+        if self._stacked is not None:
+            num_stacked = self._stacked.shape[1]
+            stacked_factors = norm_factors[:, num_front : num_front + num_stacked]
+            self._stacked *= stacked_factors.reshape(self._batch_size, num_stacked, 1, 1, 1)
+        for i in range(len(self._back)):
+            self._back[i] *= norm_factors[:, -len(self._back) + i].reshape(-1, 1, 1, 1)
+
+    def save_to_safetensors(self, path: str):
+        """
+        Save the batch of MPS to a safetensors file, with the stacked local tensors as one tensor.
+
+        Args:
+            path: str, the path to save the batch of MPS.
+        """
+        tensor_dict = {f"front.{i}": t.contiguous() for i, t in enumerate(self._front)}
+        tensor_dict.update({f"back.{i}": t.contiguous() for i, t in enumerate(self._back)})
+        if self._stacked is not None:
+            tensor_dict["stacked"] = self._stacked.contiguous()
+        save_file(tensor_dict, path)
+
+    @staticmethod
+    def load_from_safetensors(path: str, requires_grad: bool) -> "BatchedMPS":
+        """
+        Load the batch of MPS from a safetensors file.
+
+        Args:
+            path: str, the path to load the batch of MPS.
+            requires_grad: bool, whether the batch of MPS requires gradient.
+
+        Returns:
+            BatchedMPS, the batch of MPS loaded from the safetensors file.
+        """
+        tensor_dict = load_file(path)
+        stacked = tensor_dict.pop("stacked", None)
+        num_front = sum(1 for k in tensor_dict if k.startswith("front."))
+        num_back = len(tensor_dict) - num_front
+        batched_mps = BatchedMPS.__new__(BatchedMPS)
+        batched_mps._front = [tensor_dict[f"front.{i}"] for i in range(num_front)]
+        batched_mps._back = [tensor_dict[f"back.{i}"] for i in range(num_back)]
+        batched_mps._stacked = stacked
+        batched_mps._batch_size = batched_mps._storage()[0].shape[0]
+        batched_mps.set_requires_grad_(requires_grad)
+        return batched_mps
+
+    def __getitem__(self, b: int) -> MPS:
+        return MPS(mps_tensors=[t[b] for t in self.local_tensors])
+
+    def __len__(self) -> int:
+        return self._batch_size
+
+    def global_tensor(self) -> torch.Tensor:
+        """
+        Calculate the global tensors of the batch of MPS, of shape (batch, physical_dim_0, ..., physical_dim_{N-1}).
+        """
+        local_tensors = self.local_tensors
+        psi = local_tensors[0]  # (batch, left, physical, right)
+        for t in local_tensors[1:]:
+            psi = torch.einsum("blpr,brqs->blpqs", psi, t)
+            psi = psi.reshape(self._batch_size, psi.shape[1], -1, psi.shape[-1])
+        # the trace closes periodic MPS and is trivial for open MPS
+        psi = torch.einsum("blpl->bp", psi)
+        return psi.reshape(self._batch_size, *self.physical_dims)
+
+    @property
+    def local_tensors(self) -> List[torch.Tensor]:
+        stacked = [] if self._stacked is None else list(self._stacked.unbind(dim=1))
+        return self._front + stacked + self._back
+
+    @property
+    def stacked_tensor(self) -> torch.Tensor | None:
+        return self._stacked
+
+    @property
+    def batch_size(self) -> int:
+        return self._batch_size
+
+    @property
+    def length(self) -> int:
+        num_stacked = 0 if self._stacked is None else self._stacked.shape[1]
+        return len(self._front) + num_stacked + len(self._back)
+
+    @property
+    def physical_dims(self) -> List[int]:
+        return [t.shape[2] for t in self.local_tensors]
+
+    @property
+    def device(self) -> torch.device:
+        return self._storage()[0].device
+
+    @property
+    def dtype(self) -> torch.dtype:
+        return self._storage()[0].dtype
+
+
+@patch
+def project_multi_qubits_batched(
+    self: MPS, qubit_indices: List[int], project_to_states: torch.Tensor
+) -> BatchedMPS:
+    """
+    Do projection of the same qubits of this MPS onto a batch of states, returning a BatchedMPS.
+
+    Args:
+        qubit_indices: List of indices of the qubits to project.
+        project_to_states: torch.Tensor, the indices of shape (batch, num_qubits)
+            or the states of shape (batch, num_qubits, physical_dim).
+
+    Returns:
+        BatchedMPS, the batch of new MPS after projection.
+    """
+    new_local_tensors = project_multi_qubits_batched_func(
+        self._mps, qubit_indices, project_to_states
+    )
+    return BatchedMPS(new_local_tensors)
+
+# %% ../../4-7.ipynb 14
+from collections.abc import Sequence
+from .functional import quantize_tensor, dequantize_tensor
+
+
+class _DequantizedLocalTensors(Sequence):
+    # restores the local tensors one by one on access, so only one of them is in the dtype of computation at a time
+    def __init__(self, quantized_mps: "QuantizedMPS"):
+        self._quantized_mps = quantized_mps
+
+    def __getitem__(self, i: int) -> torch.Tensor:
+        q = self._quantized_mps
+        return dequantize_tensor(q._stored[i], q._scales[i], q._compute_dtype)
+
+    def __len__(self) -> int:
+        return len(self._quantized_mps._stored)
+
+
+class QuantizedMPS:
+    """
+    An MPS for inference whose local tensors are stored in a reduced precision, e.g. torch.bfloat16, torch.float16
+    or per-tensor scaled torch.int8, and restored in the dtype of computation when they are accessed,
+    so the contractions accumulate in torch.float32 or torch.float64.
+    It can be used in place of an MPS in read-only algorithms that access `local_tensors`, e.g. `eval_nll`.
+    """
+
+    def __init__(
+        self,
+        mps: MPS,
+        storage_dtype: torch.dtype,
+        compute_dtype: torch.dtype = torch.float32,
+    ):
+        """
+        Initialize a QuantizedMPS from an MPS.
+
+        Args:
+            mps: MPS, the real MPS to be stored.
+            storage_dtype: torch.dtype, the dtype of the stored local tensors.
+            compute_dtype: torch.dtype, the dtype of the restored local tensors.
+        """
+        assert compute_dtype in (torch.float32, torch.float64), (
+            "compute_dtype must be float32 or float64"
+        )
+        self._stored = []
+        self._scales = []
+        with torch.no_grad():
+            for t in mps.local_tensors:
+                stored, scale = quantize_tensor(t, storage_dtype)
+                self._stored.append(stored)
+                self._scales.append(scale)
+        self._storage_dtype = storage_dtype
+        self._compute_dtype = compute_dtype
+        self._center = mps.center
+
+    def dequantize(self) -> MPS:
+        """
+        Restore the MPS in the dtype of computation.
+        """
+        mps = MPS(mps_tensors=list(self.local_tensors), requires_grad=False)
+        mps._center = self._center
+        return mps
+
+    def __getitem__(self, i: int) -> torch.Tensor:
+        return self.local_tensors[i]
+
+    @property
+    def local_tensors(self) -> Sequence[torch.Tensor]:
+        return _DequantizedLocalTensors(self)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(t.numel() * t.element_size() for t in self._stored)
+
+    @property
+    def length(self) -> int:
+        return len(self._stored)
+
+    @property
+    def center(self) -> int | None:
+        return self._center
+
+    @property
+    def device(self) -> torch.device:
+        return self._stored[0].device
+
+    @property
+    def dtype(self) -> torch.dtype:
+        return self._compute_dtype
+
+    @property
+    def storage_dtype(self) -> torch.dtype:
+        return self._storage_dtype
+
 # %% ../../4-9.ipynb 9
 @patch
 def entanglement_entropy_onsite_(
@@ -536,7 +1173,7 @@ def entanglement_entropy_onsite_(
     entropies = -(probs * torch.log(probs)).sum(dim=1)  # (length,)
     return entropies
 
-# %% ../../5-2.ipynb 13
+# %% ../../5-2.ipynb 15
 from einops import rearrange
 
 
@@ -3,15 +3,20 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../../3-2.ipynb.
 
 # %% auto 0
-__all__ = ['ADQCNet', 'probabilities_adqc_classifier', 'calc_accuracy']
+__all__ = ['ADQCNet', 'probabilities_adqc_classifier_mps', 'probabilities_adqc_classifier', 'calc_accuracy']
 
 # %% ../../3-2.ipynb 2
 import torch
 
-# %% ../../3-5.ipynb 12
+# %% ../../3-5.ipynb 13
 from torch import nn
-from typing import Literal, Tuple, List
+from typing import Literal, Tuple, List, Self, TYPE_CHECKING
+from torch.utils.checkpoint import checkpoint
 from ..tensor_gates.modules import ADQCGate
+from ..tensor_gates.functional import apply_gates_adjoint
+
+if TYPE_CHECKING:
+    from tensor_network.mps.modules import MPS
 
 
 class ADQCNet(nn.Module):
@@ -27,6 +32,10 @@ class ADQCNet(nn.Module):
         gate_pattern: Literal["brick", "stair"],
         identity_init: bool = False,
         double_precision: bool = False,
+        backend: Literal["dense", "mps"] = "dense",
+        max_virtual_dim: int | None = None,
+        truncate_cutoff: float | None = None,
+        gradient_method: Literal["autograd", "adjoint"] = "autograd",
     ):
         """
         Args:
@@ -35,11 +44,31 @@ class ADQCNet(nn.Module):
             gate_pattern (Literal["brick", "stair"]): The pattern of the gates in the network.
             identity_init (bool): Whether to initialize the gates with identity matrix + random noise.
             double_precision (bool): Whether to use double precision for the gates.
+            backend (Literal["dense", "mps"]): Whether the states are dense tensors or lists of MPS, which scale to many more qubits.
+                Use double precision to train with the "mps" backend, since PyTorch may reject the gradients of complex SVDs in single precision.
+            max_virtual_dim (int | None): The maximum virtual dimension of the MPS after each gate for the "mps" backend. If None, no limit.
+            truncate_cutoff (float | None): The maximum relative discarded weight of each truncated bond for the "mps" backend.
+            gradient_method (Literal["autograd", "adjoint"]): How the gradients of the "dense" backend are calculated, "adjoint" for
+                `apply_gates_adjoint`, whose activation memory does not grow with the number of layers.
         """
         super().__init__()
+        assert backend in ["dense", "mps"], (
+            f'backend must be either "dense" or "mps", but got {backend}'
+        )
+        assert gradient_method in ["autograd", "adjoint"], (
+            f'gradient_method must be either "autograd" or "adjoint", but got {gradient_method}'
+        )
+        assert backend == "dense" or gradient_method == "autograd", (
+            "the adjoint method is only implemented for the dense backend"
+        )
         target_positions = self.calc_gate_target_qubit_positions(gate_pattern, num_qubits)
         gates = []
         self.num_qubits = num_qubits
+        self.num_layers = num_layers
+        self.num_gates_per_layer = len(target_positions)
+        self.backend = backend
+        self.gradient_method = gradient_method
+        self.checkpoint_layers = None
 
         for layer_idx in range(num_layers):
             for target_qubit_indices in target_positions:
@@ -50,15 +79,78 @@ class ADQCNet(nn.Module):
                     identity_init=identity_init,
                     double_precision=double_precision,
                 )
+                if backend == "mps":
+                    gate.set_mps_truncation_(max_virtual_dim, truncate_cutoff)
                 gates.append(gate)
 
         self.net = nn.Sequential(*gates)
 
-    def forward(self, qubit_states: torch.Tensor) -> torch.Tensor:
-        assert len(qubit_states.shape) == self.num_qubits + 1, (
-            f"qubit_states must have {self.num_qubits + 1} dimensions, but got {len(qubit_states.shape)}"
-        )
-        return self.net(qubit_states)
+    def gate_tensors(self) -> List[torch.Tensor]:
+        """
+        Get the unitary gate tensors of all gates, projected with one stacked SVD, see `ADQCGate.batched_gate_tensors`.
+        """
+        return ADQCGate.batched_gate_tensors(list(self.net))
+
+    def set_checkpointing_(self, layers: int | None) -> Self:
+        """
+        Set the activation checkpointing in training with the autograd method, so that the states are only kept
+        between blocks of `layers` layers for the backward pass, and the others are recomputed. None disables it.
+        """
+        assert layers is None or layers > 0, "layers must be positive"
+        self.checkpoint_layers = layers
+        return self
+
+    def _apply_gates(
+        self,
+        qubit_states: "torch.Tensor | List[MPS]",
+        gates: List[ADQCGate],
+        gate_tensors: List[torch.Tensor],
+    ) -> "torch.Tensor | List[MPS]":
+        for gate, gate_tensor in zip(gates, gate_tensors):
+            qubit_states = gate.apply_gate(tensor=qubit_states, gate=gate_tensor)
+        return qubit_states
+
+    def forward(
+        self,
+        qubit_states: "torch.Tensor | List[MPS]",
+        gate_tensors: List[torch.Tensor] | None = None,
+    ) -> "torch.Tensor | List[MPS]":
+        """
+        Args:
+            qubit_states (torch.Tensor | List[MPS]): The batched states, dense or a list of MPS according to the backend.
+            gate_tensors (List[torch.Tensor] | None): The gate tensors from `gate_tensors`, e.g. to reuse them over the steps of an RNN.
+                If None, they are calculated.
+        """
+        if self.backend == "mps":
+            assert isinstance(qubit_states, list), "qubit_states must be a list of MPS"
+            assert all(mps.length == self.num_qubits for mps in qubit_states), (
+                f"each MPS must have {self.num_qubits} qubits"
+            )
+        else:
+            assert len(qubit_states.shape) == self.num_qubits + 1, (
+                f"qubit_states must have {self.num_qubits + 1} dimensions, but got {len(qubit_states.shape)}"
+            )
+        if gate_tensors is None:
+            gate_tensors = self.gate_tensors()
+        if self.gradient_method == "adjoint":
+            return apply_gates_adjoint(
+                quantum_states=qubit_states,
+                gates=gate_tensors,
+                target_qubits=[gate.target_qubit for gate in self.net],
+            )
+        gates = list(self.net)
+        if self.checkpoint_layers is None or self.backend == "mps" or not torch.is_grad_enabled():
+            return self._apply_gates(qubit_states, gates, gate_tensors)
+        block_size = self.checkpoint_layers * self.num_gates_per_layer
+        for start in range(0, len(gates), block_size):
+            qubit_states = checkpoint(
+                self._apply_gates,
+                qubit_states,
+                gates[start : start + block_size],
+                gate_tensors[start : start + block_size],
+                use_reentrant=False,
+            )
+        return qubit_states
 
     @staticmethod
     def calc_gate_target_qubit_positions(
@@ -93,7 +185,57 @@ class ADQCNet(nn.Module):
                 p += 2
         return target_positions
 
-# %% ../../3-5.ipynb 26
+# %% ../../3-5.ipynb 31
+from einops import einsum
+
+
+def probabilities_adqc_classifier_mps(qubit_states: List["MPS"], num_classes: int) -> torch.Tensor:
+    """
+    Compute normalized class probabilities from qubit states in the form of MPS, like `probabilities_adqc_classifier`
+    does for dense states, without the global tensors.
+
+    Args:
+        qubit_states (List[MPS]): The quantum states of a batch.
+        num_classes (int): Number of classes for classification. Must be >= 2.
+
+    Returns:
+        torch.Tensor: Normalized probabilities for each class. Shape: (batch_size, num_classes)
+    """
+    DELTA = 1e-10
+    assert num_classes >= 2, "number of classes must be greater than 2"
+    num_qubit_required = (num_classes - 1).bit_length()
+    probabilities_of_classes = []
+    for mps in qubit_states:
+        assert mps.length >= num_qubit_required
+        local_tensors = mps.local_tensors
+        split = mps.length - num_qubit_required
+        # the reduced density matrix of the virtual bond on the left of the last `num_qubit_required` qubits
+        env = torch.ones(1, 1, dtype=mps.dtype, device=mps.device)
+        for local_tensor in local_tensors[:split]:
+            env = einsum(
+                env,
+                local_tensor,
+                local_tensor.conj(),
+                "left left_conj, left physical right, left_conj physical right_conj -> right right_conj",
+            )
+        # the states of the last `num_qubit_required` qubits, of shape (left, 2**num_qubit_required)
+        substates = local_tensors[split]
+        for local_tensor in local_tensors[split + 1 :]:
+            substates = einsum(
+                substates,
+                local_tensor,
+                "left physical0 mid, mid physical1 right -> left physical0 physical1 right",
+            ).flatten(1, 2)
+        substates = substates.flatten(1)[:, :num_classes]
+        probabilities = einsum(
+            env, substates, substates.conj(), "left left_conj, left c, left_conj c -> c"
+        )
+        probabilities_of_classes.append(probabilities.real)
+    probabilities_of_classes = torch.stack(probabilities_of_classes)  # (batch_size, num_classes)
+    prob_norm = torch.sum(probabilities_of_classes, dim=1, keepdim=True) + DELTA  # (batch_size, 1)
+    return probabilities_of_classes / prob_norm
+
+# %% ../../3-5.ipynb 45
 from numpy import ceil, log2
 
 
@@ -135,7 +277,7 @@ def probabilities_adqc_classifier(
     normalized_class_probabilities = probabilities_of_classes / prob_norm
     return normalized_class_probabilities
 
-# %% ../../3-5.ipynb 28
+# %% ../../3-5.ipynb 47
 def calc_accuracy(probabilities: torch.Tensor, targets: torch.Tensor) -> float:
     assert probabilities.ndimension() == 2
     assert targets.ndimension() == 1
@@ -3,7 +3,7 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../../3-6.ipynb.
 
 # %% auto 0
-__all__ = ['gpu', 'cpu', 'ADQCRNN', 'series_sin_cos', 'prepare_series_samples']
+__all__ = ['gpu', 'cpu', 'plan_rnn_checkpointing', 'ADQCRNN', 'series_sin_cos', 'prepare_series_samples', 'SeriesWindowLoader']
 
 # %% ../../3-6.ipynb 2
 import torch
@@ -13,13 +13,65 @@ gpu = torch.device("mps")
 cpu = torch.device("cpu")
 
 # %% ../../3-6.ipynb 5
-from typing import Literal
+from typing import Literal, List, Tuple, Self
+from torch.utils.checkpoint import checkpoint
 from .adqc import ADQCNet
 from ..utils.tensors import zeros_state
 from einops import einsum, rearrange
 from torch import nn
 from ..feature_mapping import cossin_feature_map, feature_map_to_qubit_state
 
+from math import ceil
+
+
+def plan_rnn_checkpointing(
+    *,
+    sample_length: int,
+    num_layers: int,
+    gates_per_layer: int,
+    state_bytes: int,
+    aux_state_bytes: int,
+    memory_budget: int,
+) -> Tuple[int | None, int | None]:
+    """
+    Choose the activation checkpointing of an ADQC RNN within a memory budget, see `ADQCRNN.set_checkpointing_`.
+
+    The activations are estimated by one state per gate application and 3 more states per time step for the encoding and the projection.
+    With checkpointing, the states at the boundaries of the segments (blocks) are kept, and the activations of one segment (block)
+    are alive during its recomputation. Time steps are checkpointed first, with the longest segments that fit,
+    and layers only if even a single time step does not fit. If nothing fits, the configuration of the least memory is returned.
+
+    Args:
+        sample_length: The number of time steps.
+        num_layers: The number of layers of the ADQC network.
+        gates_per_layer: The number of gates per layer.
+        state_bytes: The bytes of the batched states of all qubits.
+        aux_state_bytes: The bytes of the batched states of the aux qubits.
+        memory_budget: The memory budget of the activations in bytes.
+
+    Returns:
+        Tuple[int | None, int | None]: The number of time steps per segment and the number of layers per block,
+        where None means no checkpointing.
+    """
+    assert sample_length > 0 and num_layers > 0 and gates_per_layer > 0
+
+    def _step_bytes(layers: int | None) -> int:
+        if layers is None:
+            return (num_layers * gates_per_layer + 3) * state_bytes
+        return (ceil(num_layers / layers) + layers * gates_per_layer + 3) * state_bytes
+
+    def _total_bytes(steps: int, layers: int | None) -> int:
+        return ceil(sample_length / steps) * aux_state_bytes + steps * _step_bytes(layers)
+
+    if sample_length * _step_bytes(None) <= memory_budget:
+        return None, None
+    for layers in [None] + list(range(num_layers - 1, 0, -1)):
+        for steps in range(sample_length, 0, -1):
+            if _total_bytes(steps, layers) <= memory_budget:
+                return (None if steps == sample_length else steps), layers
+    layers = min(range(1, num_layers + 1), key=_step_bytes)
+    return 1, (None if layers == num_layers else layers)
+
 
 class ADQCRNN(nn.Module):
     """
@@ -40,6 +92,7 @@ class ADQCRNN(nn.Module):
         identity_init: bool = False,
         double_precision: bool = False,
         feature_map: Literal["cossin"] = "cossin",
+        gradient_method: Literal["autograd", "adjoint"] = "autograd",
     ):
         """
         ADQC-based QuantumRecurrent Neural Network
@@ -53,6 +106,7 @@ class ADQCRNN(nn.Module):
             double_precision: Whether to use double precision (complex128) or single precision (complex64)
             feature_map: Type of feature map to use for encoding classical data into quantum states
                          Currently only "cossin" is implemented
+            gradient_method: How the gradients of the ADQC network are calculated, see `ADQCNet`
 
         """
         super().__init__()
@@ -68,6 +122,7 @@ class ADQCRNN(nn.Module):
             gate_pattern=gate_pattern,
             identity_init=identity_init,
             double_precision=double_precision,
+            gradient_method=gradient_method,
         )
         self.complex_dtype = torch.complex128 if double_precision else torch.complex64
         if feature_map == "cossin":
@@ -76,6 +131,172 @@ class ADQCRNN(nn.Module):
         else:
             raise Exception(f"The only implemented feature map is cossin, but got {feature_map}")
 
+        batch_dim_name = "batch"
+        aux_qubit_names = [f"a{i}" for i in range(self.num_aux_qubits)]
+        feature_qubit_names = [f"f{i}" for i in range(self.num_feature_qubits)]
+        self.qubit_cross_product_expression = "{aux_dims}, {feature_dims} -> {state_dims}".format(
+            aux_dims=" ".join([batch_dim_name] + aux_qubit_names),
+            feature_dims=" ".join([batch_dim_name] + feature_qubit_names),
+            state_dims=" ".join([batch_dim_name] + aux_qubit_names + feature_qubit_names),
+        )
+        self.projection_rearrange_expression = (
+            "batch {aux_dims} {feature_dims} -> {feature_dims} batch {aux_dims} ".format(
+                aux_dims=" ".join(aux_qubit_names),
+                feature_dims=" ".join(feature_qubit_names),
+            )
+        )
+        self.projected_feature_state = [0] * self.num_feature_qubits
+        self.checkpoint_steps = None
+
+    def set_checkpointing_(self, *, steps: int | None = None, layers: int | None = None) -> Self:
+        """
+        Set the activation checkpointing in training. The states are only kept for the backward pass between segments of `steps` time steps,
+        and, within a time step, between blocks of `layers` layers of the ADQC network. The others are recomputed in the backward pass.
+
+        Args:
+            steps: The number of time steps per checkpointed segment. If None, the time steps are not checkpointed.
+            layers: The number of ADQC layers per checkpointed block. If None, the layers are not checkpointed.
+        """
+        assert steps is None or steps > 0, "steps must be positive"
+        self.checkpoint_steps = steps
+        self.net.set_checkpointing_(layers)
+        return self
+
+    def auto_checkpointing_(
+        self, *, batch_size: int, sample_length: int, memory_budget: int
+    ) -> Tuple[int | None, int | None]:
+        """
+        Set the activation checkpointing chosen by `plan_rnn_checkpointing` for the given shape of data and memory budget.
+
+        Args:
+            batch_size: The batch size of training.
+            sample_length: The number of time steps of the samples.
+            memory_budget: The memory budget of the activations in bytes.
+
+        Returns:
+            The chosen numbers of time steps per segment and of layers per block, see `set_checkpointing_`.
+        """
+        itemsize = torch.empty((), dtype=self.complex_dtype).element_size()
+        steps, layers = plan_rnn_checkpointing(
+            sample_length=sample_length,
+            num_layers=self.net.num_layers,
+            gates_per_layer=self.net.num_gates_per_layer,
+            state_bytes=batch_size * 2**self.net.num_qubits * itemsize,
+            aux_state_bytes=batch_size * 2**self.num_aux_qubits * itemsize,
+            memory_budget=memory_budget,
+        )
+        self.set_checkpointing_(steps=steps, layers=layers)
+        return steps, layers
+
+    def _step(
+        self,
+        aux_qubit_states: torch.Tensor,
+        data_t: torch.Tensor,
+        gate_tensors: List[torch.Tensor],
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        One time step, returning the normalized projected aux qubit states and their norms.
+
+        Args:
+            aux_qubit_states: The aux qubit states of shape (batch_size, *aux_qubit_dims).
+            data_t: The data of this step of shape (batch_size, feature_dim).
+            gate_tensors: The gate tensors of the ADQC network, see `ADQCNet.gate_tensors`.
+        """
+        batch_size = data_t.shape[0]
+        is_mps = data_t.device.type == "mps"
+        if is_mps:
+            features = self.feature_map(data_t)  # (batch_size, feature_dim, 2)
+        else:
+            features = self.feature_map_compiled(data_t)  # (batch_size, feature_dim, 2)
+
+        feature_qubit_states = feature_map_to_qubit_state(
+            features
+        )  # (batch_size, *feature_qubit_dims)
+
+        states = einsum(
+            aux_qubit_states, feature_qubit_states, self.qubit_cross_product_expression
+        )  # (batch_size, *aux_qubit_dims, *feature_qubit_dims)
+        states = self.net(
+            states, gate_tensors
+        )  # (batch_size, *aux_qubit_dims, *feature_qubit_dims)
+        states = rearrange(
+            states, self.projection_rearrange_expression
+        )  # (*feature_qubit_dims, batch_size, *aux_qubit_dims)
+        # projection
+        projected_aux_qubit_states = states[
+            *self.projected_feature_state
+        ]  # (batch_size, *aux_qubit_dims)
+        projected_aux_qubit_states = projected_aux_qubit_states.reshape(
+            batch_size, -1
+        )  # (batch_size, 2**num_aux_qubits)
+        if is_mps:
+            # see https://github.com/pytorch/pytorch/issues/146691
+            norms = (
+                (projected_aux_qubit_states * projected_aux_qubit_states.conj())
+                .real.sum(dim=1, keepdim=True)
+                .sqrt()
+            )  # (batch_size, 1)
+        else:
+            norms = projected_aux_qubit_states.norm(dim=1, keepdim=True)  # (batch_size, 1)
+        projected_aux_qubit_states = (
+            projected_aux_qubit_states / norms
+        )  # (batch_size, 2**num_aux_qubits)
+        # the norm of the projected_aux_qubit_states is the probability of the projected feature state
+        return projected_aux_qubit_states.reshape(aux_qubit_states.shape), norms.squeeze(1)
+
+    def _run_steps(
+        self,
+        aux_qubit_states: torch.Tensor,
+        data_segment: torch.Tensor,
+        gate_tensors: List[torch.Tensor],
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        for t in range(data_segment.shape[1]):
+            aux_qubit_states, norms = self._step(
+                aux_qubit_states, data_segment[:, t, :], gate_tensors
+            )
+        return aux_qubit_states, norms
+
+    def init_state(self, batch_size: int, device: torch.device | None = None) -> torch.Tensor:
+        """
+        The initial aux qubit states of a stream, see `step`.
+
+        Args:
+            batch_size: The number of streams.
+            device: The device of the states.
+
+        Returns:
+            torch.Tensor: The aux qubit states of shape (batch_size, *aux_qubit_dims), all in |0...0>.
+        """
+        aux_qubit_states = zeros_state(num_qubits=self.num_aux_qubits, dtype=self.complex_dtype).to(
+            device
+        )  # (*aux_qubit_dims)
+        return torch.stack([aux_qubit_states] * batch_size, dim=0)  # (batch_size, *aux_qubit_dims)
+
+    def step(
+        self, aux_qubit_states: torch.Tensor, data_t: torch.Tensor
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Advance the streams by one time step, so that online inference costs one step per observation
+        instead of rerunning the whole window. Starting from `init_state` and stepping through a window
+        gives the same probabilities as `forward` on the window.
+
+        Args:
+            aux_qubit_states: The aux qubit states of shape (batch_size, *aux_qubit_dims), from `init_state` or the last `step`.
+            data_t: The observations of this step of shape (batch_size, feature_dim).
+
+        Returns:
+            Tuple[torch.Tensor, torch.Tensor]: The updated aux qubit states and the probabilities of the projected feature state
+            of shape (batch_size,).
+        """
+        assert len(data_t.shape) == 2 and data_t.shape[1] == self.num_feature_qubits, (
+            f"data_t must be of shape (batch_size, {self.num_feature_qubits}), but got {tuple(data_t.shape)}"
+        )
+        assert aux_qubit_states.shape[0] == data_t.shape[0], (
+            f"batch sizes mismatch, got {aux_qubit_states.shape[0]} and {data_t.shape[0]}"
+        )
+        # the projected gates are cached while the parameters are unchanged and no gradients are needed
+        return self._step(aux_qubit_states, data_t, self.net.gate_tensors())
+
     def forward(self, data_batch: torch.Tensor) -> torch.Tensor:
         # data_batch shape: (batch_size, sample_length, feature_dim)
         assert len(data_batch.shape) == 3, (
@@ -83,80 +304,35 @@ class ADQCRNN(nn.Module):
         )
         batch_size, sample_length, feature_dim = data_batch.shape
         device = data_batch.device
-        is_mps = device.type == "mps"
         assert feature_dim == self.num_feature_qubits, (
             f"feature_dim must be equal to the number of feature qubits, but got {feature_dim=} and {self.num_feature_qubits=}"
         )
 
-        aux_qubit_states = zeros_state(num_qubits=self.num_aux_qubits, dtype=self.complex_dtype).to(
-            device
-        )  # (*aux_qubit_dims)
-        aux_qubit_states = torch.stack(
-            [aux_qubit_states] * batch_size, dim=0
-        )  # (batch_size, *aux_qubit_dims)
-        aux_qubit_states_shape = aux_qubit_states.shape
-        batch_dim_name = "batch"
-        aux_qubit_names = [f"a{i}" for i in range(self.num_aux_qubits)]
-        feature_qubit_names = [f"f{i}" for i in range(self.num_feature_qubits)]
-        qubit_cross_product_expression = "{aux_dims}, {feature_dims} -> {state_dims}".format(
-            aux_dims=" ".join([batch_dim_name] + aux_qubit_names),
-            feature_dims=" ".join([batch_dim_name] + feature_qubit_names),
-            state_dims=" ".join([batch_dim_name] + aux_qubit_names + feature_qubit_names),
-        )
-        projected_feature_state = [0] * self.num_feature_qubits
+        # (batch_size, *aux_qubit_dims)
+        aux_qubit_states = self.init_state(batch_size, device=device)
 
-        for t in range(sample_length):
-            if is_mps:
-                features = self.feature_map(data_batch[:, t, :])  # (batch_size, feature_dim, 2)
+        # the gates are the same in all steps, so they are projected to unitaries only once
+        gate_tensors = self.net.gate_tensors()
+        use_checkpoint = self.checkpoint_steps is not None and torch.is_grad_enabled()
+        segment_length = self.checkpoint_steps if use_checkpoint else sample_length
+        for start in range(0, sample_length, segment_length):
+            data_segment = data_batch[:, start : start + segment_length, :]
+            if use_checkpoint:
+                # only the aux qubit states between segments are kept, the steps are recomputed in the backward pass
+                aux_qubit_states, prob_of_projected_feature_state = checkpoint(
+                    self._run_steps,
+                    aux_qubit_states,
+                    data_segment,
+                    gate_tensors,
+                    use_reentrant=False,
+                )
             else:
-                features = self.feature_map_compiled(
-                    data_batch[:, t, :]
-                )  # (batch_size, feature_dim, 2)
-
-            feature_qubit_states = feature_map_to_qubit_state(
-                features
-            )  # (batch_size, *feature_qubit_dims)
-
-            states = einsum(
-                aux_qubit_states, feature_qubit_states, qubit_cross_product_expression
-            )  # (batch_size, *aux_qubit_dims, *feature_qubit_dims)
-            states = self.net(states)  # (batch_size, *aux_qubit_dims, *feature_qubit_dims)
-            states = rearrange(
-                states,
-                "batch {aux_dims} {feature_dims} -> {feature_dims} batch {aux_dims} ".format(
-                    aux_dims=" ".join(aux_qubit_names),
-                    feature_dims=" ".join(feature_qubit_names),
-                ),
-            )  # (*feature_qubit_dims, batch_size, *aux_qubit_dims)
-            # projection
-            projected_aux_qubit_states = states[
-                *projected_feature_state
-            ]  # (batch_size, *aux_qubit_dims)
-            projected_aux_qubit_states = projected_aux_qubit_states.reshape(
-                batch_size, -1
-            )  # (batch_size, 2**num_aux_qubits)
-            if is_mps:
-                # see https://github.com/pytorch/pytorch/issues/146691
-                norms = (
-                    (projected_aux_qubit_states * projected_aux_qubit_states.conj())
-                    .real.sum(dim=1, keepdim=True)
-                    .sqrt()
-                )  # (batch_size, 1)
-            else:
-                norms = projected_aux_qubit_states.norm(dim=1, keepdim=True)  # (batch_size, 1)
-            projected_aux_qubit_states = (
-                projected_aux_qubit_states / norms
-            )  # (batch_size, 2**num_aux_qubits)
-            # finished one step and set the aux_qubit_states for the next step
-            aux_qubit_states = projected_aux_qubit_states.reshape(
-                aux_qubit_states_shape
-            )  # (batch_size, *aux_qubit_dims)
-
-        # the norm of the projected_aux_qubit_states is the probability of the projected feature state
-        prob_of_projected_feature_state = norms.squeeze(1)  # (batch_size,)
-        return prob_of_projected_feature_state
+                aux_qubit_states, prob_of_projected_feature_state = self._run_steps(
+                    aux_qubit_states, data_segment, gate_tensors
+                )
+        return prob_of_projected_feature_state  # (batch_size,)
 
-# %% ../../3-6.ipynb 10
+# %% ../../3-6.ipynb 12
 def series_sin_cos(
     length: int, coeff_sin: torch.Tensor, coeff_cos: torch.Tensor, k_step: float = 0.02
 ) -> torch.Tensor:
@@ -187,25 +363,98 @@ def series_sin_cos(
     series = y_sin + y_cos  # (length,)
     return series
 
-# %% ../../3-6.ipynb 12
+# %% ../../3-6.ipynb 14
+from typing import Iterator
+import numpy as np
+
+
 def prepare_series_samples(
     series: torch.Tensor, sample_length: int, step_size: int
 ) -> torch.Tensor:
     """
     Prepare samples from a series.
+    The samples are a strided view of the series without copying, so writing into them writes into the series.
     Args:
-        series (torch.Tensor): The series to prepare samples from.
+        series (torch.Tensor): The series to prepare samples from, of shape (length, *feature_dims).
         sample_length (int): The length of the samples.
         step_size (int): The step size of the samples.
     Returns:
-        torch.Tensor: The samples.
+        torch.Tensor: The samples of shape (num_samples, sample_length, *feature_dims).
     """
     assert sample_length >= step_size >= 1
     length = series.shape[0]
     assert length >= sample_length
-    samples = []
-    for start in range(0, length - sample_length, step_size):
-        sample = series[start : start + sample_length]
-        samples.append(sample)
+    # unfold appends the window dim at the end
+    return series.unfold(0, sample_length, step_size).movedim(-1, 1)
+
+
+class SeriesWindowLoader:
+    """
+    Lazy batches of the (samples, targets) of next-value prediction from a long series, like a `DataLoader` over
+    `prepare_series_samples(series, sample_length + 1, step_size)` but only materializing one batch at a time.
+    The series can be a np.memmap, in which case only the windows of a batch are read from the disk.
+    """
+
+    def __init__(
+        self,
+        series: torch.Tensor | np.ndarray,
+        sample_length: int,
+        step_size: int,
+        batch_size: int,
+        *,
+        shuffle: bool = False,
+        device: torch.device | None = None,
+        generator: torch.Generator | None = None,
+    ):
+        """
+        Args:
+            series (torch.Tensor | np.ndarray): The series of shape (length, *feature_dims), e.g. a np.memmap.
+            sample_length (int): The length of the samples, whose next values are the targets.
+            step_size (int): The step size of the windows.
+            batch_size (int): The batch size.
+            shuffle (bool): Whether to shuffle the windows in every iteration.
+            device (torch.device | None): The device to move the batches to.
+            generator (torch.Generator | None): The generator for shuffling.
+        """
+        assert batch_size >= 1
+        window_length = sample_length + 1
+        if isinstance(series, np.ndarray):
+            assert window_length >= step_size >= 1
+            assert series.shape[0] >= window_length
+            # a strided view of the memmap, (num_windows, *feature_dims, window_length)
+            windows = np.lib.stride_tricks.sliding_window_view(series, window_length, axis=0)
+            self.windows = np.moveaxis(windows[::step_size], -1, 1)
+        else:
+            self.windows = prepare_series_samples(series, window_length, step_size)
+        self.sample_length = sample_length
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.device = device
+        self.generator = generator
+
+    @property
+    def num_samples(self) -> int:
+        return self.windows.shape[0]
 
-    return torch.stack(samples, dim=0)
+    def __len__(self) -> int:
+        return -(-self.num_samples // self.batch_size)
+
+    def _get_windows(self, indices: torch.Tensor | slice) -> torch.Tensor:
+        if isinstance(self.windows, np.ndarray):
+            if isinstance(indices, torch.Tensor):
+                # sorted indices read the memmap in order
+                indices = np.sort(indices.numpy())
+            return torch.from_numpy(np.ascontiguousarray(self.windows[indices]))
+        return self.windows[indices]
+
+    def __iter__(self) -> Iterator[Tuple[torch.Tensor, torch.Tensor]]:
+        if self.shuffle:
+            order = torch.randperm(self.num_samples, generator=self.generator)
+        for start in range(0, self.num_samples, self.batch_size):
+            if self.shuffle:
+                indices = order[start : start + self.batch_size]
+            else:
+                indices = slice(start, start + self.batch_size)
+            # (batch_size, sample_length + 1, *feature_dims)
+            windows = self._get_windows(indices).to(self.device)
+            yield windows[:, : self.sample_length], windows[:, self.sample_length]
@@ -3,7 +3,7 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../../4-4.ipynb.
 
 # %% auto 0
-__all__ = ['ResMPSSimple']
+__all__ = ['tree_chain_matmul', 'ResMPSSimple']
 
 # %% ../../4-4.ipynb 2
 import torch
@@ -11,6 +11,32 @@ from torch import nn
 from einops import einsum, repeat
 
 # %% ../../4-4.ipynb 6
+from typing import Literal
+
+
+def tree_chain_matmul(matrices: torch.Tensor) -> torch.Tensor:
+    """
+    The ordered product of a chain of batched matrices by a tree of pairwise products, whose depth is
+    logarithmic rather than linear in the length of the chain.
+
+    Args:
+        matrices: The matrices of shape (batch, length, dim, dim).
+
+    Returns:
+        torch.Tensor: The product matrices[:, 0] @ matrices[:, 1] @ ... of shape (batch, dim, dim).
+    """
+    assert matrices.ndim == 4 and matrices.shape[1] > 0, (
+        "matrices must be of shape (batch, length, dim, dim)"
+    )
+    while matrices.shape[1] > 1:
+        length = matrices.shape[1]
+        products = matrices[:, 0 : length - 1 : 2] @ matrices[:, 1:length:2]
+        if length % 2 == 1:
+            products = torch.cat([products, matrices[:, length - 1 :]], dim=1)
+        matrices = products
+    return matrices[:, 0]
+
+
 class ResMPSSimple(nn.Module):
     """
     A basic residual MPS model.
@@ -24,12 +50,31 @@ class ResMPSSimple(nn.Module):
         num_classes: int,
         virtual_dim: int,
         eps_norm: float = 1e-4,
+        contraction: Literal["auto", "sequential", "scan"] = "auto",
     ):
+        """
+        Args:
+            num_features: The number of features, i.e. the number of sites.
+            feature_dim: The dimension of each feature.
+            num_classes: The number of classes.
+            virtual_dim: The virtual bond dimension.
+            eps_norm: The norm of the initial local tensors.
+            contraction: How the sites on both sides of the class site are contracted.
+                "sequential" walks the sites one by one with residual matrix-vector products.
+                "scan" builds the transfer matrices (I + A_i x_i) of all sites and multiplies them by `tree_chain_matmul`,
+                which takes more FLOPs, O(virtual_dim^3) instead of O(virtual_dim^2 * feature_dim) per site, but only
+                a logarithmic number of sequential steps.
+                "auto" uses "scan" when virtual_dim^3 <= num_features.
+        """
         super().__init__()
         assert num_features > 0, "num_features must be positive"
         assert num_classes > 0, "num_classes must be positive"
         assert feature_dim > 0, "feature_dim must be positive"
         assert virtual_dim > 0, "virtual_dim must be positive"
+        assert contraction in ["auto", "sequential", "scan"]
+        if contraction == "auto":
+            contraction = "scan" if virtual_dim**3 <= num_features else "sequential"
+        self.contraction = contraction
         self.num_features = num_features
         self.num_classes = num_classes
         self.virtual_dim = virtual_dim
@@ -78,6 +123,9 @@ class ResMPSSimple(nn.Module):
         )
         assert feature_dim == self.feature_dim, f"feature_dim must be equal to {self.feature_dim}"
 
+        if self.contraction == "scan":
+            return self._forward_scan(features)
+
         latent_left = repeat(
             self.contract_vector_left, "virtual_left -> batch virtual_left", batch=batch_size
         )
@@ -110,3 +158,55 @@ class ResMPSSimple(nn.Module):
             "left feature right classes, batch left, batch right, batch feature -> batch classes",
         )
         return activation
+
+    def _transfer_matrices(
+        self, start: int, stop: int, features: torch.Tensor
+    ) -> torch.Tensor | None:
+        """
+        The residual transfer matrices (I + A_i x_i) of the sites in [start, stop) of shape (batch, stop - start, left, right),
+        or None if there are no such sites.
+        """
+        if start >= stop:
+            return None
+        local_tensors = torch.stack(list(self.local_tensors[start:stop]), dim=0)
+        matrices = einsum(
+            local_tensors,
+            features[:, start:stop, :],
+            "site left feature right, batch site feature -> batch site left right",
+        )
+        return matrices + torch.eye(self.virtual_dim, dtype=matrices.dtype, device=matrices.device)
+
+    def _forward_scan(self, features: torch.Tensor) -> torch.Tensor:
+        batch_size = features.shape[0]
+        latent_left = repeat(
+            self.contract_vector_left, "virtual_left -> batch virtual_left", batch=batch_size
+        )
+        left_matrices = self._transfer_matrices(0, self.class_idx, features)
+        if left_matrices is not None:
+            # latent_left @ T_0 @ T_1 @ ... @ T_{class_idx - 1}
+            latent_left = einsum(
+                latent_left,
+                tree_chain_matmul(left_matrices),
+                "batch left, batch left right -> batch right",
+            )
+
+        latent_right = repeat(
+            self.contract_vector_right, "virtual_right -> batch virtual_right", batch=batch_size
+        )
+        right_matrices = self._transfer_matrices(self.class_idx + 1, self.num_features, features)
+        if right_matrices is not None:
+            # T_{class_idx + 1} @ ... @ T_{num_features - 1} @ latent_right
+            latent_right = einsum(
+                tree_chain_matmul(right_matrices),
+                latent_right,
+                "batch left right, batch right -> batch left",
+            )
+
+        activation = einsum(
+            self.local_tensors[self.class_idx],
+            latent_left,
+            latent_right,
+            features[:, self.class_idx, :],
+            "left feature right classes, batch left, batch right, batch feature -> batch classes",
+        )
+        return activation
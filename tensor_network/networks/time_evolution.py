@@ -70,12 +70,15 @@ class PolarizationGate(ParameterizedGate):
         self.time_slice = time_slice
         self.h_directions = h_directions
 
-    def forward(self, tensor: Tensor) -> Tensor:
+    def gate_tensor(self) -> Tensor:
         spin_matrix = 0
         for direction in self.h_directions:
             spin_matrix += self.gate_params[direction] * self.spin[direction]
 
-        gate = torch.matrix_exp(-1j * self.time_slice * spin_matrix)
+        return torch.matrix_exp(-1j * self.time_slice * spin_matrix)
+
+    def forward(self, tensor: Tensor) -> Tensor:
+        gate = self.gate_tensor()
         return self.apply_gate(
             tensor=tensor,
             gate=gate,
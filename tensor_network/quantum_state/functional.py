@@ -128,7 +128,7 @@ def project_state(
     new_state = new_state / new_state.norm()
     return new_state
 
-# %% ../../5-2.ipynb 29
+# %% ../../5-2.ipynb 34
 from math import prod
 
 
@@ -1,7 +1,7 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../../2-5.ipynb.
 
 # %% auto 0
-__all__ = ['apply_gate', 'kron', 'pauli_operator', 'rotate', 'apply_gate_batched_with_vmap', 'apply_gate_batched', 'apply_gate_nonbatched', 'gate_outer_product', 'spin_operator', 'identity_gate_tensor', 'get_control_gate_tensor', 'rand_unitary', 'rand_gate_tensor']
+__all__ = ['apply_gate', 'kron', 'pauli_operator', 'rotate', 'apply_gate_batched_with_vmap', 'apply_gate_batched', 'apply_gate_nonbatched', 'plan_gate_fusion', 'fuse_gate_tensors', 'statevector_gate_plan', 'apply_gate_flat', 'apply_gate_mps', 'apply_gates_adjoint', 'gate_outer_product', 'spin_operator', 'identity_gate_tensor', 'get_control_gate_tensor', 'rand_unitary', 'rand_gate_tensor']
 
 # %% ../../2-5.ipynb 3
 from tensor_network.utils.checking import (
@@ -9,18 +9,63 @@ from tensor_network.utils.checking import (
     check_quantum_gate,
     check_state_tensor,
 )
-from ..utils.mapping import inverse_permutation, unify_tensor_dtypes
+from ..utils.mapping import unify_tensor_dtypes
 import torch
 from typing import List
 from einops import einsum
 
 # %% ../../2-5.ipynb 4
+def _apply_gate_on_controlled_slice(
+    state: torch.Tensor,
+    gate: torch.Tensor,
+    target_qubit: List[int],
+    control_qubit: List[int],
+    batched: bool,
+    inplace: bool,
+) -> torch.Tensor:
+    """
+    Apply a gate in tensor form to the slice of the state where all control qubits are 1.
+
+    The slice is a strided view of the state, and the gate is contracted with it with the qubits kept in their order,
+    so no permutation of the whole state is needed. In-place, only the slice is read and written.
+    Otherwise, the state is copied once and the slice of the copy is overwritten.
+    """
+    num_batch_dims = 1 if batched else 0
+    num_qubits = state.ndim - num_batch_dims
+    index = [slice(None)] * state.ndim
+    for qidx in control_qubit:
+        index[num_batch_dims + qidx] = 1
+    index = tuple(index)
+    # names of the dims of the slice, in the order of the qubits
+    kept_qubits = [q for q in range(num_qubits) if q not in control_qubit]
+    batch_dim_names = ["batch"] if batched else []
+    einsum_str = "{gate_dims}, {state_dims} -> {output_dims}".format(
+        gate_dims=" ".join([f"g{i}" for i in target_qubit] + [f"t{i}" for i in target_qubit]),
+        state_dims=" ".join(
+            batch_dim_names + [f"t{q}" if q in target_qubit else f"o{q}" for q in kept_qubits]
+        ),
+        output_dims=" ".join(
+            batch_dim_names + [f"g{q}" if q in target_qubit else f"o{q}" for q in kept_qubits]
+        ),
+    )
+    new_slice = einsum(gate, state[index], einsum_str)
+    if inplace:
+        state[index] = new_slice
+        return state
+    if len(control_qubit) == 0:
+        return new_slice
+    new_state = state.clone()
+    new_state[index] = new_slice
+    return new_state
+
+
 def apply_gate(
     *,
     quantum_state: torch.Tensor,
     gate: torch.Tensor,
     target_qubit: int | List[int],
     control_qubit: int | List[int] | None = None,
+    inplace: bool = False,
 ) -> torch.Tensor:
     """
     Apply a quantum gate to a quantum state tensor. It can also be used to implement controlled gates by specifying control qubits.
@@ -30,6 +75,7 @@ def apply_gate(
         gate (torch.Tensor): The quantum gate tensor.
         target_qubit (int | List[int]): The target qubit(s) to apply the gate to.
         control_qubit (int | List[int] | None): The control qubit(s) for the gate. If None, no control qubits are used.
+        inplace (bool): Whether to write the result into `quantum_state`, e.g. for inference. For controlled gates, only the controlled slice is then allocated and written. Not for states that require gradients.
     Returns:
         torch.Tensor: The new quantum state tensor after applying the gate.
     """
@@ -60,7 +106,11 @@ def apply_gate(
     )
     check_quantum_gate(gate, num_target_qubit)
 
+    input_state = quantum_state
     quantum_state, gate = unify_tensor_dtypes(quantum_state, gate)
+    assert not inplace or quantum_state is input_state, (
+        "the dtype of quantum_state must not be changed by the gate for in-place application"
+    )
 
     # check indices
     for qidx in target_qubit:
@@ -73,45 +123,10 @@ def apply_gate(
         new_shape = [2] * (num_target_qubit * 2)
         gate = gate.reshape(new_shape)
 
-    other_qubits = list(range(num_qubits))
-    for qubit_idx in target_qubit:
-        other_qubits.remove(qubit_idx)
-    for qubit_idx in control_qubit:
-        other_qubits.remove(qubit_idx)
-
-    num_other_qubits = len(other_qubits)
-    permutation = target_qubit + other_qubits + control_qubit
-    state = torch.permute(quantum_state, permutation)
-    state_shape = state.shape  # (*target_qubit_shapes, *other_qubit_shapes, *control_qubit_shapes)
-    # Flatten the state tensor, so that the shape is (target_qubit_shapes, other_qubit_shapes, -1)
-    new_shape = [2] * (num_target_qubit + num_other_qubits) + [-1]
-    state = state.reshape(new_shape)
     # only when control qubits are 11111... the gate is applied
-    unaffected_state = state[
-        ..., :-1
-    ]  # (*target_qubit_shapes, *other_qubit_shapes, flattened_dim-1)
-    state_to_apply_gate = state[..., -1]  # (*target_qubit_shapes, *other_qubit_shapes)
-    # apply gate
-    target_qubit_names = [f"t{i}" for i in target_qubit]
-    other_qubit_names = [f"o{i}" for i in other_qubits]
-    gate_output_qubit_names = [f"g{i}" for i in target_qubit]
-    einsum_str = "{gate_dims}, {state_dims} -> {output_dims}".format(
-        gate_dims=" ".join(gate_output_qubit_names + target_qubit_names),
-        state_dims=" ".join(target_qubit_names + other_qubit_names),
-        output_dims=" ".join(gate_output_qubit_names + other_qubit_names),
+    return _apply_gate_on_controlled_slice(
+        quantum_state, gate, target_qubit, control_qubit, batched=False, inplace=inplace
     )
-    new_state = einsum(gate, state_to_apply_gate, einsum_str)
-    new_state = new_state.unsqueeze(-1)
-
-    final_state = torch.cat(
-        [unaffected_state, new_state], dim=-1
-    )  # (*target_qubit_shapes, *other_qubit_shapes, flattened_dim)
-    final_state = final_state.reshape(
-        state_shape
-    )  # (*target_qubit_shapes, *other_qubit_shapes, *control_qubit_shapes)
-    inversed_permutation = inverse_permutation(permutation)
-    final_state = final_state.permute(inversed_permutation)
-    return final_state
 
 # %% ../../2-8.ipynb 6
 def kron(*matrices: torch.Tensor) -> torch.Tensor:
@@ -270,6 +285,7 @@ def apply_gate_batched(
     gate: torch.Tensor,
     target_qubit: int | List[int],
     control_qubit: int | List[int] | None = None,
+    inplace: bool = False,
 ) -> torch.Tensor:
     """
     Apply a quantum gate to a quantum state tensor. It can also be used to implement controlled gates by specifying control qubits.
@@ -279,6 +295,7 @@ def apply_gate_batched(
         gate (torch.Tensor): The quantum gate tensor, not batched.
         target_qubit (int | List[int]): The target qubit(s) to apply the gate to.
         control_qubit (int | List[int] | None): The control qubit(s) for the gate. If None, no control qubits are used.
+        inplace (bool): Whether to write the result into `quantum_states`, e.g. for inference. For controlled gates, only the controlled slice is then allocated and written. Not for states that require gradients.
     Returns:
         torch.Tensor: The new quantum state tensor after applying the gate.
     """
@@ -301,7 +318,6 @@ def apply_gate_batched(
         "target qubit and control qubit must not overlap"
     )
 
-    batch_num = quantum_states.shape[0]
     num_qubits = quantum_states.ndim - 1  # because of batch dimension
     num_target_qubit = len(target_qubit)
     num_control_qubit = len(control_qubit)
@@ -310,10 +326,11 @@ def apply_gate_batched(
     )
     check_quantum_gate(gate, num_target_qubit)
 
+    input_states = quantum_states
     quantum_states, gate = unify_tensor_dtypes(quantum_states, gate)
-    # permute the batch dim to the last dim
-    quantum_states = torch.movedim(quantum_states, 0, -1)  # (*qubit_shapes, batch_dim)
-    batch_dim_idx = quantum_states.ndim - 1
+    assert not inplace or quantum_states is input_states, (
+        "the dtype of quantum_states must not be changed by the gate for in-place application"
+    )
 
     # check indices
     for qidx in target_qubit:
@@ -326,53 +343,10 @@ def apply_gate_batched(
         new_shape = [2] * (num_target_qubit * 2)
         gate = gate.reshape(new_shape)
 
-    other_qubits = list(range(num_qubits))
-    for qubit_idx in target_qubit:
-        other_qubits.remove(qubit_idx)
-    for qubit_idx in control_qubit:
-        other_qubits.remove(qubit_idx)
-
-    num_other_qubits = len(other_qubits)
-    permute_qubit_dims = target_qubit + other_qubits + control_qubit + [batch_dim_idx]
-    state = torch.permute(quantum_states, permute_qubit_dims)
-    state_shape = (
-        state.shape
-    )  # (*target_qubit_shapes, *other_qubit_shapes, *control_qubit_shapes, batch_dim)
-    # Flatten the state tensor, so that the shape is (target_qubit_shapes, other_qubit_shapes, -1, batch_dim)
-    new_shape = [2] * (num_target_qubit + num_other_qubits) + [-1, batch_num]
-    state = state.reshape(new_shape)
     # only when control qubits are 11111... the gate is applied
-    unaffected_state = state[
-        ..., :-1, :
-    ]  # (*target_qubit_shapes, *other_qubit_shapes, flattened_dim-1, batch_dim)
-    state_to_apply_gate = state[
-        ..., -1, :
-    ]  # (*target_qubit_shapes, *other_qubit_shapes, batch_dim)
-    # apply gate
-    batch_dim_name = "batch"
-    target_qubit_names = [f"t{i}" for i in target_qubit]
-    other_qubit_names = [f"o{i}" for i in other_qubits]
-    gate_output_qubit_names = [f"g{i}" for i in target_qubit]
-    einsum_str = "{gate_dims}, {state_dims} -> {output_dims}".format(
-        gate_dims=" ".join(gate_output_qubit_names + target_qubit_names),
-        state_dims=" ".join(target_qubit_names + other_qubit_names + [batch_dim_name]),
-        output_dims=" ".join(gate_output_qubit_names + other_qubit_names + [batch_dim_name]),
+    return _apply_gate_on_controlled_slice(
+        quantum_states, gate, target_qubit, control_qubit, batched=True, inplace=inplace
     )
-    new_state = einsum(gate, state_to_apply_gate, einsum_str)
-    new_state = new_state.unsqueeze(-2)  # (*target_qubit_shapes, *other_qubit_shapes, 1, batch_dim)
-
-    final_state = torch.cat(
-        [unaffected_state, new_state], dim=-2
-    )  # (*target_qubit_shapes, *other_qubit_shapes, flattened_dim)
-    final_state = final_state.reshape(
-        state_shape
-    )  # (*target_qubit_shapes, *other_qubit_shapes, *control_qubit_shapes, batch_dim)
-
-    # inverse the previous permutations
-    inverse_permute_qubit_dims = inverse_permutation(permute_qubit_dims)
-    final_state = final_state.permute(inverse_permute_qubit_dims)  # (*qubit_shapes, batch_dim)
-    final_state = torch.movedim(final_state, -1, 0)  # (batch_dim, *qubit_shapes)
-    return final_state
 
 
 def apply_gate_nonbatched(
@@ -419,6 +393,422 @@ def __apply_gate_for_vmap(
 
 apply_gate_batched_with_vmap = torch.vmap(__apply_gate_for_vmap, in_dims=(0, None))
 
+# %% ../../3-5.ipynb 18
+from typing import Tuple
+
+
+def plan_gate_fusion(
+    gate_qubits: List[List[int]], max_width: int
+) -> List[Tuple[List[int], List[int]]]:
+    """
+    Group a sequence of gates into runs of consecutive gates, each of which is fused into one gate
+    acting on at most `max_width` qubits. A gate is added to the current run as long as the union of
+    the qubits of the run stays within `max_width`, so the gates on overlapping qubits, e.g. those of a stair, are fused.
+
+    Args:
+        gate_qubits (List[List[int]]): The qubits (targets and controls) of each gate in the sequence.
+        max_width (int): The maximum number of qubits of a fused gate. Wider gates are left unfused.
+    Returns:
+        List[Tuple[List[int], List[int]]]: The sorted qubits and the gate indices of each fused gate.
+    """
+    assert max_width >= 1, "max_width must be at least 1"
+    plan = []
+    run_qubits = set()
+    run_indices = []
+    for idx, qubits in enumerate(gate_qubits):
+        if len(run_indices) > 0 and len(run_qubits | set(qubits)) <= max_width:
+            run_qubits |= set(qubits)
+            run_indices.append(idx)
+        else:
+            if len(run_indices) > 0:
+                plan.append((sorted(run_qubits), run_indices))
+            run_qubits = set(qubits)
+            run_indices = [idx]
+    if len(run_indices) > 0:
+        plan.append((sorted(run_qubits), run_indices))
+    return plan
+
+
+def fuse_gate_tensors(
+    gates: List[torch.Tensor],
+    target_qubits: List[List[int]],
+    control_qubits: List[List[int]],
+    fused_qubits: List[int],
+) -> torch.Tensor:
+    """
+    Multiply a sequence of (controlled) gates into one gate tensor on `fused_qubits`.
+
+    The fused gate is computed by applying the gates in order to all the basis states of `fused_qubits` at once.
+
+    Args:
+        gates (List[torch.Tensor]): The gate tensors in the order of application.
+        target_qubits (List[List[int]]): The target qubits of each gate, which must be in `fused_qubits`.
+        control_qubits (List[List[int]]): The control qubits of each gate, which must be in `fused_qubits`.
+        fused_qubits (List[int]): The qubits of the fused gate, in the order of its indices.
+    Returns:
+        torch.Tensor: The fused gate tensor of shape (2,) * (2 * len(fused_qubits)).
+    """
+    width = len(fused_qubits)
+    local_index = {q: i for i, q in enumerate(fused_qubits)}
+    dtype = gates[0].dtype
+    for gate in gates[1:]:
+        dtype = torch.promote_types(dtype, gate.dtype)
+    dim = 2**width
+    # the i-th state of the batch is the i-th basis state, so the batch of the outputs is the transposed gate matrix
+    states = torch.eye(dim, dtype=dtype, device=gates[0].device).reshape(dim, *([2] * width))
+    for gate, targets, controls in zip(gates, target_qubits, control_qubits):
+        states = apply_gate_batched(
+            quantum_states=states,
+            gate=gate,
+            target_qubit=[local_index[q] for q in targets],
+            control_qubit=[local_index[q] for q in controls],
+        )
+    return states.reshape(dim, dim).mT.reshape([2] * (2 * width))
+
+# %% ../../3-5.ipynb 22
+from functools import lru_cache
+from typing import Tuple
+import string
+
+
+@lru_cache(maxsize=256)
+def statevector_gate_plan(
+    num_qubits: int, target_qubit: Tuple[int, ...], control_qubit: Tuple[int, ...]
+) -> Tuple[Tuple[int, ...], Tuple[int | slice, ...], str | None]:
+    """
+    Calculate how a gate is applied to flat statevectors of shape (batch, 2 ** num_qubits), where qubit 0 is
+    the most significant bit. The plans are cached by their arguments, so each gate of a circuit costs a constant
+    Python overhead after its first application.
+
+    The flat states are viewed without copying as a tensor whose dims are the target qubits, the control qubits
+    and the merged runs of the other qubits. The controlled slice is selected by indexing 1 at the control dims.
+    If the target qubits are consecutive and ascending and there are no control qubits, they are merged into one dim,
+    so that the gate is applied by a plain matmul.
+
+    Args:
+        num_qubits (int): The number of qubits.
+        target_qubit (Tuple[int, ...]): The target qubits, in the order of the indices of the gate.
+        control_qubit (Tuple[int, ...]): The control qubits.
+    Returns:
+        Tuple[Tuple[int, ...], Tuple[int | slice, ...], str | None]: The view shape without the batch dim,
+        the index of the controlled slice including the batch dim, and the einsum equation of the gate tensor
+        and the slice, which is None for the matmul.
+    """
+    assert not iterable_have_common(target_qubit, control_qubit), (
+        "target qubit and control qubit must not overlap"
+    )
+    for qidx in target_qubit + control_qubit:
+        assert 0 <= qidx < num_qubits, f"qubit index {qidx} out of range"
+    num_target_qubit = len(target_qubit)
+    use_matmul = len(control_qubit) == 0 and target_qubit == tuple(
+        range(target_qubit[0], target_qubit[0] + num_target_qubit)
+    )
+    if use_matmul:
+        num_leading_qubits = target_qubit[0]
+        num_trailing_qubits = num_qubits - num_leading_qubits - num_target_qubit
+        view_shape = (2**num_leading_qubits, 2**num_target_qubit, 2**num_trailing_qubits)
+        return view_shape, (slice(None),) * 4, None
+
+    letters = iter(string.ascii_letters)
+    batch_letter = next(letters)
+    input_letters = {q: next(letters) for q in target_qubit}
+    output_letters = {q: next(letters) for q in target_qubit}
+    view_shape, index = [], [slice(None)]
+    state_dims, output_dims = [batch_letter], [batch_letter]
+    run_length = 0
+
+    def _flush_run():
+        nonlocal run_length
+        if run_length > 0:
+            letter = next(letters)
+            view_shape.append(2**run_length)
+            index.append(slice(None))
+            state_dims.append(letter)
+            output_dims.append(letter)
+            run_length = 0
+
+    qidx = 0
+    while qidx < num_qubits:
+        if qidx in target_qubit:
+            _flush_run()
+            view_shape.append(2)
+            index.append(slice(None))
+            state_dims.append(input_letters[qidx])
+            output_dims.append(output_letters[qidx])
+        elif qidx in control_qubit:
+            _flush_run()
+            view_shape.append(2)
+            index.append(1)
+        else:
+            run_length += 1
+        qidx += 1
+    _flush_run()
+
+    gate_dims = "".join(output_letters[q] for q in target_qubit) + "".join(
+        input_letters[q] for q in target_qubit
+    )
+    equation = f"{gate_dims},{''.join(state_dims)}->{''.join(output_dims)}"
+    return tuple(view_shape), tuple(index), equation
+
+
+def apply_gate_flat(
+    *,
+    quantum_states: torch.Tensor,
+    gate: torch.Tensor,
+    target_qubit: int | List[int],
+    control_qubit: int | List[int] | None = None,
+    inplace: bool = False,
+) -> torch.Tensor:
+    """
+    Apply a quantum gate to flat statevectors. It can also be used to implement controlled gates by specifying control qubits.
+
+    The gate is applied to a strided view of the states given by a cached plan, see `statevector_gate_plan`,
+    and the result is flat and contiguous again.
+
+    Args:
+        quantum_states (torch.Tensor): The flat statevectors of shape (batch, 2 ** num_qubits), which must be contiguous.
+        gate (torch.Tensor): The quantum gate tensor or matrix, not batched.
+        target_qubit (int | List[int]): The target qubit(s) to apply the gate to.
+        control_qubit (int | List[int] | None): The control qubit(s) for the gate. If None, no control qubits are used.
+        inplace (bool): Whether to write the result into `quantum_states`, e.g. for inference. Not for states that require gradients.
+    Returns:
+        torch.Tensor: The new flat statevectors.
+    """
+    assert quantum_states.ndim == 2, "quantum_states must be of shape (batch, 2 ** num_qubits)"
+    num_qubits = quantum_states.shape[1].bit_length() - 1
+    assert quantum_states.shape[1] == 2**num_qubits, (
+        "the dimension of the states must be a power of 2"
+    )
+    target_qubit = (target_qubit,) if isinstance(target_qubit, int) else tuple(target_qubit)
+    if control_qubit is None:
+        control_qubit = ()
+    else:
+        control_qubit = (control_qubit,) if isinstance(control_qubit, int) else tuple(control_qubit)
+    input_states = quantum_states
+    quantum_states, gate = unify_tensor_dtypes(quantum_states, gate)
+    assert not inplace or quantum_states is input_states, (
+        "the dtype of quantum_states must not be changed by the gate for in-place application"
+    )
+
+    view_shape, index, equation = statevector_gate_plan(num_qubits, target_qubit, control_qubit)
+    batch_size = quantum_states.shape[0]
+    states = quantum_states.view(batch_size, *view_shape)
+    if equation is None:
+        gate_dim = 2 ** len(target_qubit)
+        new_states = gate.reshape(gate_dim, gate_dim) @ states
+    else:
+        gate = gate.reshape([2] * (2 * len(target_qubit)))
+        new_states = torch.einsum(equation, gate, states[index])
+
+    if inplace:
+        states[index] = new_states
+        return quantum_states
+    elif len(control_qubit) == 0:
+        return new_states.reshape(batch_size, -1)
+    else:
+        final_states = quantum_states.clone()
+        final_states.view(batch_size, *view_shape)[index] = new_states
+        return final_states
+
+# %% ../../3-5.ipynb 29
+def _move_mps_center(
+    mps_tensors: List[torch.Tensor], center: int | None, new_center: int
+) -> List[torch.Tensor]:
+    from tensor_network.mps.functional import orthogonalize_arange
+
+    if center is None:
+        mps_tensors = orthogonalize_arange(mps_tensors, 0, new_center, "qr")
+        return orthogonalize_arange(mps_tensors, len(mps_tensors) - 1, new_center, "qr")
+    elif center != new_center:
+        return orthogonalize_arange(mps_tensors, center, new_center, "qr")
+    else:
+        return [t for t in mps_tensors]
+
+
+def apply_gate_mps(
+    *,
+    mps_tensors: List[torch.Tensor],
+    center: int | None,
+    gate: torch.Tensor,
+    target_qubit: int | List[int],
+    max_virtual_dim: int | None = None,
+    truncate_cutoff: float | None = None,
+) -> Tuple[List[torch.Tensor], int]:
+    """
+    Apply a one- or two-qubit gate to a quantum state in the form of an open MPS with local updates.
+
+    The center of the MPS is first moved to the target qubit, or to the closer one of the two target qubits.
+    A one-qubit gate then only updates its local tensor. A two-qubit gate on neighbouring qubits updates their local tensors
+    with one truncated SVD, see `evolve_gate_nearest_neighbour`, and a two-qubit gate on other qubits routes them with SWAP gates,
+    see `evolve_gate_2body_swap`.
+
+    Args:
+        mps_tensors (List[torch.Tensor]): The local tensors of shape (left, 2, right), which are not modified.
+        center (int | None): The center of the MPS, or None if it is not center orthogonalized.
+        gate (torch.Tensor): The quantum gate tensor or matrix, not batched.
+        target_qubit (int | List[int]): The target qubit(s) to apply the gate to.
+        max_virtual_dim (int | None): The maximum virtual dimension after the gate. If None, the bonds are not truncated by dimension.
+        truncate_cutoff (float | None): The maximum relative discarded weight of each truncated bond, see `truncated_svd`.
+    Returns:
+        Tuple[List[torch.Tensor], int]: The new local tensors and the new center of the MPS.
+    """
+    # the MPS backend is imported lazily, so that the gates do not depend on it at import time
+    from tensor_network.algorithms.time_evolving_block_decimation import (
+        evolve_gate_nearest_neighbour,
+        evolve_gate_2body_swap,
+    )
+
+    target_qubit = [target_qubit] if isinstance(target_qubit, int) else list(target_qubit)
+    num_target_qubit = len(target_qubit)
+    assert num_target_qubit in (1, 2), "the MPS backend only supports one- and two-qubit gates"
+    assert len(set(target_qubit)) == num_target_qubit, "target qubits must be different"
+    length = len(mps_tensors)
+    assert length > 1, "the MPS must have at least 2 qubits"
+    assert mps_tensors[0].shape[0] == 1 and mps_tensors[-1].shape[2] == 1, (
+        "the MPS backend only supports open MPS"
+    )
+    for qidx in target_qubit:
+        assert 0 <= qidx < length, f"qubit index {qidx} out of range"
+        assert mps_tensors[qidx].shape[1] == 2, "the physical dimensions must be 2"
+
+    # e.g. real local tensors of feature-mapped samples and complex gates
+    _, gate = unify_tensor_dtypes(mps_tensors[0], gate)
+    local_tensors = [t.to(gate.dtype) for t in mps_tensors]
+
+    if num_target_qubit == 1:
+        p = target_qubit[0]
+        local_tensors = _move_mps_center(local_tensors, center, p)
+        local_tensors[p] = einsum(
+            gate.reshape(2, 2),
+            local_tensors[p],
+            "new_physical physical, left physical right -> left new_physical right",
+        ).contiguous()  # the orthogonalization steps view the local tensors as matrices
+        return local_tensors, p
+
+    p0, p1 = target_qubit
+    gate = gate.reshape(2, 2, 2, 2)
+    if p0 > p1:
+        # the indices of the gate follow the order of the target qubits
+        p0, p1 = p1, p0
+        gate = gate.permute(1, 0, 3, 2)
+    if center is None or abs(center - p0) <= abs(center - p1):
+        start, new_center = "left", p0
+    else:
+        start, new_center = "right", p1
+    local_tensors = _move_mps_center(local_tensors, center, new_center)
+    if max_virtual_dim is None:
+        # no bond of an open MPS can be larger
+        max_virtual_dim = 2 ** (length // 2)
+    if p1 == p0 + 1:
+        evolve_gate_nearest_neighbour(
+            local_tensors, gate, p0, max_virtual_dim, start, truncate_cutoff=truncate_cutoff
+        )
+    else:
+        evolve_gate_2body_swap(
+            local_tensors, gate, p0, p1, max_virtual_dim, start, truncate_cutoff=truncate_cutoff
+        )
+    return local_tensors, new_center
+
+# %% ../../3-5.ipynb 34
+def _apply_gate_either(
+    states: torch.Tensor,
+    gate: torch.Tensor,
+    target_qubit: int | List[int],
+    control_qubit: int | List[int] | None,
+    batched: bool,
+) -> torch.Tensor:
+    if batched:
+        return apply_gate_batched(
+            quantum_states=states, gate=gate, target_qubit=target_qubit, control_qubit=control_qubit
+        )
+    else:
+        return apply_gate(
+            quantum_state=states, gate=gate, target_qubit=target_qubit, control_qubit=control_qubit
+        )
+
+
+def _inverse_unitary_gate(gate: torch.Tensor) -> torch.Tensor:
+    gate_dim = int(gate.numel() ** 0.5)
+    return gate.reshape(gate_dim, gate_dim).mH.reshape(gate.shape)
+
+
+class _AdjointGateSequence(torch.autograd.Function):
+    @staticmethod
+    def forward(ctx, states, target_qubits, control_qubits, batched, *gates):
+        input_dtype = states.dtype
+        for gate, target_qubit, control_qubit in zip(gates, target_qubits, control_qubits):
+            states = _apply_gate_either(states, gate, target_qubit, control_qubit, batched)
+        # only the final states are kept, the others are recomputed in the backward pass
+        ctx.save_for_backward(states, *gates)
+        ctx.target_qubits = target_qubits
+        ctx.control_qubits = control_qubits
+        ctx.batched = batched
+        ctx.input_dtype = input_dtype
+        return states
+
+    @staticmethod
+    def backward(ctx, grad_states):
+        states, *gates = ctx.saved_tensors
+        grad_gates = [None] * len(gates)
+        for k in reversed(range(len(gates))):
+            gate = gates[k]
+            target_qubit, control_qubit = ctx.target_qubits[k], ctx.control_qubits[k]
+            prev_states = _apply_gate_either(
+                states, _inverse_unitary_gate(gate), target_qubit, control_qubit, ctx.batched
+            )
+            # the vector-Jacobian products of one gate application, with a graph of only this gate
+            with torch.enable_grad():
+                prev_states_leaf = prev_states.detach().requires_grad_()
+                gate_leaf = gate.detach().requires_grad_(ctx.needs_input_grad[4 + k])
+                new_states = _apply_gate_either(
+                    prev_states_leaf, gate_leaf, target_qubit, control_qubit, ctx.batched
+                )
+                inputs = [prev_states_leaf]
+                if gate_leaf.requires_grad:
+                    inputs.append(gate_leaf)
+                grads = torch.autograd.grad(new_states, inputs, grad_states)
+            grad_states = grads[0]
+            if gate_leaf.requires_grad:
+                grad_gates[k] = grads[1]
+            states = prev_states
+        if not ctx.input_dtype.is_complex:
+            grad_states = grad_states.real
+        return grad_states.to(ctx.input_dtype), None, None, None, *grad_gates
+
+
+def apply_gates_adjoint(
+    *,
+    quantum_states: torch.Tensor,
+    gates: List[torch.Tensor],
+    target_qubits: List[int | List[int]],
+    control_qubits: List[int | List[int] | None] | None = None,
+    batched: bool = True,
+) -> torch.Tensor:
+    """
+    Apply a sequence of unitary gates, with gradients by the adjoint method: instead of keeping the states between the gates for the backward pass,
+    they are recomputed backwards from the final states by applying the conjugate transposes of the gates.
+    So the activation memory does not grow with the number of gates, while the backward pass applies each gate 3 times.
+
+    The gates must be unitary, otherwise the recomputed states and the gradients are wrong.
+
+    Args:
+        quantum_states (torch.Tensor): The quantum state tensor, with the batch dimension at 0 if `batched`.
+        gates (List[torch.Tensor]): The unitary gate tensors, not batched.
+        target_qubits (List[int | List[int]]): The target qubit(s) of each gate.
+        control_qubits (List[int | List[int] | None] | None): The control qubit(s) of each gate. If None, no gate is controlled.
+        batched (bool): Whether the states are batched.
+    Returns:
+        torch.Tensor: The final states.
+    """
+    assert len(gates) > 0, "gates must not be empty"
+    assert len(target_qubits) == len(gates), "target_qubits must match gates"
+    if control_qubits is None:
+        control_qubits = [None] * len(gates)
+    assert len(control_qubits) == len(gates), "control_qubits must match gates"
+    return _AdjointGateSequence.apply(
+        quantum_states, list(target_qubits), list(control_qubits), batched, *gates
+    )
+
 # %% ../../3-8.ipynb 5
 from einops import rearrange
 from ..utils.checking import check_quantum_gate
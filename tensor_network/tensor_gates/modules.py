@@ -1,16 +1,20 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../../3-4.ipynb.
 
 # %% auto 0
-__all__ = ['QuantumGate', 'ParameterizedGate', 'SimpleGate', 'PauliGate', 'ADQCGate', 'RotateGate']
+__all__ = ['QuantumGate', 'ParameterizedGate', 'SimpleGate', 'PauliGate', 'ADQCGate', 'RotateGate', 'FusedGateSequence', 'StateVectorSimulator']
 
 # %% ../../3-4.ipynb 1
 import torch
 from torch import nn
 from . import functional
-from typing import List, Literal
+from typing import List, Literal, Self, TYPE_CHECKING
 from ..utils.checking import check_quantum_gate
 from ..utils.mapping import view_gate_tensor_as_matrix, view_gate_matrix_as_tensor
 
+if TYPE_CHECKING:
+    # the MPS backend is imported lazily, so that the gates do not depend on it at import time
+    from tensor_network.mps.modules import MPS
+
 # %% ../../3-4.ipynb 2
 class QuantumGate(nn.Module):
     """
@@ -43,19 +47,66 @@ class QuantumGate(nn.Module):
         self.target_qubit = target_qubit
         self.control_qubit = control_qubit
         self.batched_input = batched_input
+        self.max_virtual_dim = None
+        self.truncate_cutoff = None
+
+    def set_mps_truncation_(
+        self, max_virtual_dim: int | None = None, truncate_cutoff: float | None = None
+    ) -> Self:
+        """
+        Set how the MPS is truncated when the gate is applied to states in the form of MPS.
+
+        Args:
+            max_virtual_dim: The maximum virtual dimension after the gate. If None, no limit.
+            truncate_cutoff: The maximum relative discarded weight of each truncated bond. If None, only `max_virtual_dim` is used.
+        """
+        assert max_virtual_dim is None or max_virtual_dim > 0, "max_virtual_dim must be positive"
+        self.max_virtual_dim = max_virtual_dim
+        self.truncate_cutoff = truncate_cutoff
+        return self
+
+    def _apply_gate_mps(
+        self, mps: "MPS", gate: torch.Tensor, target_qubit: int | List[int]
+    ) -> "MPS":
+        from tensor_network.mps.modules import MPS
+
+        local_tensors, center = functional.apply_gate_mps(
+            mps_tensors=mps.local_tensors,
+            center=mps.center,
+            gate=gate,
+            target_qubit=target_qubit,
+            max_virtual_dim=self.max_virtual_dim,
+            truncate_cutoff=self.truncate_cutoff,
+        )
+        new_mps = MPS(mps_tensors=local_tensors)
+        new_mps._center = center
+        return new_mps
 
     def apply_gate(
         self,
         *,
-        tensor: torch.Tensor,
+        tensor: "torch.Tensor | MPS | List[MPS]",
         gate: torch.Tensor,
         target_qubit: int | List[int] | None = None,
         control_qubit: int | List[int] | None = None,
-    ) -> torch.Tensor:
+    ) -> "torch.Tensor | MPS | List[MPS]":
+        """
+        Apply the gate to dense states, or to states in the form of MPS (a list of MPS if batched), see `set_mps_truncation_`.
+        """
         target_qubit = self.target_qubit if target_qubit is None else target_qubit
         control_qubit = self.control_qubit if control_qubit is None else control_qubit
         assert target_qubit is not None, "target_qubit must be specified or set in the gate"
-        if self.batched_input:
+        if not isinstance(tensor, torch.Tensor):
+            from tensor_network.mps.modules import MPS
+
+            assert control_qubit is None, "controlled gates are not supported by the MPS backend"
+            if self.batched_input:
+                assert isinstance(tensor, list), "batched states must be a list of MPS"
+                return [self._apply_gate_mps(mps, gate, target_qubit) for mps in tensor]
+            else:
+                assert isinstance(tensor, MPS), "the state must be a MPS if not batched"
+                return self._apply_gate_mps(tensor, gate, target_qubit)
+        elif self.batched_input:
             return functional.apply_gate_batched(
                 quantum_states=tensor,
                 gate=gate,
@@ -70,6 +121,12 @@ class QuantumGate(nn.Module):
                 control_qubit=control_qubit,
             )
 
+    def gate_tensor(self) -> torch.Tensor:
+        """
+        Get the gate tensor that the gate applies, e.g. for fusing it with other gates.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not provide its gate tensor")
+
     def forward(self, *args, **kwargs) -> torch.Tensor:
         raise NotImplementedError(
             "QuantumGate is an abstract class and should not be used directly.\nYou should implement your own gate class by inheriting from QuantumGate and make use of the apply_gate method."
@@ -160,6 +217,9 @@ class SimpleGate(QuantumGate):
             gate, requires_grad=gate.requires_grad if requires_grad is None else requires_grad
         )
 
+    def gate_tensor(self) -> torch.Tensor:
+        return self.gate
+
     def forward(
         self,
         tensor: torch.Tensor,
@@ -283,6 +343,75 @@ class ADQCGate(ParameterizedGate):
             control_qubit=control_qubit,
             batched_input=batched_input,
         )
+        self._cache_key = None
+        self._cached_gate = None
+
+    def _gate_cacheable(self) -> bool:
+        return not (torch.is_grad_enabled() and self.gate_params.requires_grad)
+
+    def _gate_cache_key(self) -> tuple:
+        return (self.gate_params.data_ptr(), self.gate_params._version)
+
+    def invalidate_cache_(self) -> Self:
+        """
+        Drop the cached gate tensor, see `gate_tensor`.
+        """
+        self._cache_key, self._cached_gate = None, None
+        return self
+
+    def gate_tensor(self) -> torch.Tensor:
+        """
+        Get the unitary gate tensor projected from the latent one, from the cache if the parameters are not changed,
+        e.g. at inference.
+
+        The changes are tracked by the data pointer and the version counter of `gate_params`, so in-place ops on the
+        parameter itself and replacing it are detected. Writes through `gate_params.data`, e.g. `gate_params.data.copy_(...)`,
+        do not bump the version counter, so `invalidate_cache_` must be called after them.
+        """
+        cacheable = self._gate_cacheable()
+        key = self._gate_cache_key()
+        if cacheable and self._cache_key == key:
+            return self._cached_gate
+        P, _S, Q = torch.linalg.svd(view_gate_tensor_as_matrix(self.gate_params))
+        gate_matrix = P @ Q
+        gate = view_gate_matrix_as_tensor(gate_matrix)
+        if cacheable:
+            self._cache_key, self._cached_gate = key, gate
+        return gate
+
+    @staticmethod
+    def batched_gate_tensors(gates: List["ADQCGate"]) -> List[torch.Tensor]:
+        """
+        Get the unitary gate tensors of many gates, like `gate_tensor`, but projected with one stacked SVD per gate shape
+        instead of one SVD per gate.
+
+        Args:
+            gates: The ADQC gates.
+        Returns:
+            The gate tensors in the order of the gates.
+        """
+        gate_tensors = [None] * len(gates)
+        # indices of the gates to project, grouped by the shapes of their latent tensors
+        groups = {}
+        for i, gate in enumerate(gates):
+            assert isinstance(gate, ADQCGate), "gates must be ADQCGate"
+            if gate._gate_cacheable() and gate._cache_key == gate._gate_cache_key():
+                gate_tensors[i] = gate._cached_gate
+            else:
+                groups.setdefault(gate.gate_params.shape, []).append(i)
+
+        for shape, indices in groups.items():
+            latent_gate_matrices = torch.stack(
+                [view_gate_tensor_as_matrix(gates[i].gate_params) for i in indices]
+            )
+            P, _S, Q = torch.linalg.svd(latent_gate_matrices)
+            gate_matrices = P @ Q
+            for i, gate_matrix in zip(indices, gate_matrices.unbind(0)):
+                gate = gates[i]
+                gate_tensors[i] = gate_matrix.reshape(shape)
+                if gate._gate_cacheable():
+                    gate._cache_key, gate._cached_gate = gate._gate_cache_key(), gate_tensors[i]
+        return gate_tensors
 
     def forward(
         self,
@@ -291,9 +420,7 @@ class ADQCGate(ParameterizedGate):
         target_qubit: int | List[int] | None = None,
         control_qubit: int | List[int] | None = None,
     ) -> torch.Tensor:
-        P, _S, Q = torch.linalg.svd(view_gate_tensor_as_matrix(self.gate_params))
-        gate_matrix = P @ Q
-        gate = view_gate_matrix_as_tensor(gate_matrix)
+        gate = self.gate_tensor()
         return self.apply_gate(
             tensor=tensor, gate=gate, target_qubit=target_qubit, control_qubit=control_qubit
         )
@@ -338,6 +465,14 @@ class RotateGate(ParameterizedGate):
             batched_input=batched_input,
         )
 
+    def gate_tensor(self) -> torch.Tensor:
+        return functional.rotate(
+            ita=self.gate_params["ita"],
+            beta=self.gate_params["beta"],
+            delta=self.gate_params["delta"],
+            gamma=self.gate_params["gamma"],
+        )
+
     def forward(
         self,
         tensor: torch.Tensor,
@@ -345,12 +480,183 @@ class RotateGate(ParameterizedGate):
         target_qubit: int | List[int] | None = None,
         control_qubit: int | List[int] | None = None,
     ) -> torch.Tensor:
-        rotate_gate = functional.rotate(
-            ita=self.gate_params["ita"],
-            beta=self.gate_params["beta"],
-            delta=self.gate_params["delta"],
-            gamma=self.gate_params["gamma"],
-        )
+        rotate_gate = self.gate_tensor()
         return self.apply_gate(
             tensor=tensor, gate=rotate_gate, target_qubit=target_qubit, control_qubit=control_qubit
         )
+
+# %% ../../3-5.ipynb 19
+from typing import Sequence
+
+
+class FusedGateSequence(nn.Module):
+    """
+    Apply a sequence of gates with fewer passes over the state, by fusing consecutive gates on overlapping qubits
+    into wider gates, see `functional.plan_gate_fusion`.
+
+    The fusion plan only depends on the qubits of the gates, so it is built once. The fused gate tensors depend on
+    the parameters and are cached when no gradient is needed, until any parameter is changed in-place or replaced,
+    which is tracked by the version counters and data pointers of the parameters. Writes through `param.data`
+    do not bump the version counters, so `invalidate_cache_` must be called after them.
+    The gates are shared, so e.g. `FusedGateSequence(adqc_net.net)` uses and trains the parameters of `adqc_net`.
+    """
+
+    def __init__(self, gates: nn.Sequential | Sequence[QuantumGate], max_width: int = 4):
+        """
+        Args:
+            gates: The gates in the order of application. Each gate must implement `gate_tensor` and have its qubits set.
+            max_width: The maximum number of qubits of a fused gate.
+        """
+        super().__init__()
+        self.gates = gates if isinstance(gates, nn.Module) else nn.ModuleList(gates)
+        assert len(self.gates) > 0, "gates must not be empty"
+        self.target_qubits = []
+        self.control_qubits = []
+        for gate in self.gates:
+            assert isinstance(gate, QuantumGate), "gates must be QuantumGate"
+            assert gate.target_qubit is not None, "target_qubit must be set in the gate"
+            targets, controls = gate.target_qubit, gate.control_qubit
+            self.target_qubits.append([targets] if isinstance(targets, int) else list(targets))
+            if controls is None:
+                self.control_qubits.append([])
+            else:
+                controls = [controls] if isinstance(controls, int) else list(controls)
+                self.control_qubits.append(controls)
+        self.batched_input = self.gates[0].batched_input
+        assert all(gate.batched_input == self.batched_input for gate in self.gates), (
+            "all gates must have the same batched_input"
+        )
+        self.plan = functional.plan_gate_fusion(
+            [t + c for t, c in zip(self.target_qubits, self.control_qubits)], max_width
+        )
+        # a single uncontrolled gate is applied as it is, on its own target qubits
+        self._is_single = [
+            len(indices) == 1 and len(self.control_qubits[indices[0]]) == 0
+            for _, indices in self.plan
+        ]
+        self._apply_qubits = [
+            self.target_qubits[indices[0]] if is_single else fused_qubits
+            for (fused_qubits, indices), is_single in zip(self.plan, self._is_single)
+        ]
+        self._cache_key = None
+        self._cached_gates = None
+
+    def invalidate_cache_(self) -> Self:
+        """
+        Drop the cached fused gate tensors and the cached gate tensors of the gates.
+        """
+        self._cache_key, self._cached_gates = None, None
+        for gate in self.gates:
+            if hasattr(gate, "invalidate_cache_"):
+                gate.invalidate_cache_()
+        return self
+
+    def fused_gate_tensors(self) -> List[torch.Tensor]:
+        """
+        Get the fused gate tensors of the plan, from the cache if the parameters are not changed.
+        """
+        params = list(self.parameters())
+        cacheable = not (torch.is_grad_enabled() and any(p.requires_grad for p in params))
+        key = tuple((p.data_ptr(), p._version) for p in params)
+        if cacheable and self._cache_key == key:
+            return self._cached_gates
+
+        gate_tensors = [gate.gate_tensor() for gate in self.gates]
+        fused_gates = []
+        for (fused_qubits, indices), is_single in zip(self.plan, self._is_single):
+            if is_single:
+                fused_gates.append(gate_tensors[indices[0]])
+            else:
+                fused_gates.append(
+                    functional.fuse_gate_tensors(
+                        [gate_tensors[i] for i in indices],
+                        [self.target_qubits[i] for i in indices],
+                        [self.control_qubits[i] for i in indices],
+                        fused_qubits,
+                    )
+                )
+        if cacheable:
+            self._cache_key, self._cached_gates = key, fused_gates
+        else:
+            self._cache_key, self._cached_gates = None, None
+        return fused_gates
+
+    def forward(self, tensor: torch.Tensor) -> torch.Tensor:
+        for qubits, gate in zip(self._apply_qubits, self.fused_gate_tensors()):
+            if self.batched_input:
+                tensor = functional.apply_gate_batched(
+                    quantum_states=tensor, gate=gate, target_qubit=qubits
+                )
+            else:
+                tensor = functional.apply_gate(quantum_state=tensor, gate=gate, target_qubit=qubits)
+        return tensor
+
+# %% ../../3-5.ipynb 23
+class StateVectorSimulator:
+    """
+    A statevector simulator that keeps the states as a flat, contiguous buffer of shape (batch, 2 ** num_qubits)
+    through a circuit and applies the gates with `functional.apply_gate_flat`.
+    """
+
+    def __init__(self, states: torch.Tensor, *, batched: bool = True, inplace: bool = False):
+        """
+        Args:
+            states: The states in tensor form, of shape (batch, 2, ..., 2) if batched else (2, ..., 2).
+            batched: Whether the states are batched.
+            inplace: Whether to update the buffer in-place, e.g. for inference. Not for states that require gradients.
+        """
+        if not batched:
+            states = states.unsqueeze(0)
+        self.num_qubits = states.ndim - 1
+        self.batched = batched
+        self.inplace = inplace
+        self.states = states.reshape(states.shape[0], -1).contiguous()
+        if inplace and self.states.data_ptr() == states.data_ptr():
+            # do not write into the given states
+            self.states = self.states.clone()
+
+    def apply_gate_(
+        self,
+        gate: torch.Tensor,
+        target_qubit: int | List[int],
+        control_qubit: int | List[int] | None = None,
+    ) -> Self:
+        """
+        Apply a gate to the states.
+
+        Args:
+            gate: The quantum gate tensor or matrix.
+            target_qubit: The target qubit(s) to apply the gate to.
+            control_qubit: The control qubit(s) for the gate.
+        Returns:
+            StateVectorSimulator: This simulator.
+        """
+        self.states = functional.apply_gate_flat(
+            quantum_states=self.states,
+            gate=gate,
+            target_qubit=target_qubit,
+            control_qubit=control_qubit,
+            inplace=self.inplace,
+        )
+        return self
+
+    def run_(self, gates: nn.Sequential | List[QuantumGate]) -> Self:
+        """
+        Apply a sequence of gates to the states, with the gate tensors from `QuantumGate.gate_tensor`.
+
+        Args:
+            gates: The gates in the order of application, whose qubits must be set.
+        Returns:
+            StateVectorSimulator: This simulator.
+        """
+        for gate in gates:
+            assert gate.target_qubit is not None, "target_qubit must be set in the gate"
+            self.apply_gate_(gate.gate_tensor(), gate.target_qubit, gate.control_qubit)
+        return self
+
+    def to_tensor(self) -> torch.Tensor:
+        """
+        Get the states in tensor form, as a view of the buffer.
+        """
+        states = self.states.view(self.states.shape[0], *([2] * self.num_qubits))
+        return states if self.batched else states.squeeze(0)
\ No newline at end of file
@@ -168,7 +168,7 @@ def get_fashion_mnist_datasets(cache_path: str) -> Tuple[data.Dataset, data.Data
     )
     return fmnist_train_set, fmnist_test_set
 
-# %% ../../3-5.ipynb 20
+# %% ../../3-5.ipynb 39
 def split_classification_dataset(
     data: torch.Tensor, targets: torch.Tensor, ratio: float, shuffle: bool = True
 ) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]:
@@ -74,7 +74,7 @@ def zeros_state(*, num_qubits: int, dtype: torch.dtype) -> torch.Tensor:
     state = state.reshape(shape)
     return state
 
-# %% ../../3-5.ipynb 19
+# %% ../../3-5.ipynb 38
 from typing import Tuple
 
 